@@ -4,7 +4,9 @@ from RLFramework.Game import Game
 from RLFramework.GameState import GameState
 import numpy as np
 
+from BlokusBitboard import check_placement_is_legal, update_anchors
 from BlokusPieces import BLOKUS_PIECE_MAP
+from BlokusPlacementTable import get_placement_table
 if TYPE_CHECKING:
     from BlokusGame import BlokusGame
 
@@ -37,20 +39,12 @@ class BlokusAction(Action):
         if self.piece_id == -1:
             game.current_pid = (game.current_pid + 1) % len(game.players)
             return game.game_state_class.from_game(game, copy = False)
-        # Get the piece
-        piece = BLOKUS_PIECE_MAP[self.piece_id]
-        piece = np.rot90(piece, k=self.rotation)
-        if self.flip:
-            piece = np.flip(piece, axis=0)
-        # Modify the values of the piece
-        piece = np.where(piece == 0, -1, game.current_pid)
-        # Place the piece on the board, so that only the self.pid values are changed on the board
-        board = np.array(game.board)
-        piece_mask = piece != -1
-        # Where piece_mask is True, we set the values of the board to the values of the piece
-        board[self.x:self.x+piece.shape[0], self.y:self.y+piece.shape[1]][piece_mask] = piece[piece_mask]
-        # Update the board
-        game.board = board.tolist()
+        # Place the piece on the grids of the placement (in place)
+        board = game.board
+        table = get_placement_table(board.shape)
+        placement_id = table.get_placement_id(self.piece_id, self.x, self.y, self.rotation, self.flip)
+        board.flat[table.get_cells(placement_id)] = game.current_pid
+        game.player_anchors = update_anchors(game.player_anchors, board, game.current_pid, placement_id)
         # Remove the piece from the player's remaining pieces
         game.player_remaining_pieces[game.current_pid].remove(self.piece_id)
         # Update the current player
@@ -74,13 +68,18 @@ class BlokusAction(Action):
     def get_piece_coordinates(self):
         """ Return a list of coordinates of the piece.
         """
-        piece = BLOKUS_PIECE_MAP[self.piece_id]
-        piece = np.rot90(piece, k=self.rotation)
-        if self.flip:
-            piece = np.flip(piece, axis=0)
-        piece_grids = np.where(piece != 0)
-        piece_grids = [(self.x + piece_grids[0][i], self.y + piece_grids[1][i]) for i in range(len(piece_grids[0]))]
-        return piece_grids
+        table = get_placement_table()
+        placement_id = table.get_placement_id(self.piece_id, self.x, self.y, self.rotation, self.flip)
+        if placement_id < 0:
+            # The piece is not inside the (default size) board
+            piece = BLOKUS_PIECE_MAP[self.piece_id]
+            piece = np.rot90(piece, k=self.rotation)
+            if self.flip:
+                piece = np.flip(piece, axis=0)
+            piece_grids = np.where(piece != 0)
+            return [(self.x + piece_grids[0][i], self.y + piece_grids[1][i]) for i in range(len(piece_grids[0]))]
+        width = table.board_size[1]
+        return [divmod(int(cell), width) for cell in table.get_cells(placement_id)]
     
     def find_num_connected_pieces(self, board, pid, x, y):
         """ Find the number of connected pieces, starting from the grid (x, y).
@@ -105,12 +104,16 @@ class BlokusAction(Action):
                     stack.append((new_x, new_y))
         return num_connected_pieces
     
-    def check_action_is_legal(self, game: Game):
-        return self._check_action_is_legal(game)
-        #return True, ""
+    def check_action_is_legal(self, game: 'BlokusGame') -> Tuple[bool, str]:
+        """ Check if the action is legal in the given game state (see BlokusBitboard.check_placement_is_legal).
+        """
+        pid = game.current_pid
+        return check_placement_is_legal(game.board, pid, game.player_remaining_pieces[pid], self.piece_id, self.x, self.y,
+                                        self.rotation, self.flip, anchors=game.player_anchors[pid])
     
-    def _check_action_is_legal(self, game: 'BlokusGame') -> Tuple[bool, str]:
-        """ Check if the action is legal in the given game state.
+    def _check_action_is_legal_reference(self, game: 'BlokusGame') -> Tuple[bool, str]:
+        """ Check if the action is legal in the given game state by placing the piece on the board, and checking its neighbours.
+        This is the original rule check, that is only used to verify the bitboard engine (see BlokusGameState.get_all_possible_actions_reference).
         """
         if self.piece_id == -1:
             return True, ""
@@ -139,7 +142,7 @@ class BlokusAction(Action):
         piece_grids = [(self.x + piece_grids[0][i], self.y + piece_grids[1][i]) for i in range(len(piece_grids[0]))]
         
         # If the piece is the player's first piece, then one of it's grids must be in the player's corner 0:lu, 1:ru, 2:rd, 3:ld
-        if np.sum(np.array(game.board) == game.current_pid) == 0:
+        if not np.any(game.board == game.current_pid):
             corner_grids = [(0, 0),
                             (0, game.board_size[1]-1),
                             (game.board_size[0]-1, game.board_size[1]-1),
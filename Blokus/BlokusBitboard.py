@@ -0,0 +1,143 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from BlokusPlacementTable import NUM_PIECES, get_placement_table
+
+""" A bitboard engine for Blokus move generation.
+The board is represented as Python ints, where the bit x * width + y is the grid (x, y).
+Each player has a mask of the grids they occupy, and the occupancy mask has all the occupied grids.
+The masks of the placed pieces are read from the placement table (see BlokusPlacementTable).
+"""
+
+class BlokusBitboard:
+    """ The board of a Blokus game as bitmasks.
+    """
+    def __init__(self, board):
+        board = np.asarray(board)
+        self.board_size : Tuple[int, int] = board.shape
+        self.num_grids = board.size
+        self.player_masks : Dict[int, int] = {}
+        for pid in range(4):
+            self.player_masks[pid] = self.to_mask(board == pid)
+        self.occupied = self.to_mask(board != -1)
+        width = self.board_size[1]
+        self.full_mask = (1 << self.num_grids) - 1
+        # The masks of the grids, that have a grid to the left/right, to not wrap over the rows when shifting
+        first_column = sum(1 << (x * width) for x in range(self.board_size[0]))
+        self.not_first_column = self.full_mask & ~first_column
+        self.not_last_column = self.full_mask & ~(first_column << (width - 1))
+        self.corners = self.grid_mask([(0, 0), (0, width - 1), (self.board_size[0] - 1, width - 1), (self.board_size[0] - 1, 0)])
+
+    @staticmethod
+    def to_mask(grids : np.ndarray) -> int:
+        """ Convert a boolean array of the board to a mask.
+        """
+        return int.from_bytes(np.packbits(grids.ravel(), bitorder="little").tobytes(), "little")
+
+    def grid_mask(self, grids : List[Tuple[int, int]]) -> int:
+        """ Return the mask of the grids.
+        """
+        return sum(1 << (x * self.board_size[1] + y) for x, y in set(grids))
+
+    def side_neighbours(self, mask : int) -> int:
+        """ The grids, that share a side with a grid in mask.
+        """
+        width = self.board_size[1]
+        return (((mask << 1) & self.not_first_column) | ((mask >> 1) & self.not_last_column) |
+                (mask << width) | (mask >> width)) & self.full_mask
+
+    def diagonal_neighbours(self, mask : int) -> int:
+        """ The grids, that share a corner with a grid in mask.
+        """
+        width = self.board_size[1]
+        return (((mask << (width + 1)) & self.not_first_column) | ((mask << (width - 1)) & self.not_last_column) |
+                ((mask >> (width - 1)) & self.not_first_column) | ((mask >> (width + 1)) & self.not_last_column)) & self.full_mask
+
+    def get_anchors(self, pid : int) -> int:
+        """ Return the mask of the grids, that a piece of the player can be connected to:
+        the free grids sharing a corner, and no side, with the player's pieces (or the free corners of the board for the first piece).
+        """
+        own = self.player_masks[pid]
+        if own == 0:
+            return self.corners & ~self.occupied
+        anchors = self.diagonal_neighbours(own) & ~self.side_neighbours(own) & ~self.occupied
+        # The rule check in BlokusAction does not count a corner connection at the upper right corner of the board
+        return anchors & ~(1 << (self.board_size[1] - 1))
+
+    def get_legal_placements(self, pid : int, piece_ids : List[int], anchors : int = None) -> List[int]:
+        """ Return the ids of the legal placements of the pieces in the placement table.
+        Every legal placement covers an anchor, so the candidates are the placements covering the anchors,
+        and a candidate is legal, if it does not overlap or touch the player's pieces.
+        If the player's anchors are not given (e.g. tracked incrementally, see update_anchors), they are computed.
+        """
+        own = self.player_masks[pid]
+        forbidden = self.occupied | (self.side_neighbours(own) if own else 0)
+        if anchors is None:
+            anchors = self.get_anchors(pid)
+        anchor_grids = []
+        while anchors:
+            low_bit = anchors & -anchors
+            anchor_grids.append(low_bit.bit_length() - 1)
+            anchors ^= low_bit
+        table = get_placement_table(self.board_size)
+        candidates = table.get_anchor_placements(anchor_grids)
+        is_available = np.zeros(NUM_PIECES, dtype=bool)
+        is_available[list(piece_ids)] = True
+        candidates = candidates[is_available[table.piece_ids[candidates]]]
+        cell_masks = table.cell_mask_ints
+        return [i for i in candidates.tolist() if not cell_masks[i] & forbidden]
+
+
+def check_placement_is_legal(board, pid : int, remaining_pieces : List[int], piece_id : int, x : int, y : int,
+                             rotation : int, flip : bool, anchors : int = None) -> Tuple[bool, str]:
+    """ Check whether player pid can place the piece rotated and flipped, with its upper left corner at (x, y).
+    This only depends on the arguments (the board as an array or a list of lists), so no game is needed.
+    The placement is legal, if the piece is one of the remaining pieces, the (padded) piece is inside the board,
+    it does not overlap other pieces, it does not share a side with the player's pieces, and it covers one of the player's anchors.
+    The anchors can be given, if they are tracked (see update_anchors). The null action (piece_id -1) is always legal.
+    Returns whether the placement is legal, and the reason if not.
+    """
+    if piece_id == -1:
+        return True, ""
+    if piece_id not in remaining_pieces:
+        return False, f"The piece with id {piece_id} is not in the player's remaining pieces."
+    bitboard = BlokusBitboard(board)
+    table = get_placement_table(bitboard.board_size)
+    placement_id = table.get_placement_id(piece_id, x, y, rotation, flip)
+    if placement_id < 0:
+        return False, f"The piece with id {piece_id} is placed outside the board."
+    mask = table.cell_mask_ints[placement_id]
+    if mask & bitboard.occupied:
+        return False, f"The piece with id {piece_id} overlaps with another piece."
+    own = bitboard.player_masks[pid]
+    if own and mask & bitboard.side_neighbours(own):
+        return False, f"The selected piece is connected to another piece with a side."
+    if anchors is None:
+        anchors = bitboard.get_anchors(pid)
+    if not mask & anchors:
+        if not own:
+            return False, f"The selected piece is not connected to the player's corner."
+        return False, f"The selected piece is not connected to another piece with a corner."
+    return True, ""
+
+def compute_anchors(board) -> List[int]:
+    """ Compute the anchors of each player from scratch.
+    """
+    bitboard = BlokusBitboard(board)
+    return [bitboard.get_anchors(pid) for pid in range(4)]
+
+def update_anchors(player_anchors : List[int], board, pid : int, placement_id : int) -> List[int]:
+    """ Update the players' anchors after player pid made the placement (board is the board after the placement).
+    The anchors covered by the piece are removed from every player. The player gains the corners of the piece (see BlokusPlacementTable),
+    and loses the anchors, that are occupied or share a side with its pieces. If the piece is the player's first piece,
+    the board corners are no longer its anchors.
+    """
+    bitboard = BlokusBitboard(board)
+    table = get_placement_table(bitboard.board_size)
+    cells = table.cell_mask_ints[placement_id]
+    player_anchors = [anchors & ~cells for anchors in player_anchors]
+    own = bitboard.player_masks[pid]
+    anchors = table.corner_mask_ints[placement_id] | (player_anchors[pid] if own != cells else 0)
+    # The rule check in BlokusAction does not count a corner connection at the upper right corner of the board
+    player_anchors[pid] = anchors & ~bitboard.occupied & ~bitboard.side_neighbours(own) & ~(1 << (bitboard.board_size[1] - 1))
+    return player_anchors
@@ -0,0 +1,54 @@
+from typing import Dict, List, Tuple
+from RLFramework.CascadePlayer import CascadePlayer
+from BlokusGameState import BlokusGameState
+from BlokusGreedyPlayer import get_area
+from BlokusNNPlayer import BlokusNNPlayer
+import numpy as np
+
+class BlokusCascadeNNPlayer(CascadePlayer, BlokusNNPlayer):
+    """ A BlokusNNPlayer, that first ranks the successors by the area they cover (like BlokusGreedyPlayer),
+    and only evaluates the best successors with the neural network.
+    """
+    # The cheap evaluator needs the successor states
+    encode_successors = False
+    
+    def __init__(self,name : str = "CascadeNNPlayer",
+                 model_path : str = "",
+                 action_selection_strategy = "greedy",
+                 action_selection_args : Tuple[Tuple,Dict] = ((), {}),
+                 logger_args : dict = None,
+                 evaluation_cache_size : int = 2**16,
+                 evaluation_cache_path : str = None,
+                 phase_top_k : Tuple[int, int, int] = (32, 64, None),
+                 phase_boundaries : Tuple[int, int] = (4, 14),
+                 top_fraction : float = None,
+                 agreement_check_prob : float = 0.0,
+                 ):
+        """ The number of successors evaluated with the network depends on the phase of the game:
+        phase_top_k are the k's of the opening, middlegame and endgame (None means no limit),
+        and the phase is determined by the number of pieces the player has placed, split at phase_boundaries.
+        """
+        super().__init__(name=name,
+                         model_path=model_path,
+                         action_selection_strategy=action_selection_strategy,
+                         action_selection_args=action_selection_args,
+                         logger_args=logger_args,
+                         evaluation_cache_size=evaluation_cache_size,
+                         evaluation_cache_path=evaluation_cache_path,
+                         )
+        assert len(phase_top_k) == len(phase_boundaries) + 1, "There must be one k per phase."
+        self.phase_top_k = phase_top_k
+        self.phase_boundaries = phase_boundaries
+        self.configure_cascade(top_k=self.get_phase_top_k, top_fraction=top_fraction, agreement_check_prob=agreement_check_prob)
+
+    def get_phase_top_k(self, game) -> int:
+        """ Return the k of the current phase of the game.
+        """
+        num_placed_pieces = 21 - len(game.player_remaining_pieces[self.pid])
+        phase = int(np.searchsorted(self.phase_boundaries, num_placed_pieces, side="right"))
+        return self.phase_top_k[phase]
+
+    def cheap_evaluate_states(self, states : List[BlokusGameState]) -> List[float]:
+        """ Evaluate the states by the area the player covers (see BlokusGreedyPlayer).
+        """
+        return [get_area(s, self.pid) for s in states]
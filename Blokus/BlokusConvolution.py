@@ -0,0 +1,95 @@
+import functools as ft
+from typing import List, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from BlokusPieces import BLOKUS_PIECE_MAP
+from BlokusPlacementTable import get_piece_transformations, get_placement_table, transform_piece
+
+""" A vectorized Blokus move generator, that checks every position of every piece orientation at once with NumPy.
+A placement is legal if the piece does not cover a forbidden grid (an occupied grid or a grid sharing a side with the player's pieces)
+and covers atleast one of the player's anchors (see BlokusBitboard.get_anchors).
+The anchors are never forbidden, so both conditions are checked with one mask, that is 1 at the anchors and -8 at the forbidden grids:
+a piece (atmost 5 grids) is legal at a position, if the 2D correlation of the piece's mask with this mask is positive.
+The padded pieces have five sizes, and the orientations of the same size are correlated together,
+with one matrix product of the mask's sliding windows and the stacked piece masks.
+
+This is an alternative backend to the bitboard generator (see BlokusGameState.move_generator), and returns the same placement ids.
+"""
+
+@ft.lru_cache(maxsize=None)
+def get_orientation_masks(board_size : Tuple[int, int]) -> List[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+    """ Return the orientations of the pieces grouped by the size of the padded piece.
+    Each group is (size, masks, piece_ids, offsets): masks (k, size * size) float32 are the flattened masks of the k orientations,
+    piece_ids are their pieces, and offsets are the ids of their first placements in the placement table.
+    """
+    table = get_placement_table(board_size)
+    groups = {}
+    for piece_id in range(len(BLOKUS_PIECE_MAP)):
+        for t, (rot, flip) in enumerate(get_piece_transformations(piece_id)):
+            piece = transform_piece(piece_id, rot, flip)
+            masks, piece_ids, offsets = groups.setdefault(piece.shape[0], ([], [], []))
+            masks.append((piece != 0).ravel())
+            piece_ids.append(piece_id)
+            offsets.append(int(table.transformation_offsets[piece_id, t]))
+    return [(size, np.array(masks, dtype=np.float32), np.array(piece_ids), np.array(offsets, dtype=np.int64))
+            for size, (masks, piece_ids, offsets) in sorted(groups.items())]
+
+def anchors_to_array(anchors : int, board_size : Tuple[int, int]) -> np.ndarray:
+    """ Convert an anchor bitboard (see BlokusBitboard) to a boolean array of the board.
+    """
+    num_grids = board_size[0] * board_size[1]
+    packed = np.frombuffer(anchors.to_bytes((num_grids + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, bitorder="little")[:num_grids].reshape(board_size).astype(bool)
+
+def get_anchor_array(board : np.ndarray, pid : int) -> np.ndarray:
+    """ Return the anchors of the player as a boolean array: the free grids sharing a corner, and no side, with the player's pieces
+    (or the free corners of the board for the first piece). Same as BlokusBitboard.get_anchors.
+    """
+    free = board == -1
+    own = board == pid
+    if not np.any(own):
+        anchors = np.zeros(board.shape, dtype=bool)
+        anchors[[0, 0, -1, -1], [0, -1, -1, 0]] = True
+        return anchors & free
+    padded = np.pad(own, 1)
+    diagonals = padded[:-2, :-2] | padded[:-2, 2:] | padded[2:, :-2] | padded[2:, 2:]
+    anchors = diagonals & ~side_neighbours(own) & free
+    # The rule check in BlokusAction does not count a corner connection at the upper right corner of the board
+    anchors[0, -1] = False
+    return anchors
+
+def side_neighbours(mask : np.ndarray) -> np.ndarray:
+    """ The grids, that share a side with a grid in mask.
+    """
+    padded = np.pad(mask, 1)
+    return padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
+
+def get_legal_placements_convolution(board : np.ndarray, pid : int, piece_ids : List[int], anchors : int = None) -> List[int]:
+    """ Return the ids of the legal placements of the pieces in the placement table, sorted.
+    If the player's anchors (as a bitboard) are not given, they are computed.
+    """
+    board = np.asarray(board)
+    board_size = board.shape
+    own = board == pid
+    forbidden = (board != -1) | side_neighbours(own)
+    anchor_array = get_anchor_array(board, pid) if anchors is None else anchors_to_array(anchors, board_size)
+    if not np.any(anchor_array):
+        return []
+    scores = anchor_array.astype(np.float32) - 8 * forbidden.astype(np.float32)
+    is_available = np.zeros(len(BLOKUS_PIECE_MAP), dtype=bool)
+    is_available[list(piece_ids)] = True
+    placement_ids = []
+    for size, masks, mask_piece_ids, offsets in get_orientation_masks(board_size):
+        selected = is_available[mask_piece_ids]
+        if not np.any(selected):
+            continue
+        masks = masks[selected]
+        # The (num_xs * num_ys, size * size) windows of the scores, correlated with the piece masks
+        windows = sliding_window_view(scores, (size, size)).reshape(-1, size * size)
+        positions, orientations = np.nonzero(windows @ masks.T > 0)
+        # The position index is x * num_ys + y, like the placements of an orientation in the table
+        placement_ids.append(offsets[selected][orientations] + positions)
+    if not placement_ids:
+        return []
+    return np.sort(np.concatenate(placement_ids)).tolist()
@@ -0,0 +1,64 @@
+from typing import Tuple
+
+import numpy as np
+import tensorflow as tf
+from BlokusPlacementTable import get_placement_table
+
+""" A Blokus model with a delta-encoded input: instead of one full successor vector per placement,
+the model gets the board once per turn, the ids of the placements (in the placement table), and the metadata
+(the perspective pid, the next pid and the moving pid). Several boards can be evaluated in one call:
+each placement has the index of its board (board_ids), for example to evaluate many states with the placement, that places nothing. The successor vectors are expanded inside the graph
+from a constant table of the placements' grids, and evaluated with the standard model.
+
+The expansion gives exactly the standard input (BlokusGameState.to_vector) of each successor, so the delta model
+has the same weights as the standard model, and is trained with the same data. Only the conversion is different:
+convert_model_to_tflite(path, output_file, wrap_model=build_delta_model)
+"""
+
+@tf.keras.saving.register_keras_serializable()
+class ExpandPlacementsLayer(tf.keras.layers.Layer):
+    """ Expand the boards (m, number of grids), the metadata of the boards (m, 3), the placement ids (n,)
+    and the index of each placement's board (n,) to the standard inputs of the successors (n, 2 + number of grids).
+    The placement id num_placements (see no_placement_id) places nothing, so the board itself can be evaluated.
+    """
+    def __init__(self, board_size : Tuple[int, int] = (20, 20), **kwargs):
+        super(ExpandPlacementsLayer, self).__init__(**kwargs)
+        self.board_size = tuple(board_size)
+        self.num_grids = self.board_size[0] * self.board_size[1]
+        # The grids of each placement, and the empty placement. The padding (-1) is replaced with an extra grid, that is dropped.
+        cells = np.asarray(get_placement_table(self.board_size).cells, dtype=np.int32)
+        cells = np.vstack([cells, np.full((1, cells.shape[1]), -1, dtype=np.int32)])
+        self.cells = tf.constant(np.where(cells < 0, self.num_grids, cells))
+
+    def call(self, inputs):
+        board, metadata, placement_ids, board_ids = inputs
+        board = tf.gather(board, board_ids)
+        metadata = tf.gather(metadata, board_ids)
+        cells = tf.gather(self.cells, placement_ids)
+        rows = tf.broadcast_to(tf.expand_dims(tf.range(tf.shape(cells)[0]), 1), tf.shape(cells))
+        masks = tf.scatter_nd(tf.stack([rows, cells], axis=2), tf.ones_like(cells, dtype=tf.float32),
+                              tf.stack([tf.shape(cells)[0], self.num_grids + 1]))
+        masks = tf.minimum(masks[:, :self.num_grids], 1)
+        boards = board * (1 - masks) + metadata[:, 2:3] * masks
+        meta = metadata[:, :2]
+        return tf.concat([meta, boards], axis=1)
+
+    def get_config(self):
+        config = super(ExpandPlacementsLayer, self).get_config()
+        config.update({"board_size" : self.board_size})
+        return config
+
+def no_placement_id(board_size : Tuple[int, int] = (20, 20)) -> int:
+    """ The placement id, that places nothing (see ExpandPlacementsLayer).
+    """
+    return get_placement_table(board_size).num_placements
+
+def build_delta_model(model : tf.keras.Model, board_size : Tuple[int, int] = (20, 20)) -> tf.keras.Model:
+    """ Wrap the standard model, so that it takes the inputs "board", "metadata", "placement_ids" and "board_ids".
+    """
+    board = tf.keras.Input(shape=(board_size[0] * board_size[1],), name="board")
+    metadata = tf.keras.Input(shape=(3,), name="metadata")
+    placement_ids = tf.keras.Input(shape=(), dtype=tf.int32, name="placement_ids")
+    board_ids = tf.keras.Input(shape=(), dtype=tf.int32, name="board_ids")
+    successors = ExpandPlacementsLayer(board_size)([board, metadata, placement_ids, board_ids])
+    return tf.keras.Model(inputs=[board, metadata, placement_ids, board_ids], outputs=model(successors))
@@ -1,3 +1,4 @@
+import functools as ft
 import os
 import sys
 from RLFramework import GameState
@@ -9,8 +10,10 @@ from typing import Dict, List, Tuple, TYPE_CHECKING
 
 import tensorflow as tf
 from BlokusAction import BlokusAction
+from BlokusBitboard import compute_anchors
 from BlokusPlayer import BlokusPlayer
 from BlokusResult import BlokusResult
+from board_norming import RotLayer
 import matplotlib.pyplot as plt
 from matplotlib import colors, cm
 from RLFramework.utils import TFLiteModel
@@ -42,22 +45,6 @@ def rotate_board_to_perspective(board, perspective_pid):
     #print(board)
     return board
 
-@tf.keras.saving.register_keras_serializable()
-class RotLayer(tf.keras.layers.Layer):
-    def __init__(self, **kwargs):
-        super(RotLayer, self).__init__(**kwargs)
-        
-    def call(self, inputs, training=None):
-        board = tf.map_fn(rotate90, inputs)
-        return board
-
-@tf.keras.saving.register_keras_serializable()
-def rotate90(x):
-    board = tf.reshape(x[:-1], (20, 20, 1))
-    rots = tf.cast(x[-1], tf.int32)
-    
-    return tf.image.rot90(board, k=rots)
-
 def rotate_board_to_perspective_tf(board, perspective_pid):
     
     perspective_pid = tf.reshape(perspective_pid, (-1,1))
@@ -146,6 +133,39 @@ def normalize_board_to_perspective(board, perspective_pid):
     
     return board
 
+@ft.lru_cache(maxsize=None)
+def _get_rotation_indices(board_size : Tuple[int, int]) -> np.ndarray:
+    """ Return the (4, number of grids) flat indices, such that board.ravel()[indices[k]] is np.rot90(board, k).ravel().
+    """
+    flat_indices = np.arange(board_size[0] * board_size[1]).reshape(board_size)
+    return np.array([np.rot90(flat_indices, k=k).ravel() for k in range(4)])
+
+def normalize_boards_to_perspective(boards : np.ndarray, perspective_pids) -> np.ndarray:
+    """ The same as normalize_board_to_perspective for a batch of (square) boards (N, size, size),
+    from the perspectives (N,) or from one perspective: each board is rotated, so that the corner with the perspective player
+    is the top left corner, and the players are relabeled, so that the perspective player is 0.
+    The boards with the same rotation are rotated with one gather from precomputed indices, and the relabeling is done on int8.
+    """
+    boards = np.asarray(boards)
+    num_boards, board_size = len(boards), boards.shape[1:]
+    assert board_size[0] == board_size[1], f"The boards must be square, not {board_size}"
+    flat_boards = boards.reshape(num_boards, -1).astype(np.int8, copy=False)
+    perspective_pids = np.broadcast_to(np.asarray(perspective_pids, dtype=np.int8), (num_boards,))
+    # The corners in the order top left, top right, bottom right, bottom left
+    num_grids = flat_boards.shape[1]
+    corner_indices = np.array([0, board_size[1] - 1, num_grids - 1, num_grids - board_size[1]])
+    is_own_corner = flat_boards[:, corner_indices] == perspective_pids[:, np.newaxis]
+    # The number of rotations is the index of the first corner with the perspective player (0 if there is none)
+    num_rotations = np.where(np.any(is_own_corner, axis=1), np.argmax(is_own_corner, axis=1), 0)
+    rotation_indices = _get_rotation_indices(board_size)
+    rotated = np.empty_like(flat_boards)
+    for k in range(4):
+        selected = np.flatnonzero(num_rotations == k)
+        if len(selected) > 0:
+            rotated[selected] = flat_boards[selected][:, rotation_indices[k]]
+    relabeled = (rotated - perspective_pids[:, np.newaxis]) % 4
+    return np.where(rotated < 0, np.int8(-1), relabeled).reshape(boards.shape)
+
 class BlokusGame(Game):
     """ The game class handles the play loop.
     """
@@ -197,11 +217,12 @@ class BlokusGame(Game):
     def initialize_game(self, players: List[BlokusPlayer]) -> None:
         """ When the game is started, we need to set the board.
         """
-        self.board = [[-1 for _ in range(self.board_size[1])] for _ in range(self.board_size[0])]
-        #self.board = np.array(self.board)
+        self.board = np.full(self.board_size, -1, dtype=np.int8)
         self.current_pid = 0
         self.player_remaining_pieces = [list(range(21)) for _ in players]
         self.finished_players = []
+        # The anchors of each player as bitboards, which are updated incrementally when pieces are placed
+        self.player_anchors = compute_anchors(self.board)
     
     def init_render_human(self) -> None:
         plt.cla()
@@ -224,7 +245,7 @@ class BlokusGame(Game):
         color_map.set_bad(color='black')
         
         #board_normed = normalize_board_to_perspective_tf(np.array(self.board), self.current_pid)
-        board_normed = np.array(self.board)
+        board_normed = self.board
         #assert board_normed.shape == self.board_size
         #assert board_normed[0,0] == 0
         board_ax.matshow(board_normed, cmap=color_map, vmin=-1, vmax=3)
@@ -277,11 +298,13 @@ class BlokusGame(Game):
         """ Restore the game to the state described by the game_state.
         We don't need to worry about the players states or their scores, as they are automatically restored.
         """
-        self.board = game_state.board
+        # The board is modified in place, so the game has its own copy
+        self.board = np.array(game_state.board, dtype=np.int8)
         self.player_remaining_pieces = game_state.player_remaining_pieces
         self.current_pid = game_state.current_pid
         self.previous_turns = game_state.previous_turns
         self.finished_players = game_state.finished_players
+        self.player_anchors = game_state.player_anchors
     
     def calculate_reward(self, pid : int, game_state: 'BlokusGameState') -> float:
         """ Calculate the reward for the player.
@@ -296,6 +319,12 @@ class BlokusGame(Game):
         self.update_player_attributes()
         return super().environment_action(game_state)
     
+    def estimate_remaining_turns(self) -> int:
+        """ Estimate the number of turns left by the number of pieces the unfinished players have left.
+        The players usually finish before placing all their pieces, so this is an upper bound.
+        """
+        return sum(len(self.player_remaining_pieces[pid]) for pid in self.unfinished_players)
+
     def check_is_player_finished(self, pid : int, game_state: GameState) -> bool:
         """ A player is finished if the game is finished.
         I.e. if the player has won, or if there are no more free spots, or if the other player is finished.
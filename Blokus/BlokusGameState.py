@@ -1,26 +1,46 @@
-from typing import List, Set, SupportsFloat, Tuple, TYPE_CHECKING
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
 import functools as ft
+import json
 
 import numpy as np
 from RLFramework.Game import Game
 from RLFramework.GameState import GameState
 from BlokusAction import BlokusAction
+from BlokusBitboard import BlokusBitboard, check_placement_is_legal, compute_anchors
+from BlokusConvolution import get_legal_placements_convolution
+from BlokusPlacementTable import get_placement_table
 from BlokusPieces import BLOKUS_PIECE_MAP
 from BlokusPlayer import BlokusPlayer
-from BlokusGame import BlokusGame
+from BlokusGame import BlokusGame, normalize_boards_to_perspective
+
+# The version of the fingerprints' format (the first byte), so that the evaluations of other formats in persistent caches are not used
+FINGERPRINT_VERSION = 2
 
 class BlokusGameState(GameState):
     """ A class representing the state of the game TicTacToe.
     """
+    # The move generator: "bitboard" (see BlokusBitboard) or "convolution" (see BlokusConvolution)
+    move_generator : str = "bitboard"
+    # Whether the boards of the vectors (to_vector, and the successor vectors of BlokusNNPlayer) are normalized to the perspective
+    # (see BlokusGame.normalize_boards_to_perspective), so that the model does not need to normalize them.
+    # The perspective pid of a normalized vector is 0, so the normalization in the models (NormalizeBoardToPerspectiveLayer) does nothing.
+    normalize_perspective : bool = False
+    
     def __init__(self, state_json):
+        # The board is an int8 array. A board given as a list of lists (e.g. read from JSON) is converted.
+        state_json["board"] = np.asarray(state_json["board"], dtype=np.int8)
         super().__init__(state_json)
-        self.board = state_json["board"]
+        self.board : np.ndarray = state_json["board"]
         self.player_remaining_pieces : List[List[int]] = state_json["player_remaining_pieces"]
         self.finished_players : List[int] = state_json["finished_players"]
+        # The anchors of each player as bitboards (see BlokusBitboard.update_anchors)
+        if "player_anchors" not in state_json:
+            state_json["player_anchors"] = compute_anchors(self.board)
+        self.player_anchors : List[int] = state_json["player_anchors"]
         
     @property
     def game(self) -> 'BlokusGame':
-        game = BlokusGame(board_size=(len(self.board), len(self.board[0])))
+        game = BlokusGame(board_size=self.board.shape)
         game.initialize_game_wrap([BlokusPlayer(name=f"Player{i}", logger_args=None) for i in range(4)])
         game.restore_game(self)
         return game
@@ -34,8 +54,7 @@ class BlokusGameState(GameState):
         all_players_finished = len(self.finished_players) == len(self.player_scores)
         # Number of squares occupied by player
         if not all_players_finished:
-            player_board = np.array(self.board) == pid
-            player_area = np.sum(player_board)
+            player_area = np.count_nonzero(self.board == pid)
             # Return how much new area the player has occupied
             score_boost = player_area - self.player_scores[pid]
             return score_boost
@@ -48,109 +67,11 @@ class BlokusGameState(GameState):
         return score_boost
         
     def _check_action_is_legal(self, action : 'BlokusAction') -> Tuple[bool, str]:
-        """ Check if the action is legal in the given game state.
+        """ Check if the action is legal in the given game state (see BlokusBitboard.check_placement_is_legal).
         """
-        game = self.game
-        return action.check_action_is_legal(game)
-        if action.piece_id == -1:
-            return True, ""
-        # Check if the piece is in the player's remaining pieces
-        if action.piece_id not in self.player_remaining_pieces[self.current_pid]:
-            return False, f"The piece with id {action.piece_id} is not in the player's remaining pieces."
-        # Check if the piece is placed on the board
-        piece = BLOKUS_PIECE_MAP[action.piece_id]
-        piece = np.rot90(piece, k=action.rotation)
-        if action.flip:
-            piece = np.flip(piece, axis=0)
-        piece = np.where(piece == 0, -1, self.current_pid)
-        
-        if ((not self.is_grid_inside_board((action.x, action.y))) or 
-            (not self.is_grid_inside_board((action.x + piece.shape[0] - 1,
-                                            action.y + piece.shape[1] - 1)))):
-            return False, f"The piece with id {self.piece_id} is placed outside the board."
-        # Check that all the values in board are -1, where the piece is != -1
-        board_area = np.array(self.board)[action.x:action.x+piece.shape[0], action.y:action.y+piece.shape[1]]
-        if np.any((board_area != -1) & (piece != -1)):
-            return False, f"The piece with id {action.piece_id} overlaps with another piece."
-        
-        piece_grids = np.where(piece != -1)
-        piece_grids = [(action.x + piece_grids[0][i], action.y + piece_grids[1][i]) for i in range(len(piece_grids[0]))]
-        
-        board_size = (len(self.board), len(self.board[0]))
-        # If the piece is the player's first piece, then one of it's grids must be in the player's corner 0:lu, 1:ru, 2:rd, 3:ld
-        if np.sum(np.array(self.board) == self.current_pid) == 0:
-            corner_grids = [(0, 0),
-                            (0, board_size[1]-1),
-                            (board_size[0]-1, board_size[1]-1),
-                            (board_size[0]-1, 0)]
-            for corner_grid in corner_grids:
-                if corner_grid in piece_grids:
-                    return True, ""
-            return False, f"The selected piece is not connected to the player's corner."
-
-        # Calculate the size of the piece
-        piece_size = np.sum(piece != -1)
-        # Find a coordinate, where the piece is true
-        piece_begin = np.where(piece != -1)
-        piece_begin = (piece_begin[0][0], piece_begin[1][0])
-        piece_begin = (action.x + piece_begin[0], action.y + piece_begin[1])
-        board_copy = np.copy(self.board)
-        # Set the piece on the board
-        piece_mask = piece != -1
-        board_copy[action.x:action.x+piece.shape[0], action.y:action.y+piece.shape[1]][piece_mask] = piece[piece_mask]
-        
-        # Calculate the number self.pid pieces, that are connected from the piece_begin
-        connected_pieces = self.find_num_connected_pieces(board_copy,
-                                                          self.current_pid,
-                                                          piece_begin[0],
-                                                          piece_begin[1])
-        board_copy = np.array(self.board)
-        if connected_pieces != piece_size:
-            return False, f"The selected piece is connected to another piece with a side."
-
-        # Finally, check that there is atleast one own piece,
-        # connected via a corner to the new piece
-        # To find this, we check all the grids in the piece.
-        # If any of the new pieces is connected via a corner to another one of our piece,
-        # then they are connected via a corner.
-        all_adjacent_grid_changes = [(0,-1), (-1,-1), (-1,0), (-1,1), (0,1), (1,1), (1,0), (1,-1)]
-        has_connected_corner = False
-        for x, y in piece_grids:
-            # A corner is free, if three consecutive adjacent grids are free (excluding all three on the same row/col)
-            has_free_corner = False
-            for start_idx in range(8 - 2):
-                for end_idx in range(start_idx, start_idx + 3):
-                    changes = all_adjacent_grid_changes[start_idx:end_idx+1]
-                    # If all the changes are in the same row or column, then continue
-                    if len(set([c[0] for c in changes])) == 1 or len(set([c[1] for c in changes])) == 1:
-                        continue
-                    adjacent_grids = [(x + dx, y + dy) for dx, dy in changes]
-                    # Check that all the grids are inside the board
-                    if not all([self.is_grid_inside_board(grid) for grid in adjacent_grids]):
-                        continue
-                    #print(adjacent_grids)
-                    # Check that all the grids are not ours
-                    if all([board_copy[grid] == self.current_pid for grid in adjacent_grids]):
-                        continue
-                    has_free_corner = True
-                    break
-            if not has_free_corner:
-                continue
-            
-            # Check if the piece is connected to another piece with a corner
-            corner_changes = [(1, 1), (-1, 1), (1, -1), (-1, -1)]
-            for dx, dy in corner_changes:
-                new_x, new_y = x + dx, y + dy
-                if new_x < 0 or new_x >= board_size[0] or new_y < 0 or new_y >= board_size[1]:
-                    continue
-                if board_copy[new_x, new_y] == self.current_pid and (new_x, new_y) not in piece_grids:
-                    has_connected_corner = True
-                    break
-            if has_connected_corner:
-                break
-        if not has_connected_corner:
-            return False, f"The selected piece is not connected to another piece with a corner."
-        return True, ""
+        pid = self.current_pid
+        return check_placement_is_legal(self.board, pid, self.player_remaining_pieces[pid], action.piece_id, action.x, action.y,
+                                        action.rotation, action.flip, anchors=self.player_anchors[pid])
     
     @ft.lru_cache(maxsize=None)
     def get_piece_transformations(self, piece_id : int) -> List[Tuple[int, bool]]:
@@ -173,12 +94,35 @@ class BlokusGameState(GameState):
         
     def get_all_possible_actions(self) -> List[BlokusAction]:
         """ Return all possible actions.
+        The legal placements are generated with the move_generator backend.
+        If there are no legal placements, the player is finished, and the only action is the null action.
         """
+        pid = self.current_pid
+        if self.move_generator == "bitboard":
+            placement_ids = BlokusBitboard(self.board).get_legal_placements(pid, self.player_remaining_pieces[pid], anchors=self.player_anchors[pid])
+        elif self.move_generator == "convolution":
+            placement_ids = get_legal_placements_convolution(self.board, pid, self.player_remaining_pieces[pid], anchors=self.player_anchors[pid])
+        else:
+            raise ValueError(f"Unknown move generator '{self.move_generator}'. Available generators: 'bitboard', 'convolution'")
+        placements = get_placement_table(self.board.shape).placements[placement_ids].tolist()
+        actions = [BlokusAction(piece_id, x, y, rot, bool(flip)) for piece_id, rot, flip, x, y in placements]
+        if len(actions) == 0:
+            # Add null action
+            actions.append(BlokusAction(-1, -1, -1, -1, False))
+            self.finished_players.append(self.current_pid)
+        return actions
+
+    def get_all_possible_actions_reference(self) -> List[BlokusAction]:
+        """ Return all possible actions by checking the legality of every placement of every piece on every
+        corner position with the original rule check in BlokusAction. This is slow, and is only used to verify the bitboard engine.
+        The same placement may be in the list multiple times.
+        """
+        game = self.game
         available_pieces = self.player_remaining_pieces[self.current_pid]
         actions = []
         corner_grids, grids_sharing_corner = self.get_corner_positions(self.current_pid)
-        board_size = (len(self.board), len(self.board[0]))
-        if np.sum(np.array(self.board) == self.current_pid) == 0:
+        board_size = self.board.shape
+        if not np.any(self.board == self.current_pid):
             # If the board is empty, the only valid places are the corners of the board.
             grids_sharing_corner = [(0, 0), (0, board_size[1] - 1), (board_size[0] - 1, 0), (board_size[0] - 1, board_size[1] - 1)]
         # All the possible actions are all the ways to place a piece on the board,
@@ -188,7 +132,7 @@ class BlokusGameState(GameState):
                 piece = BLOKUS_PIECE_MAP[piece_id]
                 """
                 piece_grids = np.where(piece != 0)
-                max_block_size = self.find_num_connected_pieces(np.array(self.board),
+                max_block_size = self.find_num_connected_pieces(self.board,
                                                                 -1,
                                                                 valid_shared_corner[0],
                                                                 valid_shared_corner[1]
@@ -218,7 +162,7 @@ class BlokusGameState(GameState):
                         # Check if an equivalent action is already in the list
                         #if action in actions:
                         #    continue
-                        is_legal, msg = self._check_action_is_legal(action)
+                        is_legal, msg = action._check_action_is_legal_reference(game)
                         if is_legal:
                             actions.append(action)
         #print(f"Number of possible actions: {len(actions)}") 
@@ -264,10 +208,10 @@ class BlokusGameState(GameState):
         with atleast one of the grids in the first list, and that do not have any
         common sides with the player's pieces.
         """
-        player_board = np.array(self.board) == pid
+        player_board = self.board == pid
         corner_grids = set()
         grids_sharing_corner = set()
-        board_size = (len(self.board), len(self.board[0]))
+        board_size = self.board.shape
         # We add the first vector to the end, so that we can check the last corner
         to_surrounding_grids = [(0,-1), (-1,-1), (-1,0), (-1,1), (0,1), (1,1), (1,0), (1,-1), (0,-1)]
         for i in range(board_size[0]):
@@ -297,7 +241,7 @@ class BlokusGameState(GameState):
                         #print(f"Surrounding grids {three_surrounding_grids} occupied")
                         continue
                     # The middle grid must also be free
-                    if self.board[i + middle_vec[0]][j + middle_vec[1]] != -1:
+                    if self.board[i + middle_vec[0], j + middle_vec[1]] != -1:
                         #print(f"Middle grid {i + middle_vec[0], j + middle_vec[1]} not free")
                         continue
                     # Finally, check that none of our own pieces share a side with the middle grid
@@ -321,7 +265,7 @@ class BlokusGameState(GameState):
     def is_grid_inside_board(self, grid):
         """ Check if the grid is inside the board.
         """
-        board_size = (len(self.board), len(self.board[0]))
+        board_size = self.board.shape
         return grid[0] >= 0 and grid[0] < board_size[0] and grid[1] >= 0 and grid[1] < board_size[1]
     
     def is_terminal(self) -> bool:
@@ -341,13 +285,74 @@ class BlokusGameState(GameState):
             "board" : game.board,
             "player_remaining_pieces" : game.player_remaining_pieces,
             "finished_players" : game.finished_players,
+            "player_anchors" : game.player_anchors,
         }
         return state_json
     
-    def to_vector(self, perspective_pid = None) -> List[SupportsFloat]:
-        """ Convert the state to a vector.
+    def pack_state_json(self, state_json):
+        """ Pack the board as int8 bytes, and the remaining pieces and the anchors of each player as bytes.
+        """
+        packed = super().pack_state_json(state_json)
+        packed["board"] = (state_json["board"].tobytes(), state_json["board"].shape)
+        packed["player_remaining_pieces"] = [self.pack_ints(pieces) for pieces in state_json["player_remaining_pieces"]]
+        num_bytes = (state_json["board"].size + 7) // 8
+        packed["player_anchors"] = [anchors.to_bytes(num_bytes, "little") for anchors in state_json["player_anchors"]]
+        return packed
+
+    def deepcopy(self) -> 'BlokusGameState':
+        """ Deepcopy self by copying the state_json. The board is copied as an array, and the other values through JSON.
+        """
+        state_json = dict(self.state_json)
+        board = state_json.pop("board")
+        state_json = json.loads(json.dumps(state_json))
+        state_json["board"] = board.copy()
+        return self.__class__(state_json)
+
+    def state_json_equals(self, state_json : Dict) -> bool:
+        """ Compare the boards as arrays, and the other values with ==.
+        """
+        own_state_json = self.state_json
+        if own_state_json.keys() != state_json.keys():
+            return False
+        return all(np.array_equal(value, state_json[key]) if key == "board" else value == state_json[key]
+                   for key, value in own_state_json.items())
+
+    def unpack_state_json(self, packed_state_json):
+        """ Unpack the board and the remaining pieces.
+        """
+        state_json = super().unpack_state_json(packed_state_json)
+        board_buffer, board_shape = state_json["board"]
+        state_json["board"] = np.frombuffer(board_buffer, dtype=np.int8).reshape(board_shape).copy()
+        state_json["player_remaining_pieces"] = [self.unpack_ints(pieces) for pieces in state_json["player_remaining_pieces"]]
+        state_json["player_anchors"] = [int.from_bytes(anchors, "little") for anchors in state_json["player_anchors"]]
+        return state_json
+
+    def fingerprint(self, perspective_pid : int = None) -> bytes:
+        """ Return the fingerprint of the state, canonicalized like the models see the board:
+        the board is normalized to the perspective (see BlokusGame.normalize_boards_to_perspective),
+        so the states with the same normalized board and the same relabeled current player have the same fingerprint.
+        """
+        if perspective_pid is None:
+            perspective_pid = self.perspective_pid
+        board = self.board
+        num_players = len(self.player_remaining_pieces)
+        if board.shape[0] != board.shape[1]:
+            return super().fingerprint(perspective_pid)
+        board = normalize_boards_to_perspective(board[np.newaxis], perspective_pid)
+        return bytes([FINGERPRINT_VERSION, (self.current_pid - perspective_pid) % num_players]) + board.tobytes()
+
+    def to_vector(self, perspective_pid = None) -> np.ndarray:
+        """ Convert the state to a vector: the perspective pid, the current pid and the flattened board.
+        If normalize_perspective is True, the board is normalized to the perspective, and the perspective pid is 0.
         """
         if perspective_pid is None:
             perspective_pid = self.perspective_pid
-        board_arr = np.array(self.board)
-        return [perspective_pid] + [self.current_pid] + board_arr.flatten().tolist()
\ No newline at end of file
+        vector = np.empty(2 + self.board.size, dtype=np.float32)
+        vector[0] = perspective_pid
+        vector[1] = self.current_pid
+        if self.normalize_perspective:
+            vector[0] = 0
+            vector[2:] = normalize_boards_to_perspective(self.board[np.newaxis], perspective_pid).ravel()
+        else:
+            vector[2:] = self.board.ravel()
+        return vector
\ No newline at end of file
@@ -1,77 +1,48 @@
 from typing import Dict, List, Tuple
-import warnings
+import numpy as np
+from RLFramework.MCTSPlayer import MCTSPlayer
 from BlokusGameState import BlokusGameState
 from BlokusPlayer import BlokusPlayer
-from BlokusAction import BlokusAction
-import numpy as np
-from mcts import mcts
+from BlokusResult import BlokusResult
 
 
-class BlokusStateForMCTS(BlokusGameState):
-    """
-    In order to run MCTS, you must implement a State class which can fully describe the state of the world. It must also implement four methods:
-
-    - getPossibleActions(): Returns an iterable of all actions which can be taken from this state
-    - takeAction(action): Returns the state which results from taking action action
-    - isTerminal(): Returns whether this state is a terminal state
-    - getReward(): Returns the reward for this state. Only needed for terminal states.
-    
-    You must also choose a hashable representation for an action as used in getPossibleActions and takeAction.
-    Typically this would be a class with a custom __hash__ method, but it could also simply be a tuple or a string.
+class BlokusMCTSPlayer(MCTSPlayer, BlokusPlayer):
+    """ A Blokus player, that selects moves with Monte-Carlo tree search (see MCTSPlayer).
+    The leaves are evaluated with the model at model_path, or if no model is given, by the area the players cover.
     """
-    def __init__(self, game_state : BlokusGameState):
-        super().__init__(game_state.state_json)
-    
-    def getPossibleActions(self):
-        return self.get_all_possible_actions()
-    
-    def takeAction(self, action : BlokusAction):
-        state = action.modify_game(self.game, inplace=False)
-        return self.__class__(state)
-    
-    def isTerminal(self) -> bool:
-        return self.is_terminal()
-    
-    def getReward(self) -> float:
-        r = self.calculate_reward(self.perspective_pid)
-        print(f"Reward: {r}")
-        return r
-    
+    # The search values estimate the final scores, so they can be used to bootstrap the value targets
+    evaluations_are_values = True
 
-class BlokusMCTSPlayer(BlokusPlayer):
-    
     def __init__(self,name : str = "MCTSPlayer",
-                 mcts_timelimit : float = 0.1,
+                 model_path : str = None,
+                 num_simulations : int = 100,
+                 mcts_timelimit : float = None,
+                 exploration : float = 1.4,
+                 reuse_tree : bool = True,
+                 leaf_batch_size : int = 1,
+                 num_workers : int = 1,
                  action_selection_strategy = "greedy",
                  action_selection_args : Tuple[Tuple,Dict] = ((), {}),
                  logger_args : dict = None,
                  ):
+        """ The search runs num_simulations simulations, or for mcts_timelimit seconds per move (see MCTSPlayer.configure_mcts).
+        The leaves are evaluated in batches of leaf_batch_size (with virtual loss), and num_workers > 1 searches in worker processes.
+        The action is selected from the visit fractions of the root's children with the action selection strategy.
+        """
         super().__init__(name=name, logger_args=logger_args)
-        self.mcts_timelimit = mcts_timelimit
-        
-        action_selection_map = {
-            "greedy" : self._select_best_action,
-            "random" : self._select_random_action,
-            "weighted" : self._select_weighted_action,
-            "epsilon_greedy" : self._select_epsilon_greedy_action,
-        }
-        if action_selection_strategy not in action_selection_map:
-            raise ValueError(f"Unknown action selection strategy '{action_selection_strategy}'")
-        if action_selection_strategy in ["greedy", "random"]:
-            if action_selection_args != ((), {}):
-                warnings.warn(f"action selection strategy '{action_selection_strategy}' does not use arguments.")
-                action_selection_args = ((), {})
-        f = action_selection_map[action_selection_strategy]
-        self.select_action_strategy = lambda evaluations : f(evaluations, *action_selection_args[0], **action_selection_args[1])
-        
-        
-    def evaluate_states(self, states : List[BlokusGameState]) -> List[float]:
-        """ With the MCTS player we wont evaluate.
-        Rather, we will run MCTS, find the best action, and return evaluations (1 for the best action, 0 for the rest)
+        self.model_path = model_path
+        self.configure_mcts(num_simulations=num_simulations, time_limit=mcts_timelimit, exploration=exploration, reuse_tree=reuse_tree,
+                            leaf_batch_size=leaf_batch_size, num_workers=num_workers)
+        self.select_action_strategy = self.make_action_selection_strategy(action_selection_strategy, action_selection_args)
+
+    def evaluate_leaves(self, states : List[BlokusGameState]) -> np.ndarray:
+        """ Evaluate the states with the model, or if there is no model, by the normalized area the players cover.
+        """
+        if self.model_path:
+            return self.predict_values(self.game.get_model(self.model_path), states)
+        return np.array([s.player_scores for s in states], dtype=np.float64) / 139
+
+    def terminal_values(self, state : BlokusGameState) -> np.ndarray:
+        """ The final scores, normalized like the labels of the model (see BlokusResult.modify_final_scores).
         """
-        curr_state = self.game.get_current_state()
-        curr_state = curr_state.deepcopy()
-        best_action = mcts(timeLimit=self.mcts_timelimit).search(initialState=BlokusStateForMCTS(curr_state))
-        print(f"Best action: {best_action}")
-        return [1 if a == best_action else 0 for a in states]
-    
\ No newline at end of file
+        return np.asarray(BlokusResult.modify_final_scores(list(state.player_scores)), dtype=np.float64)
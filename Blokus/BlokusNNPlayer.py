@@ -1,35 +1,42 @@
-from typing import Dict, List, Tuple
-import warnings
+from typing import Dict, List, Tuple, TYPE_CHECKING
+import os
+from RLFramework.EvaluationCache import get_evaluation_cache
+from BlokusAction import BlokusAction
+from BlokusDeltaModel import no_placement_id
 from BlokusGameState import BlokusGameState
+from BlokusPlacementTable import get_placement_table
 from BlokusPlayer import BlokusPlayer
+from BlokusSuccessorEncoder import BlokusSuccessorEncoder
 import numpy as np
+if TYPE_CHECKING:
+    from BlokusGame import BlokusGame
 
 class BlokusNNPlayer(BlokusPlayer):
+    # The model predicts the final score, so the evaluations can be used to bootstrap the value targets
+    evaluations_are_values = True
+    # Evaluating a state with the model is more expensive than computing its fingerprint
+    deduplicate_successors = True
+    # Whether the successors are encoded directly to the model inputs (see BlokusSuccessorEncoder), instead of creating the states
+    encode_successors = True
     
     def __init__(self,name : str = "NNPlayer",
                  model_path : str = "",
                  action_selection_strategy = "greedy",
                  action_selection_args : Tuple[Tuple,Dict] = ((), {}),
                  logger_args : dict = None,
+                 evaluation_cache_size : int = 2**16,
+                 evaluation_cache_path : str = None,
                  ):
+        """ If evaluation_cache_size > 0, the evaluations are cached in the process' evaluation cache,
+        keyed by the model and the state's fingerprint (canonicalized under the board rotations).
+        If evaluation_cache_path is given, the cache is also stored in an SQLite database at the path, and shared across games and runs.
+        """
         super().__init__(name=name, logger_args=logger_args)
         assert model_path, "A model path must be given."
         self.model_path = model_path
+        self.evaluation_cache = get_evaluation_cache(max_size=evaluation_cache_size, path=evaluation_cache_path) if evaluation_cache_size > 0 else None
         
-        action_selection_map = {
-            "greedy" : self._select_best_action,
-            "random" : self._select_random_action,
-            "weighted" : self._select_weighted_action,
-            "epsilon_greedy" : self._select_epsilon_greedy_action,
-        }
-        if action_selection_strategy not in action_selection_map:
-            raise ValueError(f"Unknown action selection strategy '{action_selection_strategy}'")
-        if action_selection_strategy in ["greedy", "random"]:
-            if action_selection_args != ((), {}):
-                warnings.warn(f"action selection strategy '{action_selection_strategy}' does not use arguments.")
-                action_selection_args = ((), {})
-        f = action_selection_map[action_selection_strategy]
-        self.select_action_strategy = lambda evaluations : f(evaluations, *action_selection_args[0], **action_selection_args[1])
+        self.select_action_strategy = self.make_action_selection_strategy(action_selection_strategy, action_selection_args)
         
             
         
@@ -38,8 +45,80 @@ class BlokusNNPlayer(BlokusPlayer):
         """
         # Load the model
         model = self.game.get_model(self.model_path)
+        if "placement_ids" in model.input_names:
+            return self._evaluate_states_delta(model, states)
+        if self.evaluation_cache is not None:
+            return self.evaluation_cache.predict(model, os.path.abspath(self.model_path), states, self.pid)
         X = np.array([s.to_vector(self.pid) for s in states], dtype=np.float32)
         #print(f"X shape: {X.shape}")
         evaluations = model.predict(X)
         #print(f"evaluations: {evaluations}")
-        return evaluations
\ No newline at end of file
+        return evaluations
+    
+    def _evaluate_states_delta(self, model, states : List[BlokusGameState]) -> List[float]:
+        """ Evaluate the states with a delta model (see BlokusDeltaModel) in one call, with the placement, that places nothing, on each board.
+        """
+        assert not BlokusGameState.normalize_perspective, "A delta model expands the successors of the board, that is not normalized."
+        if not states:
+            return []
+        board_size = states[0].board.shape
+        encoder = BlokusSuccessorEncoder(board_size)
+        inputs = encoder.encode_delta_boards(np.array([state.board for state in states]), [no_placement_id(board_size)] * len(states),
+                                             [-1] * len(states), [state.current_pid for state in states], self.pid)
+        return model.predict_inputs(inputs)
+
+    def evaluate_actions(self, game : 'BlokusGame', actions : List[BlokusAction]) -> List[float]:
+        """ Evaluate the successors of the placements with the model, by encoding them to the rows of a reusable buffer.
+        The successors are deduplicated and cached by their fingerprints, like the successor states.
+        If the model is a delta model (see BlokusDeltaModel), only the board and the placement ids are sent to the model,
+        and the successors are not deduplicated or cached, since they are not encoded on the host.
+        """
+        if not self.encode_successors or any(action.piece_id == -1 for action in actions):
+            return super().evaluate_actions(game, actions)
+        board_size = game.board.shape
+        if "_successor_encoder" not in self.__dict__ or self._successor_encoder.board_size != board_size:
+            self._successor_encoder = BlokusSuccessorEncoder(board_size)
+        table = get_placement_table(board_size)
+        placement_ids = [table.get_placement_id(a.piece_id, a.x, a.y, a.rotation, a.flip) for a in actions]
+        num_players = len(game.players)
+        model = game.get_model(self.model_path)
+        self.num_successor_states += len(actions)
+        if "placement_ids" in model.input_names:
+            assert not BlokusGameState.normalize_perspective, "A delta model expands the successors of the board, that is not normalized."
+            self.num_evaluated_states += len(actions)
+            inputs = self._successor_encoder.encode_delta(game.board, placement_ids, game.current_pid, (game.current_pid + 1) % num_players, self.pid)
+            return model.predict_inputs(inputs)
+        X = self._successor_encoder.encode(game.board, placement_ids, game.current_pid, (game.current_pid + 1) % num_players, self.pid)
+        if self.evaluation_cache is None and not self.deduplicate_successors:
+            self.num_evaluated_states += len(actions)
+            if BlokusGameState.normalize_perspective:
+                self._successor_encoder.normalize(X)
+            return model.predict(X)
+        fingerprints = self._successor_encoder.fingerprints(X, num_players)
+        if BlokusGameState.normalize_perspective:
+            self._successor_encoder.normalize(X)
+        successor_to_unique = list(range(len(actions)))
+        unique_indices = successor_to_unique
+        if self.deduplicate_successors:
+            # fingerprint -> index in unique_indices
+            fingerprint_indices = {}
+            unique_indices = []
+            for i, fingerprint in enumerate(fingerprints):
+                if fingerprint not in fingerprint_indices:
+                    fingerprint_indices[fingerprint] = len(unique_indices)
+                    unique_indices.append(i)
+                successor_to_unique[i] = fingerprint_indices[fingerprint]
+        self.num_evaluated_states += len(unique_indices)
+        X_unique = X[unique_indices] if len(unique_indices) < len(actions) else X
+        if self.evaluation_cache is not None:
+            unique_evaluations = self.evaluation_cache.predict_vectors(model, os.path.abspath(self.model_path),
+                                                                       [fingerprints[i] for i in unique_indices], X_unique)
+        else:
+            unique_evaluations = model.predict(X_unique)
+        return [unique_evaluations[i] for i in successor_to_unique]
+
+    def as_json(self) -> dict:
+        js = super().as_json()
+        if self.evaluation_cache is not None:
+            js["evaluation_cache"] = self.evaluation_cache.stats()
+        return js
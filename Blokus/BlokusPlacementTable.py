@@ -0,0 +1,191 @@
+import functools as ft
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Tuple
+
+import numpy as np
+from BlokusPieces import BLOKUS_PIECE_MAP
+
+""" A precomputed table of every placement of every piece on the board.
+A placement is a piece, one of its unique transformations (see get_piece_transformations) and the position of the
+upper left corner of the (padded) piece, such that the padded piece is inside the board.
+The placements are ordered by piece, transformation, x and y, and their index is the placement id.
+
+The table is built once, saved as .npy files, and memory-mapped (read-only) by every process that uses it,
+so the simulation workers share the same pages, and do not rebuild the table.
+"""
+
+# The version of the table's format. Tables with a different version are rebuilt.
+TABLE_VERSION = 1
+NUM_PIECES = len(BLOKUS_PIECE_MAP)
+# The arrays of the table
+TABLE_ARRAYS = ["placements", "cells", "cell_masks", "corner_masks", "edge_masks",
+                "anchor_offsets", "anchor_placements", "transformations", "transformation_offsets"]
+
+@ft.lru_cache(maxsize=None)
+def get_piece_transformations(piece_id : int) -> List[Tuple[int, bool]]:
+    """ Return the unique (rotation, flip) transformations of the piece, in the same order as BlokusGameState.get_piece_transformations.
+    """
+    piece = BLOKUS_PIECE_MAP[piece_id]
+    piece_transformations = {}
+    piece_transformations[piece.tobytes()] = (0, False)
+    for num_rots in range(4):
+        for flip in [True, False]:
+            transformed_piece = np.rot90(piece, k=num_rots)
+            transformed_piece = np.flip(transformed_piece, axis=0) if flip else transformed_piece
+            hash_val = transformed_piece.tobytes()
+            if hash_val in piece_transformations:
+                continue
+            piece_transformations[hash_val] = (num_rots, flip)
+    return list(piece_transformations.values())
+
+def transform_piece(piece_id : int, rotation : int, flip : bool) -> np.ndarray:
+    """ Return the (padded) piece rotated and flipped like in BlokusAction.
+    """
+    piece = np.rot90(BLOKUS_PIECE_MAP[piece_id], k=rotation)
+    return np.flip(piece, axis=0) if flip else piece
+
+def build_placement_table(board_size : Tuple[int, int]) -> Dict[str, np.ndarray]:
+    """ Build the arrays of the placement table:
+    - placements: (N, 5) int16, the piece_id, rotation, flip, x and y of each placement.
+    - cells: (N, 5) int16, the flat indices (x * width + y) of the grids the placement covers, padded with -1.
+    - cell_masks: (N, number of grids / 8) uint8, the covered grids as packed bits (little bit order).
+    - corner_masks: The grids sharing a corner but no side with the placement (the anchors the placement creates).
+    - edge_masks: The grids sharing a side with the placement.
+    - anchor_offsets, anchor_placements: The ids of the placements covering each grid g are
+    anchor_placements[anchor_offsets[g]:anchor_offsets[g+1]].
+    - transformations: (NUM_PIECES, 4, 2) int16, the index of the unique transformation (rotation, flip) of each piece.
+    - transformation_offsets: (NUM_PIECES, 8) int32, the id of the first placement of each unique transformation of each piece, or -1.
+    """
+    height, width = board_size
+    placements = []
+    cells = []
+    transformations = np.zeros((NUM_PIECES, 4, 2), dtype=np.int16)
+    transformation_offsets = np.full((NUM_PIECES, 8), -1, dtype=np.int32)
+    for piece_id in range(NUM_PIECES):
+        unique_transformations = get_piece_transformations(piece_id)
+        transformation_bytes = [transform_piece(piece_id, rot, flip).tobytes() for rot, flip in unique_transformations]
+        for rot in range(4):
+            for flip in [False, True]:
+                transformations[piece_id, rot, int(flip)] = transformation_bytes.index(transform_piece(piece_id, rot, flip).tobytes())
+        for t, (rot, flip) in enumerate(unique_transformations):
+            transformation_offsets[piece_id, t] = len(placements)
+            piece = transform_piece(piece_id, rot, flip)
+            size = piece.shape[0]
+            grids = np.argwhere(piece != 0)
+            for x in range(height - size + 1):
+                for y in range(width - size + 1):
+                    placements.append((piece_id, rot, int(flip), x, y))
+                    flat = (grids[:, 0] + x) * width + (grids[:, 1] + y)
+                    cells.append(np.pad(flat, (0, 5 - len(flat)), constant_values=-1))
+    placements = np.array(placements, dtype=np.int16)
+    cells = np.array(cells, dtype=np.int16)
+    # The covered grids, and their side and diagonal neighbours as boolean boards
+    covered = np.zeros((len(placements), height + 2, width + 2), dtype=bool)
+    rows = np.repeat(np.arange(len(placements)), 5)
+    flat_cells = cells.ravel()
+    valid = flat_cells >= 0
+    covered[rows[valid], flat_cells[valid] // width + 1, flat_cells[valid] % width + 1] = True
+    inner = covered[:, 1:-1, 1:-1]
+    edges = (covered[:, :-2, 1:-1] | covered[:, 2:, 1:-1] | covered[:, 1:-1, :-2] | covered[:, 1:-1, 2:]) & ~inner
+    diagonals = (covered[:, :-2, :-2] | covered[:, :-2, 2:] | covered[:, 2:, :-2] | covered[:, 2:, 2:]) & ~inner
+    corners = diagonals & ~edges
+    pack = lambda boards : np.packbits(boards.reshape(len(placements), -1), axis=1, bitorder="little")
+    # The placements covering each grid
+    order = np.argsort(flat_cells[valid], kind="stable")
+    anchor_placements = rows[valid][order].astype(np.int32)
+    anchor_offsets = np.searchsorted(flat_cells[valid][order], np.arange(height * width + 1)).astype(np.int32)
+    return {"placements" : placements,
+            "cells" : cells,
+            "cell_masks" : pack(inner),
+            "corner_masks" : pack(corners),
+            "edge_masks" : pack(edges),
+            "anchor_offsets" : anchor_offsets,
+            "anchor_placements" : anchor_placements,
+            "transformations" : transformations,
+            "transformation_offsets" : transformation_offsets,
+            }
+
+def get_table_folder(board_size : Tuple[int, int]) -> str:
+    """ The default folder of the table files.
+    """
+    return os.path.join(tempfile.gettempdir(), f"blokus_placement_table_v{TABLE_VERSION}_{board_size[0]}x{board_size[1]}")
+
+def save_placement_table(arrays : Dict[str, np.ndarray], folder : str) -> None:
+    """ Save the arrays to the folder. The files are first written to a temporary folder, which is then renamed,
+    so that processes building the table at the same time do not read partially written files.
+    """
+    parent = os.path.dirname(os.path.abspath(folder))
+    os.makedirs(parent, exist_ok=True)
+    tmp_folder = tempfile.mkdtemp(dir=parent)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_folder, f"{name}.npy"), array)
+    try:
+        os.rename(tmp_folder, folder)
+    except OSError:
+        # Another process saved the table first
+        shutil.rmtree(tmp_folder, ignore_errors=True)
+
+
+class PlacementTable:
+    """ The placement table of a board size (see build_placement_table), with the arrays memory-mapped from the files.
+    """
+    def __init__(self, board_size : Tuple[int, int], folder : str = None):
+        self.board_size = tuple(board_size)
+        self.folder = folder if folder is not None else get_table_folder(self.board_size)
+        if not all(os.path.exists(os.path.join(self.folder, f"{name}.npy")) for name in TABLE_ARRAYS):
+            save_placement_table(build_placement_table(self.board_size), self.folder)
+        for name in TABLE_ARRAYS:
+            setattr(self, name, np.load(os.path.join(self.folder, f"{name}.npy"), mmap_mode="r"))
+        self.num_placements = len(self.placements)
+        self.piece_ids = np.asarray(self.placements[:, 0])
+        self.piece_sizes = np.asarray(np.sum(self.cells >= 0, axis=1))
+
+    def _to_ints(self, packed_masks : np.ndarray) -> List[int]:
+        """ Convert the packed masks to Python ints (bitboards, see BlokusBitboard).
+        """
+        return [int.from_bytes(row.tobytes(), "little") for row in np.asarray(packed_masks)]
+
+    @ft.cached_property
+    def cell_mask_ints(self) -> List[int]:
+        return self._to_ints(self.cell_masks)
+
+    @ft.cached_property
+    def corner_mask_ints(self) -> List[int]:
+        return self._to_ints(self.corner_masks)
+
+    @ft.cached_property
+    def edge_mask_ints(self) -> List[int]:
+        return self._to_ints(self.edge_masks)
+
+    def get_placement_id(self, piece_id : int, x : int, y : int, rotation : int, flip : bool) -> int:
+        """ Return the id of the placement, or -1 if the padded piece is not inside the board.
+        Equivalent rotations and flips of a piece have the same transformation.
+        """
+        t = self.transformations[piece_id, rotation % 4, int(flip)]
+        size = BLOKUS_PIECE_MAP[piece_id].shape[0]
+        num_ys = self.board_size[1] - size + 1
+        if x < 0 or y < 0 or x > self.board_size[0] - size or y >= num_ys:
+            return -1
+        return int(self.transformation_offsets[piece_id, t]) + x * num_ys + y
+
+    def get_cells(self, placement_id : int) -> np.ndarray:
+        """ Return the flat indices of the grids, that the placement covers.
+        """
+        cells = self.cells[placement_id]
+        return np.asarray(cells[cells >= 0])
+
+    def get_anchor_placements(self, grids : np.ndarray) -> np.ndarray:
+        """ Return the ids of the placements covering atleast one of the grids (flat indices), sorted and unique.
+        """
+        if len(grids) == 0:
+            return np.zeros(0, dtype=np.int32)
+        slices = [self.anchor_placements[self.anchor_offsets[g]:self.anchor_offsets[g + 1]] for g in grids]
+        return np.unique(np.concatenate(slices))
+
+@ft.lru_cache(maxsize=None)
+def get_placement_table(board_size : Tuple[int, int] = (20, 20)) -> PlacementTable:
+    """ Return the process' placement table of the board size. The table is built and saved on first use.
+    """
+    return PlacementTable(board_size)
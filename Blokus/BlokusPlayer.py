@@ -4,9 +4,13 @@ from RLFramework.Game import Game
 from RLFramework.GameState import GameState
 from RLFramework.Player import Player
 from BlokusAction import BlokusAction
+from BlokusPieces import BLOKUS_PIECE_MAP
 if TYPE_CHECKING:
     from BlokusGame import BlokusGame
 
+# The number of squares in each piece
+PIECE_SIZES = {piece_id : int(np.sum(piece)) for piece_id, piece in BLOKUS_PIECE_MAP.items()}
+
 class BlokusPlayer(Player):
     """ A class representing a player of the game TicTacToe.
     """
@@ -26,6 +30,11 @@ class BlokusPlayer(Player):
         self.is_finished = False
         return
     
+    def prioritize_actions(self, game : 'BlokusGame', actions : List[BlokusAction]) -> List[int]:
+        """ Evaluate the placements of the largest pieces first, if the move has a budget.
+        """
+        return sorted(range(len(actions)), key=lambda i : -PIECE_SIZES.get(actions[i].piece_id, 0))
+    
     def evaluate_states(self, states) -> List[float]:
         """ Evaluate the states.
         """
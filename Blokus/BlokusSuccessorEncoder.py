@@ -0,0 +1,83 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+from BlokusGame import normalize_boards_to_perspective
+from BlokusGameState import FINGERPRINT_VERSION
+from BlokusPlacementTable import get_placement_table
+
+""" Encode the successors of a Blokus position directly as model inputs, without creating the successor states.
+The successor of a placement is the current board with the piece's grids set to the moving player,
+and its vector is the same as BlokusGameState.to_vector of the successor state: [perspective pid, next pid, board...].
+A delta model (see BlokusDeltaModel) instead gets the board once, and the placement ids (encode_delta).
+"""
+
+class BlokusSuccessorEncoder:
+    """ Encodes the successors of placements to the rows of a buffer, that is reused between turns (and grown when needed).
+    The board is copied to every row, and only the grids of each placement are written.
+    """
+    def __init__(self, board_size : Tuple[int, int] = (20, 20)):
+        self.board_size = tuple(board_size)
+        self.num_grids = self.board_size[0] * self.board_size[1]
+        self.buffer = np.empty((0, 2 + self.num_grids), dtype=np.float32)
+
+    def encode(self, board : np.ndarray, placement_ids : List[int], mover_pid : int, next_pid : int, perspective_pid : int) -> np.ndarray:
+        """ Return the vectors of the successors, when mover_pid makes each placement (ids in the placement table),
+        and the turn passes to next_pid. The returned array is a view of the buffer, so it is only valid until the next call.
+        """
+        num_successors = len(placement_ids)
+        if len(self.buffer) < num_successors:
+            self.buffer = np.empty((max(num_successors, 2 * len(self.buffer)), 2 + self.num_grids), dtype=np.float32)
+        X = self.buffer[:num_successors]
+        X[:, 0] = perspective_pid
+        X[:, 1] = next_pid
+        np.copyto(X[:, 2:], np.broadcast_to(np.asarray(board).ravel(), (num_successors, self.num_grids)))
+        cells = get_placement_table(self.board_size).cells[placement_ids]
+        rows = np.repeat(np.arange(num_successors), cells.shape[1])
+        cells = cells.ravel()
+        is_cell = cells >= 0
+        X[rows[is_cell], 2 + cells[is_cell]] = mover_pid
+        return X
+
+    def normalize(self, X : np.ndarray) -> np.ndarray:
+        """ Normalize the boards of the encoded successors (rows of X) to the perspective in place, with one batched gather
+        (see BlokusGame.normalize_boards_to_perspective), and set their perspective pid to 0,
+        like BlokusGameState.to_vector with normalize_perspective. The fingerprints must be computed before normalizing.
+        """
+        if len(X) == 0:
+            return X
+        boards = X[:, 2:].astype(np.int8).reshape(-1, *self.board_size)
+        X[:, 2:] = normalize_boards_to_perspective(boards, X[:, 0].astype(np.int64)).reshape(len(X), self.num_grids)
+        X[:, 0] = 0
+        return X
+
+    def encode_delta(self, board : np.ndarray, placement_ids : List[int], mover_pid : int, next_pid : int, perspective_pid : int) -> Dict[str, np.ndarray]:
+        """ Return the inputs of a delta model (see BlokusDeltaModel), that are expanded to the same vectors as encode.
+        """
+        return {"board" : np.asarray(board, dtype=np.float32).reshape(1, self.num_grids),
+                "metadata" : np.array([[perspective_pid, next_pid, mover_pid]], dtype=np.float32),
+                "placement_ids" : np.asarray(placement_ids, dtype=np.int32),
+                "board_ids" : np.zeros(len(placement_ids), dtype=np.int32)}
+
+    def encode_delta_boards(self, boards : np.ndarray, placement_ids : List[int], mover_pids : List[int], next_pids : List[int],
+                            perspective_pid : int) -> Dict[str, np.ndarray]:
+        """ Return the inputs of a delta model, that evaluate one placement on each of the boards in one call.
+        """
+        return {"board" : np.asarray(boards, dtype=np.float32).reshape(len(boards), self.num_grids),
+                "metadata" : np.column_stack([np.full(len(boards), perspective_pid), next_pids, mover_pids]).astype(np.float32),
+                "placement_ids" : np.asarray(placement_ids, dtype=np.int32),
+                "board_ids" : np.arange(len(boards), dtype=np.int32)}
+
+    def fingerprints(self, X : np.ndarray, num_players : int = 4) -> List[bytes]:
+        """ Return the fingerprints of the encoded successors (rows of X), the same as BlokusGameState.fingerprint.
+        """
+        perspective_pid = int(X[0, 0]) if len(X) else 0
+        if self.board_size[0] != self.board_size[1]:
+            # GameState.fingerprint
+            rows = np.empty((len(X), X.shape[1] + 1), dtype=np.float32)
+            rows[:, 0] = perspective_pid
+            rows[:, 1:] = X
+            return [row.tobytes() for row in rows]
+        boards = X[:, 2:].astype(np.int8).reshape(-1, *self.board_size)
+        boards = normalize_boards_to_perspective(boards, perspective_pid)
+        current_pids = ((X[:, 1].astype(np.int64) - perspective_pid) % num_players).astype(np.uint8)
+        return [bytes([FINGERPRINT_VERSION, current_pid]) + board.tobytes() for current_pid, board in zip(current_pids.tolist(), boards)]
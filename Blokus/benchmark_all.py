@@ -12,6 +12,7 @@ from BlokusGame import BlokusGame
 from BlokusPlayer import BlokusPlayer
 from BlokusNNPlayer import BlokusNNPlayer
 from BlokusGreedyPlayer import BlokusGreedyPlayer
+from RLFramework.EvaluationCache import get_evaluation_cache
 
 
 def game_constructor(i, model_paths = []):
@@ -24,7 +25,7 @@ def game_constructor(i, model_paths = []):
         model_paths=model_paths,
         )
 
-def players_constructor(i, model_path = "", opponent_type = "random"):
+def players_constructor(i, model_path = "", opponent_type = "random", evaluation_cache_path = None):
     assert opponent_type in ["random", "greedy"], f"Player type must be either 'random' or 'greedy', not {opponent_type}"
     if opponent_type == "random":
         opponent_players = [BlokusPlayer(name=f"RandomPlayer{j}_{i}",
@@ -47,18 +48,22 @@ def players_constructor(i, model_path = "", opponent_type = "random"):
                                     logger_args=None,
                                     model_path=model_path,
                                     action_selection_strategy="greedy",
+                                    evaluation_cache_path=evaluation_cache_path,
                                     )
     players = opponent_players + [test_player]
     random.shuffle(players)
     return players
 
 def run_game(args):
-    i, model_path, opponent_type, seed = args
+    i, model_path, opponent_type, evaluation_cache_path, seed = args
     random.seed(seed)
     np.random.seed(seed)
     game = game_constructor(i, [model_path])
-    players = players_constructor(i, model_path, opponent_type)
+    players = players_constructor(i, model_path, opponent_type, evaluation_cache_path)
     res = game.play_game(players)
+    if evaluation_cache_path:
+        # Write the new evaluations, since the pool's workers are terminated without cleanup
+        get_evaluation_cache(path=evaluation_cache_path).flush()
     return res
 
 if __name__ == "__main__":
@@ -67,8 +72,12 @@ if __name__ == "__main__":
     parser.add_argument('--num_games', type=int, required=True, help='The number of games to play for each model.')
     parser.add_argument('--num_cpus', type=int, help='The number of CPUs to use.', default=os.cpu_count()-1)
     parser.add_argument("--opponent_type", type=str, help="The type of opponent to use. Must be either 'random' or 'greedy'.", default="random")
+    parser.add_argument("--evaluation_cache", type=str, help="An SQLite file to cache the model evaluations in across runs.", default=None)
+    parser.add_argument("--seed", type=int, help="The seed for the games, so the same games are played on every run.", default=None)
     args = parser.parse_args()
     print(args)
+    if args.seed is not None:
+        random.seed(args.seed)
     
     t_start = time.time()
     num_games = args.num_games
@@ -81,7 +90,7 @@ if __name__ == "__main__":
         model_path = os.path.join(folder, model_path)
         print(f"Testing model: {model_path}")
         with multiprocessing.Pool(num_cpus) as p:
-            results = p.map(run_game, [(i, model_path, args.opponent_type, random.randint(0, 2**32-1)) for i in range(num_games)])
+            results = p.map(run_game, [(i, model_path, args.opponent_type, args.evaluation_cache, random.randint(0, 2**32-1)) for i in range(num_games)])
 
         # Find how many times the test player won
         num_wins = 0
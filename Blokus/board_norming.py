@@ -1,19 +1,28 @@
+import numpy as np
 import tensorflow as tf
 
+# The flat indices of the grids of the board rotated counter-clockwise k times (like tf.image.rot90) are ROTATION_INDICES[k]
+ROTATION_INDICES = np.array([np.rot90(np.arange(20*20).reshape(20, 20), k=k).ravel() for k in range(4)], dtype=np.int32)
+# The value of a grid (index value + 1) from the perspective of each player (row): the perspective player is 0, and the free grids stay -1
+PERSPECTIVE_LABELS = np.array([[-1] + [(pid - perspective_pid) % 4 for pid in range(4)] for perspective_pid in range(4)], dtype=np.float32)
+
 @tf.keras.saving.register_keras_serializable()
 class RotLayer(tf.keras.layers.Layer):
+    """ Rotate the boards counter-clockwise by the number of rotations in the last column of the inputs (N, 20*20 + 1).
+    Each board selects its row of the constant ROTATION_INDICES, and all the boards are rotated with one gather,
+    so the layer converts to TFLite builtin ops.
+    """
     def __init__(self, **kwargs):
         super(RotLayer, self).__init__(**kwargs)
         
     def call(self, inputs, training=None):
-        board = tf.vectorized_map(rotate90, inputs)
-        return board
-
-@tf.keras.saving.register_keras_serializable()
-def rotate90(x):
-    boards = tf.reshape(x[:-1], (20, 20, 1))
-    rots = tf.cast(x[-1], tf.int32)
-    return tf.image.rot90(boards, k=rots)
+        boards = tf.reshape(inputs[:, :-1], (-1,))
+        rots = tf.cast(inputs[:, -1], tf.int32)
+        # The indices of the grids in the flattened batch
+        offsets = tf.expand_dims(tf.range(tf.shape(rots)[0]) * 20*20, 1)
+        indices = tf.gather(tf.constant(ROTATION_INDICES), rots) + offsets
+        board = tf.gather(boards, indices)
+        return tf.reshape(board, (-1, 20, 20, 1))
 
 @tf.keras.saving.register_keras_serializable()
 def rotate_board_to_perspective_tf(board, perspective_pid):
@@ -49,25 +58,11 @@ def rotate_board_to_perspective_tf(board, perspective_pid):
 def normalize_board_to_perspective_tf(board, perspective_pid):
 
     # We want to make the neural net invariant to whose turn it is.
-    # First, we get a matrix P by multiplying each perspective_id to a 20x20 board
-    perspective_pid = tf.reshape(4 - perspective_pid, (-1,1))
-    perspective_full = tf.reshape(perspective_pid, (-1,1,1))
-    perspective_full = tf.cast(perspective_full, tf.float32)
-    perspective_full = tf.tile(perspective_full, [1,20,20])
-    
-    # Then, we need a mask, same shape as board, that is 1 where the board == -1
-    mask = tf.equal(board, -1)
-    
-    # Now, we can add the P matrix to the boards, and take mod 4
-    perspective_full = tf.cast(perspective_full, tf.float32)
-    board = tf.cast(board, tf.float32)
-    board = board + perspective_full
-    board = tf.cast(board, tf.int32)
-    board = tf.math.mod(board, 4)
-    
-    # Now, to maintain -1's, we'll set the -1's back to -1
-    board = tf.where(mask, -1, board)
-    board = tf.reshape(board, (-1, 20, 20))
+    # The players are relabeled, so that the perspective player is 0, by gathering the grids' values
+    # from the perspective player's row of PERSPECTIVE_LABELS (flattened, the index is 5 * perspective_pid + value + 1)
+    perspective_pid = tf.reshape(tf.cast(perspective_pid, tf.int32), (-1,1,1))
+    board = tf.cast(tf.reshape(board, (-1, 20, 20)), tf.int32)
+    board = tf.gather(tf.constant(PERSPECTIVE_LABELS.ravel()), 5 * perspective_pid + board + 1)
     
     board = rotate_board_to_perspective_tf(board, 0)
     
@@ -17,7 +17,7 @@ class SaveModelCallback(tf.keras.callbacks.Callback):
 
     def on_epoch_end(self, epoch, logs=None):
         self.model.save(self.model_save_path)
-        convert_model_to_tflite(self.model_save_path)
+        convert_model_to_tflite(self.model_save_path, select_tf_ops=False)
 
 def get_model(input_shape):
     
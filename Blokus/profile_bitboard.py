@@ -0,0 +1,52 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from BlokusGame import BlokusGame
+from BlokusPlayer import BlokusPlayer
+
+""" Verify the bitboard move generator (BlokusGameState.get_all_possible_actions) against the original generator
+(get_all_possible_actions_reference) on the positions of recorded random games, and compare their speed.
+The generators must find the same set of placements (the original may list a placement multiple times).
+"""
+
+def record_positions(num_games, seed = 0):
+    """ Play random games, and return their game states.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    states = []
+    for _ in range(num_games):
+        game = BlokusGame(board_size=(20,20), timeout=1000)
+        result = game.play_game([BlokusPlayer(name=f"Player{i}") for i in range(4)])
+        states += list(result.game_states)
+    return states
+
+def placements(actions):
+    return [(a.piece_id, a.x, a.y, a.rotation, a.flip) for a in actions]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and benchmark the bitboard move generator.")
+    parser.add_argument("--num_games", type=int, default=2)
+    args = parser.parse_args()
+    states = record_positions(args.num_games)
+    bitboard_time = 0.0
+    reference_time = 0.0
+    num_actions = 0
+    for i, state in enumerate(states):
+        start = time.perf_counter()
+        actions = placements(state.deepcopy().get_all_possible_actions())
+        bitboard_time += time.perf_counter() - start
+        start = time.perf_counter()
+        reference_actions = placements(state.deepcopy().get_all_possible_actions_reference())
+        reference_time += time.perf_counter() - start
+        assert len(actions) == len(set(actions)), f"Position {i}: the bitboard generator returned duplicate placements."
+        assert set(actions) == set(reference_actions), (f"Position {i}: the generators differ:\n{state}\n"
+                                                        f"only bitboard: {set(actions) - set(reference_actions)}\n"
+                                                        f"only reference: {set(reference_actions) - set(actions)}")
+        num_actions += len(actions)
+    print(f"The generators agree on {len(states)} positions ({num_actions} placements).")
+    print(f"Bitboard: {1000 * bitboard_time / len(states):.2f} ms per position, "
+          f"reference: {1000 * reference_time / len(states):.2f} ms per position, speedup {reference_time / bitboard_time:.1f}x")
@@ -0,0 +1,86 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from RLFramework.utils import TFLiteModel, convert_model_to_tflite
+import fit_model_single
+from board_norming import NormalizeBoardToPerspectiveLayer
+from BlokusGame import normalize_boards_to_perspective
+from profile_bitboard import record_positions
+
+""" Compare the perspective normalization layer (board_norming.NormalizeBoardToPerspectiveLayer), that rotates the boards
+with one gather from precomputed indices, with the previous layer, that rotated each board with tf.vectorized_map and tf.image.rot90.
+The layers must give the same boards as normalize_boards_to_perspective, the new layer must convert with the TFLite builtin ops only,
+and the models (fit_model_single.get_model, with the same weights) must give the same evaluations.
+Then compare the inference latency of the TFLite models.
+"""
+
+def rotate90(x):
+    boards = tf.reshape(x[:-1], (20, 20, 1))
+    rots = tf.cast(x[-1], tf.int32)
+    return tf.image.rot90(boards, k=rots)
+
+class VectorizedMapNormalizeLayer(tf.keras.layers.Layer):
+    """ The previous NormalizeBoardToPerspectiveLayer.
+    """
+    def call(self, inputs):
+        board, perspective_pid = inputs
+        perspective_full = tf.tile(tf.cast(tf.reshape(4 - perspective_pid, (-1,1,1)), tf.float32), [1,20,20])
+        mask = tf.equal(board, -1)
+        board = tf.math.mod(tf.cast(tf.cast(board, tf.float32) + perspective_full, tf.int32), 4)
+        board = tf.reshape(tf.where(mask, -1, board), (-1, 20, 20))
+        corner_pids = tf.cast(tf.stack([board[:,0,0], board[:,0,-1], board[:,-1,-1], board[:,-1,0]], axis=1), tf.int32)
+        corner_index = tf.cast(tf.argmax(tf.cast(tf.equal(corner_pids, 0), tf.float32), axis=1), tf.float32)
+        board_rot_pairs = tf.concat([tf.cast(tf.reshape(board, (-1, 20*20)), tf.float32), tf.reshape(corner_index, (-1,1))], axis=1)
+        return tf.reshape(tf.vectorized_map(rotate90, board_rot_pairs), (-1, 20, 20))
+
+def make_models(folder):
+    """ Save the model with the new layer and the model with the previous layer (with the same weights) as TFLite models.
+    """
+    model = fit_model_single.get_model((402,))
+    model.save(os.path.join(folder, "gather.keras"))
+    fit_model_single.NormalizeBoardToPerspectiveLayer = VectorizedMapNormalizeLayer
+    try:
+        previous_model = fit_model_single.get_model((402,))
+    finally:
+        fit_model_single.NormalizeBoardToPerspectiveLayer = NormalizeBoardToPerspectiveLayer
+    previous_model.set_weights(model.get_weights())
+    converter = tf.lite.TFLiteConverter.from_keras_model(previous_model)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS, tf.lite.OpsSet.SELECT_TF_OPS]
+    previous_path = os.path.join(folder, "vectorized_map.tflite")
+    with open(previous_path, "wb") as f:
+        f.write(converter.convert())
+    gather_path = convert_model_to_tflite(os.path.join(folder, "gather.keras"), select_tf_ops=False)
+    return TFLiteModel(gather_path), TFLiteModel(previous_path)
+
+def benchmark(model, X, repeats = 50):
+    model.predict(X)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        model.predict(X)
+    return (time.perf_counter() - start) / repeats
+
+if __name__ == "__main__":
+    states = record_positions(1)
+    boards = np.array([state.board for state in states], dtype=np.float32)
+    perspective_pids = np.random.randint(0, 4, len(boards))
+    expected = normalize_boards_to_perspective(boards.astype(np.int8), perspective_pids)
+    for layer in [NormalizeBoardToPerspectiveLayer(), VectorizedMapNormalizeLayer()]:
+        normalized = layer([tf.constant(boards), tf.constant(perspective_pids, dtype=tf.int32)]).numpy()
+        assert np.array_equal(normalized, expected), f"The boards normalized by {type(layer).__name__} differ."
+    print(f"Both layers equal normalize_boards_to_perspective ({len(boards)} boards).")
+    X = np.concatenate([perspective_pids[:, np.newaxis], np.random.randint(0, 4, (len(boards), 1)), boards.reshape(len(boards), -1)], axis=1)
+    X = X.astype(np.float32)
+    with tempfile.TemporaryDirectory() as folder:
+        gather_model, previous_model = make_models(folder)
+        assert np.allclose(gather_model.predict(X), previous_model.predict(X), atol=1e-5), "The evaluations differ."
+        print("The model with the gather layer converts with the builtin ops only, and gives the same evaluations.")
+        for batch_size in [1, 32, 256]:
+            X_batch = X[np.random.randint(0, len(X), batch_size)]
+            gather_time = benchmark(gather_model, X_batch)
+            previous_time = benchmark(previous_model, X_batch)
+            print(f"Batch of {batch_size}: {1000 * previous_time:.3f} ms with vectorized_map, {1000 * gather_time:.3f} ms with gather "
+                  f"({previous_time / gather_time:.1f}x)")
@@ -0,0 +1,52 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from RLFramework.utils import convert_model_to_tflite
+from BlokusGame import BlokusGame
+from BlokusGameState import BlokusGameState
+from BlokusNNPlayer import BlokusNNPlayer
+from BlokusCascadeNNPlayer import BlokusCascadeNNPlayer
+
+""" Play games with BlokusNNPlayers and BlokusCascadeNNPlayers, and report the time per game,
+the pruning ratio (the fraction of successors not evaluated with the model),
+and how often the cascade selects the same move as evaluating all the successors.
+The model is a small random model, since only the speed and the pruning are measured.
+"""
+
+def make_model(folder, input_size):
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(input_size,)),
+        tf.keras.layers.Dense(64, activation="relu"),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    model_path = os.path.join(folder, "model.keras")
+    model.save(model_path)
+    return convert_model_to_tflite(model_path)
+
+def play_game(make_player, model_path, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = BlokusGame(board_size=(20,20), timeout=1000, model_paths=[model_path])
+    players = [make_player(i) for i in range(4)]
+    start = time.perf_counter()
+    result = game.play_game(players)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    game = BlokusGame(board_size=(20,20), timeout=1000)
+    game.initialize_game_wrap([BlokusNNPlayer(name=f"Player{i}", model_path="unused") for i in range(4)])
+    input_size = len(BlokusGameState.from_game(game, copy=True).to_vector(0))
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, input_size)
+        for seed in range(2):
+            _, full_time = play_game(lambda i : BlokusNNPlayer(name=f"Player{i}", model_path=model_path, evaluation_cache_size=0), model_path, seed)
+            result, cascade_time = play_game(lambda i : BlokusCascadeNNPlayer(name=f"Player{i}", model_path=model_path, evaluation_cache_size=0,
+                                                                              agreement_check_prob=0.25), model_path, seed)
+            print(f"Game {seed}: {full_time:.2f} s with full evaluation, {cascade_time:.2f} s with the cascade")
+            for player_json in result.player_jsons:
+                print(f"\t{player_json['name']}: {player_json['cascade']}")
@@ -0,0 +1,45 @@
+import argparse
+import time
+
+import numpy as np
+
+from BlokusBitboard import BlokusBitboard
+from BlokusConvolution import get_legal_placements_convolution
+from BlokusGameState import BlokusGameState
+from profile_bitboard import placements, record_positions
+
+""" Verify the convolution move generator (BlokusConvolution) against the bitboard generator (BlokusBitboard)
+on the positions of recorded random games, and compare their speed.
+Both generators must return the same placement ids, with the tracked anchors and with anchors computed from the board.
+"""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and benchmark the convolution move generator.")
+    parser.add_argument("--num_games", type=int, default=5)
+    args = parser.parse_args()
+    states = record_positions(args.num_games)
+    times = {"bitboard" : 0.0, "convolution" : 0.0}
+    num_placements = 0
+    for i, state in enumerate(states):
+        pid = state.current_pid
+        pieces = state.player_remaining_pieces[pid]
+        anchors = state.player_anchors[pid]
+        start = time.perf_counter()
+        bitboard_ids = BlokusBitboard(state.board).get_legal_placements(pid, pieces, anchors=anchors)
+        times["bitboard"] += time.perf_counter() - start
+        start = time.perf_counter()
+        convolution_ids = get_legal_placements_convolution(state.board, pid, pieces, anchors=anchors)
+        times["convolution"] += time.perf_counter() - start
+        assert bitboard_ids == convolution_ids, f"Position {i}: the generators differ:\n{state.board}"
+        assert get_legal_placements_convolution(state.board, pid, pieces) == bitboard_ids, f"Position {i}: the computed anchors differ."
+        num_placements += len(bitboard_ids)
+    print(f"The generators agree on {len(states)} positions ({num_placements} placements).")
+    for name, t in times.items():
+        print(f"{name}: {1000 * t / len(states):.3f} ms per position, {num_placements / t:.0f} placements per second")
+    # The generators through BlokusGameState, including creating the actions
+    for generator in times:
+        BlokusGameState.move_generator = generator
+        start = time.perf_counter()
+        actions = [placements(state.deepcopy().get_all_possible_actions()) for state in states]
+        print(f"get_all_possible_actions with the {generator} generator: {1000 * (time.perf_counter() - start) / len(states):.3f} ms per position")
+    BlokusGameState.move_generator = "bitboard"
@@ -0,0 +1,101 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from RLFramework.utils import TFLiteModel, convert_model_to_tflite
+from BlokusDeltaModel import ExpandPlacementsLayer, build_delta_model, no_placement_id
+from BlokusGame import BlokusGame
+from BlokusNNPlayer import BlokusNNPlayer
+from BlokusPlacementTable import get_placement_table
+from BlokusSuccessorEncoder import BlokusSuccessorEncoder
+from profile_bitboard import record_positions
+from profile_cascade import make_model
+
+""" Check that a delta model (see BlokusDeltaModel) is equivalent to the standard model it wraps:
+the in-graph expansion must give exactly the standard successor vectors (BlokusSuccessorEncoder.encode),
+the TFLite models must give the same evaluations (also of the states themselves, evaluated in one batch), and BlokusNNPlayers with either model must play the same game.
+Then compare the time per turn (encoding and inference) and the bytes copied to the interpreter.
+The model is a small random model.
+"""
+
+def play_game(model_path, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = BlokusGame(board_size=(20,20), timeout=1000, model_paths=[model_path])
+    players = [BlokusNNPlayer(name=f"Player{i}", model_path=model_path, evaluation_cache_size=0) for i in range(4)]
+    # The fingerprints are equal for boards, that the models normalize to the same perspective,
+    # but the random model does not normalize, so the successors are not deduplicated (like with the delta model)
+    for player in players:
+        player.deduplicate_successors = False
+    start = time.perf_counter()
+    result = game.play_game(players)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    states = record_positions(1)
+    encoder = BlokusSuccessorEncoder((20, 20))
+    table = get_placement_table((20, 20))
+    expand = ExpandPlacementsLayer((20, 20))
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, 402)
+        delta_model_path = convert_model_to_tflite(os.path.join(folder, "model.keras"), os.path.join(folder, "delta_model.tflite"),
+                                                   wrap_model=build_delta_model)
+        model = TFLiteModel(model_path)
+        delta_model = TFLiteModel(delta_model_path)
+        times = {"standard" : 0.0, "delta" : 0.0}
+        num_bytes = {"standard" : 0, "delta" : 0}
+        num_turns = 0
+        num_successors = 0
+        for state in states:
+            game = state.game
+            actions = game.get_all_possible_actions()
+            if actions[0].piece_id == -1:
+                continue
+            placement_ids = [table.get_placement_id(a.piece_id, a.x, a.y, a.rotation, a.flip) for a in actions]
+            pids = (game.current_pid, (game.current_pid + 1) % 4, game.current_pid)
+            start = time.perf_counter()
+            X = encoder.encode(game.board, placement_ids, *pids)
+            evaluations = np.asarray(model.predict(X)).ravel()
+            times["standard"] += time.perf_counter() - start
+            start = time.perf_counter()
+            inputs = encoder.encode_delta(game.board, placement_ids, *pids)
+            delta_evaluations = np.asarray(delta_model.predict_inputs(inputs)).ravel()
+            times["delta"] += time.perf_counter() - start
+            expanded = expand([tf.constant(inputs[name]) for name in ["board", "metadata", "placement_ids", "board_ids"]]).numpy()
+            assert np.array_equal(expanded, X), "The expanded successors differ from the standard successor vectors."
+            assert np.allclose(evaluations, delta_evaluations, atol=1e-5), "The evaluations of the delta model differ."
+            # The state itself, with the placement that places nothing
+            state_inputs = encoder.encode_delta(game.board, [no_placement_id()], -1, state.current_pid, game.current_pid)
+            assert np.allclose(model.predict(state.to_vector(game.current_pid)[np.newaxis]), delta_model.predict_inputs(state_inputs), atol=1e-5), \
+                "The evaluation of the state with the delta model differs."
+            num_bytes["standard"] += X.nbytes
+            num_bytes["delta"] += sum(v.nbytes for v in inputs.values())
+            num_turns += 1
+            num_successors += len(actions)
+        # The states themselves in one batch, like BlokusNNPlayer evaluates them
+        perspective_pid = 1
+        state_inputs = encoder.encode_delta_boards(np.array([state.board for state in states]), [no_placement_id()] * len(states),
+                                                   [-1] * len(states), [state.current_pid for state in states], perspective_pid)
+        X = np.array([state.to_vector(perspective_pid) for state in states], dtype=np.float32)
+        assert np.allclose(np.asarray(model.predict(X)).ravel(), np.asarray(delta_model.predict_inputs(state_inputs)).ravel(), atol=1e-5), \
+            "The batched evaluations of the states with the delta model differ."
+        start = time.perf_counter()
+        for state in states:
+            delta_model.predict_inputs(encoder.encode_delta(state.board, [no_placement_id()], -1, state.current_pid, perspective_pid))
+        loop_time = time.perf_counter() - start
+        start = time.perf_counter()
+        delta_model.predict_inputs(encoder.encode_delta_boards(np.array([state.board for state in states]), [no_placement_id()] * len(states),
+                                                               [-1] * len(states), [state.current_pid for state in states], perspective_pid))
+        batch_time = time.perf_counter() - start
+        print(f"The delta model is equivalent to the standard model on {num_turns} turns ({num_successors} successors).")
+        for name in times:
+            print(f"{name} input: {1000 * times[name] / num_turns:.3f} ms per turn, {num_bytes[name] / num_turns / 1024:.1f} KiB per turn to the interpreter")
+        print(f"Evaluating {len(states)} states with the delta model: {1000 * loop_time:.2f} ms one by one, {1000 * batch_time:.2f} ms in one batch")
+        result, standard_time = play_game(model_path)
+        delta_result, delta_time = play_game(delta_model_path)
+        assert [js["score"] for js in result.player_jsons] == [js["score"] for js in delta_result.player_jsons], "The games differ."
+        print(f"A game with the standard model: {standard_time:.2f} s, with the delta model: {delta_time:.2f} s")
@@ -0,0 +1,73 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from BlokusAction import BlokusAction
+from BlokusPieces import BLOKUS_PIECE_MAP
+from profile_bitboard import placements, record_positions
+
+""" Verify the standalone legality check (BlokusBitboard.check_placement_is_legal) against the original rule check
+(BlokusAction._check_action_is_legal_reference), and compare their speed.
+The candidates of each recorded position are its legal moves, and random placements of the player's remaining pieces.
+The check is benchmarked as checks per second, and the move generators as moves generated per second:
+- "per-candidate game": the original check, with a BlokusGame built from the state for every candidate (how BlokusGameState checked actions before).
+- "shared game": the original check, with one BlokusGame per position.
+- "standalone": the new check from the state's board and tracked anchors.
+"""
+
+def sample_candidates(state, num_random, rng):
+    """ Return the legal moves of the state, and num_random random placements of the player's remaining pieces.
+    """
+    candidates = state.deepcopy().get_all_possible_actions()
+    remaining_pieces = state.player_remaining_pieces[state.current_pid]
+    if not remaining_pieces:
+        return candidates
+    height, width = np.asarray(state.board).shape
+    for _ in range(num_random):
+        piece_id = int(rng.choice(remaining_pieces))
+        size = BLOKUS_PIECE_MAP[piece_id].shape[0]
+        x = int(rng.integers(-1, height - size + 2))
+        y = int(rng.integers(-1, width - size + 2))
+        candidates.append(BlokusAction(piece_id, x, y, int(rng.integers(4)), bool(rng.integers(2))))
+    return candidates
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and benchmark the standalone Blokus legality check.")
+    parser.add_argument("--num_games", type=int, default=2)
+    parser.add_argument("--num_random", type=int, default=200)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    states = record_positions(args.num_games)
+    times = {"per-candidate game" : 0.0, "shared game" : 0.0, "standalone" : 0.0}
+    num_checks = 0
+    num_legal = 0
+    for i, state in enumerate(states):
+        candidates = sample_candidates(state, args.num_random, rng)
+        start = time.perf_counter()
+        reference = [action._check_action_is_legal_reference(state.game)[0] for action in candidates]
+        times["per-candidate game"] += time.perf_counter() - start
+        start = time.perf_counter()
+        game = state.game
+        shared = [action._check_action_is_legal_reference(game)[0] for action in candidates]
+        times["shared game"] += time.perf_counter() - start
+        start = time.perf_counter()
+        standalone = [state._check_action_is_legal(action)[0] for action in candidates]
+        times["standalone"] += time.perf_counter() - start
+        assert reference == shared
+        for action, is_legal, new_is_legal in zip(candidates, reference, standalone):
+            assert is_legal == new_is_legal, f"Position {i}: the checks differ on {action}: reference {is_legal}, standalone {new_is_legal}\n{state}"
+        num_checks += len(candidates)
+        num_legal += sum(standalone)
+    print(f"The checks agree on {num_checks} candidates ({num_legal} legal) in {len(states)} positions.")
+    for name, t in times.items():
+        print(f"{name}: {num_checks / t:.0f} checks per second")
+    generators = {"reference generator" : lambda state : state.get_all_possible_actions_reference(),
+                  "bitboard generator" : lambda state : state.get_all_possible_actions()}
+    for name, generate in generators.items():
+        num_moves = 0
+        start = time.perf_counter()
+        for state in states[::5]:
+            num_moves += len(set(placements(generate(state.deepcopy()))))
+        print(f"{name}: {num_moves / (time.perf_counter() - start):.0f} moves generated per second")
@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from BlokusGame import BlokusGame
+from BlokusGameState import BlokusGameState
+from BlokusPlayer import BlokusPlayer
+from BlokusMCTSPlayer import BlokusMCTSPlayer
+from profile_cascade import make_model
+
+""" Measure the simulations per second of BlokusMCTSPlayer's search against the leaf batch size
+(leaves selected with virtual loss and evaluated in one batch, in one process),
+and against the number of worker processes (root parallelization).
+The search starts from the same position after some random opening moves.
+The model is a small random model, since only the speed is measured.
+"""
+
+def make_position(num_random_moves, seed = 0):
+    """ Play random moves, and return the game.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    game = BlokusGame(board_size=(20,20), timeout=1000)
+    game.initialize_game_wrap([BlokusPlayer(name=f"Player{i}") for i in range(4)])
+    # Like in play_game, the player in turn is in previous_turns
+    game.previous_turns.append(game.current_pid)
+    for _ in range(num_random_moves):
+        actions = game.get_all_possible_actions()
+        game.restore_state(game.successor_state(actions[np.random.randint(len(actions))]))
+    return game.fork()
+
+def search_speed(state, model_path, leaf_batch_size, num_workers, num_simulations):
+    """ Run one search from the state, and return the simulations per second.
+    The worker processes are forked (and load the model) in a first search, that is not measured.
+    """
+    game = BlokusGame(board_size=(20,20), timeout=1000, model_paths=[model_path])
+    player = BlokusMCTSPlayer(name="Player0", model_path=model_path, num_simulations=num_simulations,
+                              leaf_batch_size=leaf_batch_size, num_workers=num_workers, reuse_tree=False)
+    game.initialize_game_wrap([player] + [BlokusPlayer(name=f"Player{i}") for i in range(1, 4)])
+    game.restore_state(state)
+    if num_workers > 1:
+        player.choose_move(game)
+        game.restore_state(state)
+        del player._mcts_stats
+    # Expand the root outside the measurement, and let the search continue from it
+    root = player._get_root(game)
+    player._expand(game, [root])
+    game.restore_state(root.state)
+    player._previous_root = root
+    start = time.perf_counter()
+    player.choose_move(game)
+    elapsed = time.perf_counter() - start
+    player.teardown(game)
+    return player.mcts_stats["num_simulations"] / elapsed, player.mcts_stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the batched and the parallel MCTS search.")
+    parser.add_argument("--num_simulations", type=int, default=32)
+    parser.add_argument("--num_random_moves", type=int, default=8)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    print(f"CPUs: {os.cpu_count()}")
+    state = make_position(args.num_random_moves)
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, len(state.to_vector(0)))
+        settings = [(leaf_batch_size, 1) for leaf_batch_size in args.batch_sizes] + [(1, num_workers) for num_workers in args.workers]
+        for leaf_batch_size, num_workers in settings:
+            speed, stats = search_speed(state, model_path, leaf_batch_size, num_workers, args.num_simulations)
+            print(f"Leaf batch size {leaf_batch_size}, {num_workers} worker processes: {speed:.2f} simulations/s, "
+                  f"{stats['num_evaluated_states'] / max(stats['num_batches'], 1):.1f} states per inference batch")
@@ -0,0 +1,49 @@
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from BlokusGame import BlokusGame
+from BlokusGameState import BlokusGameState
+from BlokusNNPlayer import BlokusNNPlayer
+from profile_cascade import make_model
+
+""" Play games with BlokusNNPlayers with a game timeout, that leaves time to evaluate only about half of the successors.
+Without allocate_move_time, the games time out (and their data is discarded).
+With allocate_move_time, each move gets a share of the remaining time, and the players evaluate the placements
+of the largest pieces first, and select the best evaluated placement when the time runs out.
+The model is a small random model, since only the time is measured.
+"""
+
+def play_game(model_path, timeout, allocate_move_time, max_evaluations = None, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = BlokusGame(board_size=(20,20), timeout=timeout, model_paths=[model_path], allocate_move_time=allocate_move_time)
+    players = [BlokusNNPlayer(name=f"Player{i}", model_path=model_path, evaluation_cache_size=0) for i in range(4)]
+    if max_evaluations is not None:
+        for player in players:
+            player.set_move_budget(max_evaluations=max_evaluations)
+    start = time.perf_counter()
+    result = game.play_game(players)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    game = BlokusGame(board_size=(20,20), timeout=1000)
+    game.initialize_game_wrap([BlokusNNPlayer(name=f"Player{i}", model_path="unused") for i in range(4)])
+    input_size = len(BlokusGameState.from_game(game, copy=True).to_vector(0))
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, input_size)
+        _, full_time = play_game(model_path, timeout=1000, allocate_move_time=False)
+        # Generating the placements is not in the budget, so measure the time of a game, where only one successor is evaluated per move
+        _, fixed_time = play_game(model_path, timeout=1000, allocate_move_time=False, max_evaluations=1)
+        print(f"Full evaluation without a timeout: {full_time:.2f} s, evaluating one successor per move: {fixed_time:.2f} s")
+        timeout = fixed_time + (full_time - fixed_time) / 2
+        for name, allocate_move_time, max_evaluations in [("No budget", False, None),
+                                                          ("Allocated move time", True, None),
+                                                          ("Max 128 evaluations per move", False, 128)]:
+            result, game_time = play_game(model_path, timeout, allocate_move_time, max_evaluations)
+            num_truncated = sum(player_json["num_truncated_moves"] for player_json in result.player_jsons)
+            num_evaluated = sum(player_json["num_evaluated_states"] for player_json in result.player_jsons)
+            print(f"{name} (timeout {timeout:.1f} s): {game_time:.2f} s, successful: {result.successful}, "
+                  f"{num_truncated} truncated moves, {num_evaluated} evaluated successors")
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import time
+
+import numpy as np
+
+import fit_model_single
+from BlokusGame import normalize_board_to_perspective, normalize_boards_to_perspective
+from BlokusGameState import BlokusGameState
+from BlokusPlacementTable import get_placement_table
+from BlokusSuccessorEncoder import BlokusSuccessorEncoder
+from profile_bitboard import record_positions
+
+""" Verify the batched perspective normalization (normalize_boards_to_perspective) against normalize_board_to_perspective,
+for the recorded boards, the successors encoded by BlokusSuccessorEncoder and BlokusGameState.to_vector.
+A model with the normalization layer (fit_model_single.get_model) must give the same evaluations of the normalized vectors
+(with perspective pid 0) as of the vectors that are not normalized,
+and the same evaluations of the states with the same fingerprint (BlokusGameState.fingerprint).
+Then compare the time to normalize a batch of boards one by one and with the batched function.
+"""
+
+def normalize_one_by_one(boards, perspective_pids):
+    # normalize_board_to_perspective prints, when the perspective player has no corner
+    with contextlib.redirect_stdout(io.StringIO()):
+        return np.array([normalize_board_to_perspective(board, int(pid)) for board, pid in zip(boards, perspective_pids)])
+
+def verify(states):
+    boards = np.array([state.board for state in states])
+    perspective_pids = np.random.randint(0, 4, len(boards))
+    assert np.array_equal(normalize_boards_to_perspective(boards, perspective_pids), normalize_one_by_one(boards, perspective_pids)), \
+        "The normalized boards differ."
+    # The successors of the encoder
+    encoder = BlokusSuccessorEncoder((20, 20))
+    table = get_placement_table((20, 20))
+    num_successors = 0
+    for state in states[::5]:
+        game = state.game
+        actions = game.get_all_possible_actions()
+        if actions[0].piece_id == -1:
+            continue
+        placement_ids = [table.get_placement_id(a.piece_id, a.x, a.y, a.rotation, a.flip) for a in actions]
+        perspective_pid = np.random.randint(0, 4)
+        X = encoder.encode(game.board, placement_ids, game.current_pid, (game.current_pid + 1) % 4, perspective_pid)
+        expected = normalize_one_by_one(X[:, 2:].reshape(-1, 20, 20), X[:, 0]).reshape(len(X), -1)
+        encoder.normalize(X)
+        assert np.array_equal(X[:, 2:], expected) and np.all(X[:, 0] == 0), "The normalized successors differ."
+        num_successors += len(X)
+    # The state vectors, and their evaluations with a model, that normalizes the boards itself
+    model = fit_model_single.get_model((402,))
+    raw_vectors = np.array([state.to_vector(pid) for state in states for pid in range(4)])
+    BlokusGameState.normalize_perspective = True
+    try:
+        normalized_vectors = np.array([state.to_vector(pid) for state in states for pid in range(4)])
+    finally:
+        BlokusGameState.normalize_perspective = False
+    expected = normalize_one_by_one(raw_vectors[:, 2:].reshape(-1, 20, 20), raw_vectors[:, 0]).reshape(len(raw_vectors), -1)
+    assert np.array_equal(normalized_vectors[:, 2:], expected) and np.all(normalized_vectors[:, 0] == 0), "The normalized state vectors differ."
+    evaluations = model.predict(raw_vectors, verbose=0).ravel()
+    assert np.allclose(evaluations, model.predict(normalized_vectors, verbose=0).ravel(), atol=1e-6), \
+        "The model evaluates the normalized vectors differently."
+    fingerprint_evaluations = {}
+    for fingerprint, evaluation in zip([state.fingerprint(pid) for state in states for pid in range(4)], evaluations):
+        fingerprint_evaluations.setdefault(fingerprint, []).append(evaluation)
+    assert all(np.allclose(e, e[0], atol=1e-6) for e in fingerprint_evaluations.values()), \
+        "The model evaluates states with the same fingerprint differently."
+    return len(boards), num_successors
+
+def benchmark(boards, perspective_pids, repeats = 10):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        normalize_one_by_one(boards, perspective_pids)
+    loop_time = (time.perf_counter() - start) / repeats
+    start = time.perf_counter()
+    for _ in range(repeats):
+        normalize_boards_to_perspective(boards, perspective_pids)
+    batch_time = (time.perf_counter() - start) / repeats
+    return loop_time, batch_time
+
+if __name__ == "__main__":
+    states = record_positions(2)
+    num_boards, num_successors = verify(states)
+    print(f"The batched normalization equals normalize_board_to_perspective ({num_boards} boards, {num_successors} successors),"
+          " and the model evaluates the normalized vectors the same.")
+    for batch_size in [1, 64, 1024]:
+        indices = np.random.randint(0, len(states), batch_size)
+        boards = np.array([states[i].board for i in indices])
+        perspective_pids = np.random.randint(0, 4, batch_size)
+        loop_time, batch_time = benchmark(boards, perspective_pids)
+        print(f"Batch of {batch_size}: {1000 * loop_time:.3f} ms one by one, {1000 * batch_time:.3f} ms batched ({loop_time / batch_time:.1f}x)")
@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from BlokusPlacementTable import PlacementTable, build_placement_table, save_placement_table
+from profile_bitboard import record_positions
+
+""" Measure the cost of building the Blokus placement table, and of loading it (memory-mapped) in fresh worker processes,
+and the move generation speed with the table.
+"""
+
+def load_in_worker(folder):
+    """ Load the table from the folder in a fresh process, and return the time it took.
+    """
+    start = time.perf_counter()
+    table = PlacementTable((20, 20), folder=folder)
+    table.cell_mask_ints
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    arrays = build_placement_table((20, 20))
+    build_time = time.perf_counter() - start
+    size = sum(array.nbytes for array in arrays.values())
+    print(f"Built the table of {len(arrays['placements'])} placements in {build_time:.2f} s ({size / 1e6:.1f} MB)")
+    with tempfile.TemporaryDirectory() as parent:
+        folder = os.path.join(parent, "table")
+        save_placement_table(arrays, folder)
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            load_times = pool.map(load_in_worker, [folder] * 4)
+        print(f"Loading the table in fresh worker processes: {', '.join(f'{1000 * t:.1f} ms' for t in load_times)}")
+    states = record_positions(2)
+    start = time.perf_counter()
+    num_actions = sum(len(state.deepcopy().get_all_possible_actions()) for state in states)
+    print(f"Move generation: {1000 * (time.perf_counter() - start) / len(states):.2f} ms per position, {num_actions} placements")
@@ -0,0 +1,60 @@
+import time
+
+import numpy as np
+
+from RLFramework import policies
+
+""" Benchmark the vectorized action selection policies against the previous list-based
+implementations for 10 to 10000 actions, and check that the sampling policies have the right distributions.
+The evaluations are given as a list of 1-element arrays, like TFLiteModel.predict returns them.
+"""
+
+def list_greedy(evaluations):
+    return evaluations.index(max(evaluations))
+
+def list_top_p(evaluations, temperature = 1.0):
+    """ The previous Player._select_weighted_action.
+    """
+    choice_evals = sorted(enumerate(evaluations), key = lambda x : x[1], reverse = True)
+    evals_exp = np.exp([x[1] for x in choice_evals]).flatten()
+    cumsum = np.cumsum(evals_exp / np.sum(evals_exp))
+    idx = np.argmax(cumsum >= temperature)
+    valid_choices = choice_evals[:idx+1]
+    evals_exp = np.exp([x[1] for x in valid_choices]).flatten()
+    return np.random.choice([x[0] for x in valid_choices], p = evals_exp / np.sum(evals_exp))
+
+def time_function(f, evaluations, n_repeats):
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        f(evaluations)
+    return (time.perf_counter() - start) / n_repeats
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    for num_actions in [10, 100, 1000, 10000]:
+        evaluations = list(rng.random((num_actions, 1), dtype=np.float32))
+        n_repeats = max(10, 20000 // num_actions)
+        times = {
+            "list greedy" : time_function(list_greedy, evaluations, n_repeats),
+            "greedy" : time_function(policies.greedy, evaluations, n_repeats),
+            "list top_p(0.9)" : time_function(lambda e : list_top_p(e, 0.9), evaluations, n_repeats),
+            "top_p(0.9)" : time_function(lambda e : policies.top_p(e, rng, 0.9), evaluations, n_repeats),
+            "softmax" : time_function(lambda e : policies.softmax(e, rng), evaluations, n_repeats),
+            "top_k(10)" : time_function(lambda e : policies.top_k(e, rng, 10), evaluations, n_repeats),
+            "gumbel" : time_function(lambda e : policies.gumbel(e, rng), evaluations, n_repeats),
+        }
+        print(f"{num_actions} actions: " + ", ".join(f"{name} {t*1e6:.1f} us" for name, t in times.items()))
+
+    # The sampling distributions should match the softmax
+    evaluations = np.array([0.0, 1.0, 2.0, 0.5])
+    expected = np.exp(evaluations) / np.sum(np.exp(evaluations))
+    num_samples = 40000
+    for name, policy in [("softmax", lambda e : policies.softmax(e, rng)),
+                         ("top_p(1.0)", lambda e : policies.top_p(e, rng, 1.0)),
+                         ("gumbel", lambda e : policies.gumbel(e, rng))]:
+        counts = np.bincount([policy(evaluations) for _ in range(num_samples)], minlength=len(evaluations))
+        assert np.allclose(counts / num_samples, expected, atol=0.01), f"The {name} policy has a wrong distribution: {counts / num_samples}"
+    # top_p only samples from the best actions, whose probabilities sum to atleast p
+    counts = np.bincount([policies.top_p(evaluations, rng, 0.6) for _ in range(num_samples)], minlength=len(evaluations))
+    assert counts[0] == 0 and counts[3] == 0 and counts[2] > counts[1] > 0, f"top_p(0.6) sampled wrong actions: {counts}"
+    print("The sampling policies have the expected distributions.")
@@ -0,0 +1,27 @@
+import random
+import time
+
+import numpy as np
+
+from BlokusGame import BlokusGame
+from BlokusPlayer import BlokusPlayer
+
+""" Play a game, where the players deduplicate the successor states before evaluating them,
+and report how many evaluations (inference rows for a model player) the deduplication saves.
+"""
+
+class DeduplicatingBlokusPlayer(BlokusPlayer):
+    deduplicate_successors = True
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    game = BlokusGame(board_size=(20,20), timeout=1000)
+    players = [DeduplicatingBlokusPlayer(name=f"Player{i}") for i in range(4)]
+    start = time.perf_counter()
+    result = game.play_game(players)
+    print(f"Played a game in {time.perf_counter() - start:.2f} s")
+    for player_json in result.player_jsons:
+        num_successors = player_json["num_successor_states"]
+        num_evaluated = player_json["num_evaluated_states"]
+        print(f"{player_json['name']}: evaluated {num_evaluated} of {num_successors} successor states ({1 - num_evaluated / max(num_successors, 1):.1%} saved)")
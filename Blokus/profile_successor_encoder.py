@@ -0,0 +1,69 @@
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from BlokusGame import BlokusGame
+from BlokusGameState import BlokusGameState
+from BlokusNNPlayer import BlokusNNPlayer
+from BlokusPlacementTable import get_placement_table
+from BlokusSuccessorEncoder import BlokusSuccessorEncoder
+from profile_bitboard import record_positions
+from profile_cascade import make_model
+
+""" Verify the successor encoder (BlokusSuccessorEncoder) against the successor states:
+the encoded rows must equal BlokusGameState.to_vector, and the fingerprints BlokusGameState.fingerprint, of the successors.
+Then compare the time per game of BlokusNNPlayers, that evaluate the successor states and that encode the successors,
+with and without the deduplication and the evaluation cache. The model is a small random model.
+"""
+
+class StateBlokusNNPlayer(BlokusNNPlayer):
+    encode_successors = False
+
+def verify(states, perspective_pid = 0):
+    encoder = BlokusSuccessorEncoder((20, 20))
+    table = get_placement_table((20, 20))
+    num_successors = 0
+    for state in states[::3]:
+        game = state.game
+        actions = game.get_all_possible_actions()
+        if actions[0].piece_id == -1:
+            continue
+        game.players[perspective_pid].pid = perspective_pid
+        successors = game.successor_states(actions, player=game.players[perspective_pid])
+        placement_ids = [table.get_placement_id(a.piece_id, a.x, a.y, a.rotation, a.flip) for a in actions]
+        X = encoder.encode(game.board, placement_ids, game.current_pid, (game.current_pid + 1) % 4, perspective_pid)
+        for row, fingerprint, successor in zip(X, encoder.fingerprints(X), successors):
+            # The successor states of the game may already have the next unfinished player as current player
+            successor.current_pid = int(row[1])
+            assert np.array_equal(row, successor.to_vector(perspective_pid)), "The encoded successor differs from the successor state."
+            assert fingerprint == successor.fingerprint(perspective_pid), "The fingerprint differs from the successor state's fingerprint."
+        num_successors += len(actions)
+    return num_successors
+
+def play_game(player_class, model_path, seed = 0, **kwargs):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = BlokusGame(board_size=(20,20), timeout=1000, model_paths=[model_path])
+    players = [player_class(name=f"Player{i}", model_path=model_path, **kwargs) for i in range(4)]
+    start = time.perf_counter()
+    result = game.play_game(players)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    num_successors = verify(record_positions(1))
+    print(f"The encoded successors equal the successor states ({num_successors} successors).")
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, 402)
+        settings = {"no cache, no deduplication" : dict(evaluation_cache_size=0),
+                    "cache and deduplication" : dict()}
+        for name, kwargs in settings.items():
+            deduplicate = "evaluation_cache_size" not in kwargs
+            StateBlokusNNPlayer.deduplicate_successors = deduplicate
+            BlokusNNPlayer.deduplicate_successors = deduplicate
+            state_result, state_time = play_game(StateBlokusNNPlayer, model_path, **kwargs)
+            encoder_result, encoder_time = play_game(BlokusNNPlayer, model_path, **kwargs)
+            assert [js["score"] for js in state_result.player_jsons] == [js["score"] for js in encoder_result.player_jsons], "The games differ."
+            num_successors = sum(js["num_successor_states"] for js in encoder_result.player_jsons)
+            print(f"{name}: {state_time:.2f} s per game with successor states, {encoder_time:.2f} s with the encoder ({num_successors} successors)")
@@ -10,6 +10,7 @@ import multiprocessing
 import gc
 import numpy as np
 import tensorflow as tf
+from RLFramework.targets import build_perspective_value_targets
 
 def parse_gtp_board_to_matrix(board):
     """
@@ -119,6 +120,8 @@ class PentobiGTP:
             #preexec_fn=os.setsid,
         )
         self.game_states = []
+        # The model value of each state in game_states (from the perspective of the player who moved), NaN if not known
+        self.state_values = []
         
         self.current_player = 1
         # Lock to ensure thread-safe access to the process
@@ -163,7 +166,13 @@ class PentobiGTP:
         #    sc[winner_idx] += 50
         return sc
     
-    def write_states_to_file(self, filename, overwrite=False, use_discount=False, label_rank=False,append_mode=False):
+    def write_states_to_file(self, filename, overwrite=False, use_discount=False, label_rank=False,append_mode=False,
+                             target_method="mc", target_args=None):
+        """ Write the states of the game to a file, labeled with the value targets (see RLFramework.targets).
+        By default, the label is the final score (or rank) of the player whose perspective the state is from.
+        With target_method "nstep" or "td_lambda", the targets are bootstrapped from the stored model values,
+        which must be in the same units as the labels.
+        """
         if not filename:
             raise ValueError("Filename is empty")
         states = np.array(self.game_states)
@@ -188,9 +197,10 @@ class PentobiGTP:
             winner_idx = np.argmax(scores)
             if np.sum(scores == scores[winner_idx]) == 1:
                 scores[winner_idx] += 50
-        # Get the score for the player whose perspective the state is from
+        # Get the target for the player whose perspective the state is from,
+        # bootstrapped from the same player's later states
         pids = states[:,0].astype(int)
-        scores = scores[pids]
+        scores = build_perspective_value_targets(scores, pids, values=self.state_values, method=target_method, **(target_args or {}))
         if use_discount:
             assert not label_rank, "Can't use discount and label rank at the same time"
             for i, sc, pid in zip(range(len(scores)), scores, pids):
@@ -206,12 +216,13 @@ class PentobiGTP:
         os.makedirs(os.path.dirname(filename), exist_ok=True)
         if os.path.exists(filename) and not (overwrite or append_mode):
             raise FileExistsError(f"File {filename} already exists")
-        #fmt = ["%d" for _ in range(states.shape[1] - 1)] + ["%f"]
+        # If the targets are discounted, the label is not an integer
+        fmt = "%d" if np.all(scores == np.round(scores)) else ["%d" for _ in range(states.shape[1] - 1)] + ["%f"]
         if append_mode:
             with open(filename, "ab") as f:
-                np.savetxt(f, states, fmt="%d", delimiter=",")
+                np.savetxt(f, states, fmt=fmt, delimiter=",")
         else:
-            np.savetxt(filename, states, fmt="%d", delimiter=",")
+            np.savetxt(filename, states, fmt=fmt, delimiter=",")
 
 
     def send_command(self, command, errors="raise", lock = True):
@@ -266,8 +277,9 @@ class PentobiGTP:
         move = out.replace("= ", "")
         return move
     
-    def play_move(self, pid, move, mock_move=False):
+    def play_move(self, pid, move, mock_move=False, value=None):
         """ Move is in the format a1,b1,a2, etc.
+        value is the model value of the state after the move, if known.
         """
         if not self._check_pid_has_turn(pid):
             raise ValueError(f"Player {pid} is not in turn!")
@@ -277,7 +289,8 @@ class PentobiGTP:
         if not mock_move and move != "pass":
             misc = np.array([pid-1, self.current_player-1])
             board = self.board_np.flatten()
-            self.game_states.append(np.concatenate([misc, board]))        
+            self.game_states.append(np.concatenate([misc, board]))
+            self.state_values.append(np.nan if value is None else value)
         return True
     
     def close(self):
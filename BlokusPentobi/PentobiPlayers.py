@@ -3,6 +3,7 @@ import random
 import warnings
 import numpy as np
 
+from RLFramework import policies
 from PentobiGTP import PentobiGTP,random_playout
 
     
@@ -206,13 +207,17 @@ class MCTSPentobiPlayer:
                 
     
 class PentobiNNPlayer:
-    def __init__(self, pid, pentobi_sess, model, move_selection_strategy="best", move_selection_kwargs={}, name="PentobiNNPlayer"):
+    def __init__(self, pid, pentobi_sess, model, move_selection_strategy="best", move_selection_kwargs={}, name="PentobiNNPlayer", seed=None):
+        """ move_selection_strategy is "best", "random", "epsilon_greedy", "weighted" (top-p, with the 'top_p' kwarg),
+        or one of the policies in RLFramework.policies.
+        """
         self.pid = pid
         self.pentobi_sess : PentobiGTP = pentobi_sess
         self.model = model
         self.name = name
         self.move_selection_strategy = move_selection_strategy
         self.move_selection_kwargs = move_selection_kwargs
+        self.rng = np.random.default_rng(seed if seed is not None else np.random.randint(2**31))
         
     def play_move(self):
         self.make_action_with_nn(self.move_selection_strategy, self.move_selection_kwargs)
@@ -237,15 +242,6 @@ class PentobiNNPlayer:
         
     def make_action_with_nn(self, move_selection_strategy="best", move_selection_kwargs={}):
         moves, next_states = self.get_next_states()
-        if move_selection_strategy == "random":
-            selected_move = random.choice(moves)
-        elif move_selection_strategy == "epsilon_greedy":
-            epsilon = move_selection_kwargs.get("epsilon", 0.1)
-            if np.random.rand() < epsilon:
-                selected_move = random.choice(moves)
-            else:
-                move_selection_strategy = "best"
-                move_selection_kwargs = {}
         if len(moves) == 1 and moves[0] == "pass":
             return self.pentobi_sess.play_move(self.pid, "pass", mock_move=False)
         predictions = self.model.predict(next_states)
@@ -257,33 +253,18 @@ class PentobiNNPlayer:
             weights = np.array([4,3,2,1])
             # Dot product of predictions and weights
             predictions = np.dot(predictions, weights)
+        # The model value of each move, stored with the played state
+        move_values = {move : float(value) for move, value in zip(moves, np.array(predictions).flatten())}
         #print(predictions,flush=True)
         if move_selection_strategy == "best":
-            best_move = np.argmax(predictions)
-            #print(f"Best move index: {best_move}")
-            selected_move = moves[best_move]
+            selected_idx = policies.greedy(predictions)
         elif move_selection_strategy == "weighted":
-            top_p = move_selection_kwargs.get("top_p", 1.0)
-            psoftmax = np.exp(predictions) / np.sum(np.exp(predictions))
-            psoftmax = psoftmax.flatten()
-            #print(psoftmax,flush=True)
-            # Sort from best to worst
-            sort_idxs = np.argsort(psoftmax)[::-1]
-            #print(sort_idxs,flush=True)
-            psoftmax = psoftmax[sort_idxs]
-            #print(moves,flush=True)
-            moves = [moves[i] for i in sort_idxs]
-            # Take the top p moves
-            psoftmax_cumsum = np.cumsum(psoftmax)
-            cutoff = psoftmax_cumsum >= top_p - 10**-6
-            cutoff_idx = np.argmax(cutoff) + 1
-            #print(f"cutoff idx: {cutoff_idx}", flush=True)
-            psoftmax = psoftmax[:cutoff_idx]
-            moves = moves[:cutoff_idx]
-            # Renormalize
-            psoftmax = psoftmax / np.sum(psoftmax)
-            
-            selected_move = np.random.choice(moves, p=psoftmax)
+            selected_idx = policies.top_p(predictions, self.rng, p=move_selection_kwargs.get("top_p", 1.0))
+        elif move_selection_strategy in policies.POLICIES:
+            selected_idx = policies.POLICIES[move_selection_strategy](predictions, self.rng, **move_selection_kwargs)
+        else:
+            raise ValueError(f"Unknown move selection strategy '{move_selection_strategy}'")
+        selected_move = moves[selected_idx]
         #print(f"Selected move: {selected_move}")
-        self.pentobi_sess.play_move(self.pid, selected_move)
+        self.pentobi_sess.play_move(self.pid, selected_move, value=move_values.get(selected_move))
         return
\ No newline at end of file
@@ -30,11 +30,12 @@ def play_pentobi(i, seed, player_maker, timeout, save_data_file = "", proc_args
     
     proc = PentobiGTP(**{**default_proc_args, **proc_args})
     
-    players = player_maker(proc)
-    
+    # Seed before creating the players, since their random number generators are seeded from numpy's global random state
     np.random.seed(seed)
     random.seed(seed)
     
+    players = player_maker(proc)
+    
     num_moves = 0
     start_t = time.time()
     elapsed_t = 0
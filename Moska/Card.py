@@ -69,4 +69,25 @@ def serialize_cards(cards : Iterable[Card]) -> List[Dict]:
 def deserialize_cards(cards : List[Dict]) -> List[Card]:
     """ Deserialize a list of dictionaries to a list of cards.
     """
-    return [Card(c["suit"],c["rank"],c["kopled"]) for c in cards]
\ No newline at end of file
+    return [Card(c["suit"],c["rank"],c["kopled"]) for c in cards]
+
+# The index of each card in the REFERENCE_DECK
+_CARD_TO_INDEX = {(c.suit, c.rank) : i for i, c in enumerate(REFERENCE_DECK)}
+# The highest bit of a packed card tells whether the card is kopled
+_KOPLED_BIT = 0x80
+
+def pack_cards(cards : Iterable[Card]) -> bytes:
+    """ Pack a list of cards to bytes, one byte per card.
+    The byte is the index of the card in REFERENCE_DECK, and the highest bit is set if the card is kopled.
+    The order of the cards is preserved.
+    """
+    return bytes(_CARD_TO_INDEX[(c.suit, c.rank)] | (_KOPLED_BIT if c.kopled else 0) for c in cards)
+
+def unpack_cards(packed_cards : bytes) -> List[Card]:
+    """ Unpack bytes created with pack_cards to a list of cards.
+    """
+    cards = []
+    for b in packed_cards:
+        ref_card = REFERENCE_DECK[b & ~_KOPLED_BIT]
+        cards.append(Card(ref_card.suit, ref_card.rank, bool(b & _KOPLED_BIT)))
+    return cards
\ No newline at end of file
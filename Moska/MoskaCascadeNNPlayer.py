@@ -0,0 +1,27 @@
+from typing import List
+from RLFramework.CascadePlayer import CascadePlayer
+from MoskaGameState import MoskaGameState
+from MoskaHeuristicPlayer import heuristic_evaluation
+from MoskaNNPlayer import MoskaNNPlayer
+
+class MoskaCascadeNNPlayer(CascadePlayer, MoskaNNPlayer):
+    """ A MoskaNNPlayer, that first ranks the successors with a heuristic (like MoskaHeuristicPlayer),
+    and only evaluates the best successors with the neural network.
+    """
+    def __init__(self,name : str = "CascadeNNPlayer", model_path : str = "", max_moves_to_consider = 1000, move_selection_temp = 0, logger_args : dict = None,
+                 evaluation_cache_size : int = 2**16, evaluation_cache_path : str = None,
+                 top_k : int = None, top_fraction : float = 0.5, agreement_check_prob : float = 0.0):
+        """ top_k and top_fraction limit the number of successors evaluated with the network (see CascadePlayer.configure_cascade).
+        """
+        super().__init__(name=name, model_path=model_path, max_moves_to_consider=max_moves_to_consider, move_selection_temp=move_selection_temp,
+                         logger_args=logger_args, evaluation_cache_size=evaluation_cache_size, evaluation_cache_path=evaluation_cache_path)
+        self.configure_cascade(top_k=top_k, top_fraction=top_fraction, agreement_check_prob=agreement_check_prob)
+
+    def cheap_evaluate_state(self, state : MoskaGameState) -> float:
+        """ Evaluate the state with the heuristic of MoskaHeuristicPlayer,
+        but with the player's hand in the state, instead of the current hand.
+        """
+        return heuristic_evaluation(self.game, state, self.pid, state.player_full_cards[self.pid])
+
+    def cheap_evaluate_states(self, states : List[MoskaGameState]) -> List[float]:
+        return [self.cheap_evaluate_state(state) for state in states]
@@ -0,0 +1,21 @@
+from RLFramework.ExpectimaxPlayer import ExpectimaxPlayer
+from MoskaNNPlayer import MoskaNNPlayer
+from MoskaGame import MoskaGame
+
+class MoskaExpectimaxPlayer(ExpectimaxPlayer, MoskaNNPlayer):
+    """ A MoskaNNPlayer, that selects moves with a depth-limited expectimax search (see ExpectimaxPlayer).
+    The chance nodes are the cards lifted from the deck, and the selection of the next player.
+    The search sees the other players' cards.
+    """
+    def __init__(self,name : str = "ExpectimaxPlayer", model_path : str = "", max_moves_to_consider = 1000, move_selection_temp = 0, logger_args : dict = None,
+                 evaluation_cache_size : int = 2**16, evaluation_cache_path : str = None,
+                 depth : int = 2, beam_width : int = 4, num_samples : int = 4, opponent_model : str = "min"):
+        super().__init__(name=name, model_path=model_path, max_moves_to_consider=max_moves_to_consider, move_selection_temp=move_selection_temp,
+                         logger_args=logger_args, evaluation_cache_size=evaluation_cache_size, evaluation_cache_path=evaluation_cache_path)
+        self.configure_expectimax(depth=depth, beam_width=beam_width, num_samples=num_samples, opponent_model=opponent_model)
+
+    def sample_chance_outcome(self, game : MoskaGame) -> None:
+        """ Shuffle the deck, except the trump card at the bottom.
+        """
+        if len(game.deck) > 1:
+            game.deck[:-1] = [game.deck[i] for i in self.rng.permutation(len(game.deck) - 1)]
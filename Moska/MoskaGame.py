@@ -150,10 +150,12 @@ class MoskaGame(Game):
     
     def calculate_reward(self, pid : int, new_state : 'GameState'):
         """ Calculate the reward for the player that made the move.
+        A finished player gets a reward of 1 once. Whether the player has received the reward is read from the state's scores,
+        so that simulating moves (for example in a tree search) does not affect the real game.
         """
         finished_players = [i for i in range(len(self.players)) if self.check_is_player_finished(i, new_state)]
         player = self.players[pid]
-        if pid in finished_players and not player.has_received_reward:
+        if pid in finished_players and new_state.player_scores[pid] == 0:
             player.has_received_reward = True
             return 1
         return 0
@@ -378,7 +380,7 @@ class MoskaGame(Game):
         self.player_public_cards = []
         self.target_pid = 0
         self.ready_players = []
-        self.game_states = []
+        self.game_states = self.make_game_state_store()
         self.previous_turns = []
         self.current_pid = 0
         self.finishing_order = []
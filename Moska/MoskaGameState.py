@@ -12,9 +12,13 @@ if TYPE_CHECKING:
     from MoskaGame import MoskaGame
     from MoskaPlayer import MoskaPlayer
 
-from Card import REFERENCE_DECK, Card
+from Card import REFERENCE_DECK, Card, pack_cards, unpack_cards
 from RLFramework.GameState import GameState
 
+# The keys in the state_json, which are lists of cards, or lists of lists of cards
+_CARD_LIST_KEYS = ["deck", "cards_to_kill", "killed_cards", "discarded_cards"]
+_CARD_LIST_OF_LISTS_KEYS = ["player_full_cards", "player_public_cards"]
+
 class MoskaGameState(GameState):
     """ A class representing the state of the game Moska.
     """
@@ -157,6 +161,28 @@ class MoskaGameState(GameState):
         c = self.__class__(copy.deepcopy(self.state_json)) 
         return c
     
+    def pack_state_json(self, state_json : dict) -> dict:
+        """ Pack all the lists of cards to bytes (one byte per card).
+        """
+        packed = super().pack_state_json(state_json)
+        for key in _CARD_LIST_KEYS:
+            packed[key] = pack_cards(state_json[key])
+        for key in _CARD_LIST_OF_LISTS_KEYS:
+            packed[key] = [pack_cards(cards) for cards in state_json[key]]
+        packed["trump_card"] = pack_cards([state_json["trump_card"]])
+        return packed
+    
+    def unpack_state_json(self, packed_state_json : dict) -> dict:
+        """ Unpack the lists of cards.
+        """
+        state_json = super().unpack_state_json(packed_state_json)
+        for key in _CARD_LIST_KEYS:
+            state_json[key] = unpack_cards(state_json[key])
+        for key in _CARD_LIST_OF_LISTS_KEYS:
+            state_json[key] = [unpack_cards(cards) for cards in state_json[key]]
+        state_json["trump_card"] = unpack_cards(state_json["trump_card"])[0]
+        return state_json
+    
     def cards_to_vector(self, cards : List[Card]) -> List[SupportsFloat]:
         """ Convert a list of cards to a vector.
         """
@@ -18,37 +18,41 @@ class MoskaHeuristicPlayer(MoskaPlayer):
             evaluations.append(self.evaluate_state(state))
         return evaluations
     
-    def _find_remaining_cards(self, state : MoskaGameState) -> List[int]:
-        """ Find all the cards, that have not been discarded yet.
-        """
-        discarded = state.discarded_cards
-        remaining = []
-        for card in REFERENCE_DECK:
-            if card not in discarded:
-                remaining.append(card)
-        return remaining
-        
     def evaluate_state(self, state : MoskaGameState) -> float:
         """ Evaluate the given state using a heuristic function.
         """
-        evaluation = 0.0
-        remaining_cards = self._find_remaining_cards(state)
-        # Count how many of the remianing cards each card in my hand can kill
-        kill_mapping = get_killable_mapping(self.hand, remaining_cards, state.trump_card.suit)
-        kill_counts = [len(kill_mapping[card]) for card in self.hand]
-        total_kill_counts = sum(kill_counts)
-        evaluation += total_kill_counts
-        
-        # If we have missing cards, and the deck is empty, and we are not the target,
-        # count the number of missing cards
-        if len(self.hand) < 6 and len(state.deck) == 0 and state.current_pid != state.target_pid:
-            # For each missing card, we add a score of len(remaing_cards)
-            evaluation += len(remaining_cards) * (6 - len(self.hand))
+        return heuristic_evaluation(self.game, state, self.pid, self.hand)
 
-        # If we are finished, add a score of 1000
-        are_finished = self.game.check_is_player_finished(self.pid, state)
-        if are_finished and len(state.get_finished_players()) < len(state.ready_players):
-            evaluation += 1000
-        
-        return evaluation
-        
\ No newline at end of file
+def find_remaining_cards(state : MoskaGameState) -> List[int]:
+    """ Find all the cards, that have not been discarded yet.
+    """
+    discarded = state.discarded_cards
+    remaining = []
+    for card in REFERENCE_DECK:
+        if card not in discarded:
+            remaining.append(card)
+    return remaining
+
+def heuristic_evaluation(game, state : MoskaGameState, pid : int, hand : List) -> float:
+    """ Evaluate the state for player pid with the hand, using a heuristic function.
+    """
+    evaluation = 0.0
+    remaining_cards = find_remaining_cards(state)
+    # Count how many of the remianing cards each card in my hand can kill
+    kill_mapping = get_killable_mapping(hand, remaining_cards, state.trump_card.suit)
+    kill_counts = [len(kill_mapping[card]) for card in hand]
+    total_kill_counts = sum(kill_counts)
+    evaluation += total_kill_counts
+    
+    # If we have missing cards, and the deck is empty, and we are not the target,
+    # count the number of missing cards
+    if len(hand) < 6 and len(state.deck) == 0 and state.current_pid != state.target_pid:
+        # For each missing card, we add a score of len(remaing_cards)
+        evaluation += len(remaining_cards) * (6 - len(hand))
+
+    # If we are finished, add a score of 1000
+    are_finished = game.check_is_player_finished(pid, state)
+    if are_finished and len(state.get_finished_players()) < len(state.ready_players):
+        evaluation += 1000
+    
+    return evaluation
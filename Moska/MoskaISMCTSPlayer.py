@@ -0,0 +1,58 @@
+from typing import List
+import numpy as np
+from RLFramework.ISMCTSPlayer import ISMCTSPlayer
+from MoskaGame import MoskaGame
+from MoskaGameState import MoskaGameState
+from MoskaPlayer import MoskaPlayer
+
+class MoskaISMCTSPlayer(ISMCTSPlayer, MoskaPlayer):
+    """ A Moska player, that selects moves with information-set Monte-Carlo tree search (see ISMCTSPlayer),
+    and evaluates the leaves with the model at model_path.
+    Unlike MoskaMCTSPlayer, the search does not see the other players' hidden cards or the order of the deck:
+    they are sampled in each determinization.
+    """
+    # The search values estimate the final scores, so they can be used to bootstrap the value targets
+    evaluations_are_values = True
+
+    def __init__(self,name : str = "ISMCTSPlayer", model_path : str = "", max_moves_to_consider = 1000, move_selection_temp = 0, logger_args : dict = None,
+                 num_simulations : int = 200, time_limit : float = None, exploration : float = 1.4,
+                 leaf_batch_size : int = 1, num_workers : int = 1):
+        """ The search runs num_simulations simulations (each with its own determinization),
+        or for time_limit seconds per move (see MCTSPlayer.configure_mcts).
+        """
+        super().__init__(name=name, logger_args=logger_args, max_moves_to_consider=max_moves_to_consider)
+        assert model_path, "A model path must be given."
+        self.model_path = model_path
+        self.move_selection_temp = move_selection_temp
+        self.select_action_strategy = lambda evaluations : self._select_weighted_action(evaluations, move_selection_temp)
+        self.configure_mcts(num_simulations=num_simulations, time_limit=time_limit, exploration=exploration, reuse_tree=False,
+                            leaf_batch_size=leaf_batch_size, num_workers=num_workers)
+
+    def determinize(self, game : MoskaGame) -> MoskaGameState:
+        """ Shuffle the cards, that the player can not see, between the other players' hands and the deck.
+        The player sees its own cards, the public cards of the other players, the kopled cards, the cards on the table,
+        the discarded cards and the trump card at the bottom of the deck. Each hand and the deck keep their sizes.
+        """
+        state = game.fork(self)
+        hidden_cards = {}
+        for pid, (full_cards, public_cards) in enumerate(zip(state.player_full_cards, state.player_public_cards)):
+            if pid != self.pid:
+                hidden_cards[pid] = [card for card in full_cards if card not in public_cards and not card.kopled]
+        # The trump card is at the bottom of the deck
+        num_hidden_deck = max(len(state.deck) - 1, 0)
+        pool = [card for cards in hidden_cards.values() for card in cards] + state.deck[:num_hidden_deck]
+        pool = [pool[i] for i in self.rng.permutation(len(pool))]
+        for pid, cards in hidden_cards.items():
+            known_cards = [card for card in state.player_full_cards[pid] if card not in cards]
+            state.player_full_cards[pid] = known_cards + pool[:len(cards)]
+            pool = pool[len(cards):]
+        state.deck[:num_hidden_deck] = pool
+        return state
+
+    def evaluate_leaves(self, states : List[MoskaGameState]) -> np.ndarray:
+        return self.predict_values(self.game.get_model(self.model_path), states)
+
+    def is_terminal_state(self, state : MoskaGameState) -> bool:
+        """ The game is finished, when all but one player are finished.
+        """
+        return len(state.get_finished_players()) >= len(state.player_full_cards) - 1
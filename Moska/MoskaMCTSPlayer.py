@@ -0,0 +1,34 @@
+from typing import List
+import numpy as np
+from RLFramework.MCTSPlayer import MCTSPlayer
+from MoskaGameState import MoskaGameState
+from MoskaPlayer import MoskaPlayer
+
+class MoskaMCTSPlayer(MCTSPlayer, MoskaPlayer):
+    """ A Moska player, that selects moves with Monte-Carlo tree search (see MCTSPlayer),
+    and evaluates the leaves with the model at model_path.
+    The successors are sampled once, so the lifted cards are fixed in the tree, and the search sees the other players' cards.
+    """
+    # The search values estimate the final scores, so they can be used to bootstrap the value targets
+    evaluations_are_values = True
+
+    def __init__(self,name : str = "MCTSPlayer", model_path : str = "", max_moves_to_consider = 1000, move_selection_temp = 0, logger_args : dict = None,
+                 num_simulations : int = 50, time_limit : float = None, exploration : float = 1.4, reuse_tree : bool = True,
+                 leaf_batch_size : int = 1, num_workers : int = 1):
+        """ The search runs num_simulations simulations, or for time_limit seconds per move (see MCTSPlayer.configure_mcts).
+        """
+        super().__init__(name=name, logger_args=logger_args, max_moves_to_consider=max_moves_to_consider)
+        assert model_path, "A model path must be given."
+        self.model_path = model_path
+        self.move_selection_temp = move_selection_temp
+        self.select_action_strategy = lambda evaluations : self._select_weighted_action(evaluations, move_selection_temp)
+        self.configure_mcts(num_simulations=num_simulations, time_limit=time_limit, exploration=exploration, reuse_tree=reuse_tree,
+                            leaf_batch_size=leaf_batch_size, num_workers=num_workers)
+
+    def evaluate_leaves(self, states : List[MoskaGameState]) -> np.ndarray:
+        return self.predict_values(self.game.get_model(self.model_path), states)
+
+    def is_terminal_state(self, state : MoskaGameState) -> bool:
+        """ The game is finished, when all but one player are finished.
+        """
+        return len(state.get_finished_players()) >= len(state.player_full_cards) - 1
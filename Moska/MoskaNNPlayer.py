@@ -1,14 +1,26 @@
+import os
 from typing import List
+from RLFramework.EvaluationCache import get_evaluation_cache
 from MoskaGameState import MoskaGameState
 from MoskaPlayer import MoskaPlayer
 import numpy as np
 
 class MoskaNNPlayer(MoskaPlayer):
+    # The model predicts the final score, so the evaluations can be used to bootstrap the value targets
+    evaluations_are_values = True
+    # Evaluating a state with the model is more expensive than computing its fingerprint
+    deduplicate_successors = True
     
-    def __init__(self,name : str = "NNPlayer", model_path : str = "", max_moves_to_consider = 1000, move_selection_temp = 0, logger_args : dict = None):
+    def __init__(self,name : str = "NNPlayer", model_path : str = "", max_moves_to_consider = 1000, move_selection_temp = 0, logger_args : dict = None,
+                 evaluation_cache_size : int = 2**16, evaluation_cache_path : str = None):
+        """ If evaluation_cache_size > 0, the evaluations are cached in the process' evaluation cache,
+        keyed by the model and the state's fingerprint.
+        If evaluation_cache_path is given, the cache is also stored in an SQLite database at the path, and shared across games and runs.
+        """
         super().__init__(name=name, logger_args=logger_args, max_moves_to_consider=max_moves_to_consider)
         assert model_path, "A model path must be given."
         self.model_path = model_path
+        self.evaluation_cache = get_evaluation_cache(max_size=evaluation_cache_size, path=evaluation_cache_path) if evaluation_cache_size > 0 else None
         self.move_selection_temp = move_selection_temp
         self.select_action_strategy = lambda evaluations : self._select_weighted_action(evaluations, move_selection_temp)
         
@@ -17,8 +29,16 @@ class MoskaNNPlayer(MoskaPlayer):
         """
         # Load the model
         model = self.game.get_model(self.model_path)
+        if self.evaluation_cache is not None:
+            return self.evaluation_cache.predict(model, os.path.abspath(self.model_path), states, self.pid)
         X = np.array([s.to_vector(self.pid) for s in states], dtype=np.float32)
         #print(f"X shape: {X.shape}")
         evaluations = model.predict(X)
         #print(f"evaluations: {evaluations}")
-        return evaluations
\ No newline at end of file
+        return evaluations
+    
+    def as_json(self) -> dict:
+        js = super().as_json()
+        if self.evaluation_cache is not None:
+            js["evaluation_cache"] = self.evaluation_cache.stats()
+        return js
@@ -7,6 +7,7 @@ from MoskaPlayer import MoskaPlayer
 from MoskaHumanPlayer import MoskaHumanPlayer
 from MoskaHeuristicPlayer import MoskaHeuristicPlayer
 from MoskaNNPlayer import MoskaNNPlayer
+from RLFramework.EvaluationCache import get_evaluation_cache
 
 import multiprocessing
 import os
@@ -23,7 +24,7 @@ def game_constructor(i, model_paths = []):
         model_paths=model_paths,
         )
 
-def players_constructor(i, model_path = ""):
+def players_constructor(i, model_path = "", evaluation_cache_path = None):
     random_players = [MoskaPlayer(name=f"Player{j}_{i}",
                                     logger_args=None,
                                     )
@@ -37,18 +38,22 @@ def players_constructor(i, model_path = ""):
                                     logger_args=None,
                                     model_path=model_path,
                                     move_selection_temp=0.0,
+                                    evaluation_cache_path=evaluation_cache_path,
                                     )
     players = random_players + [test_player]
     random.shuffle(players)
     return players
 
 def run_game(args):
-    i, model_path, seed = args
+    i, model_path, evaluation_cache_path, seed = args
     random.seed(seed)
     np.random.seed(seed)
     game = game_constructor(i, [model_path])
-    players = players_constructor(i, model_path)
+    players = players_constructor(i, model_path, evaluation_cache_path)
     res = game.play_game(players)
+    if evaluation_cache_path:
+        # Write the new evaluations, since the pool's workers are terminated without cleanup
+        get_evaluation_cache(path=evaluation_cache_path).flush()
     return res
 
 if __name__ == "__main__":
@@ -57,10 +62,14 @@ if __name__ == "__main__":
     parser.add_argument('--num_games', type=int, required=True, help='The number of games to play for each model.')
     parser.add_argument('--num_cpus', type=int, help='The number of CPUs to use.', default=os.cpu_count()-1)
     parser.add_argument('--folder', type=str, required=True, help='The folder containing the models.')
+    parser.add_argument('--evaluation_cache', type=str, help='An SQLite file to cache the model evaluations in across runs.', default=None)
+    parser.add_argument('--seed', type=int, help='The seed for the games, so the same games are played on every run.', default=None)
     
     args = parser.parse_args()
     
     print(args)
+    if args.seed is not None:
+        random.seed(args.seed)
     
     num_games = args.num_games
     num_cpus = args.num_cpus
@@ -75,7 +84,7 @@ if __name__ == "__main__":
         total_games = 0
         with multiprocessing.Pool(num_cpus) as p:
             #results = p.map(run_game, [(i, model_path, random.randint(0,2**32)) for i in range(num_games)])
-            res_gen = p.imap_unordered(run_game, [(i, model_path, random.randint(0,2**32)) for i in range(num_games)])
+            res_gen = p.imap_unordered(run_game, [(i, model_path, args.evaluation_cache, random.randint(0,2**32)) for i in range(num_games)])
             while True:
                 try:
                     result = next(res_gen)
@@ -0,0 +1,50 @@
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from MoskaGame import MoskaGame
+from MoskaPlayer import MoskaPlayer
+
+""" Play the same game with different decimation strategies, and compare
+the number of written rows and the time to write them. Also check the manifest
+describes the written rows.
+"""
+
+def play_game(decimation, decimation_args, file_path, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = MoskaGame(timeout=1000, decimation=decimation, decimation_args=decimation_args)
+    players = [MoskaPlayer(name=f"Player{i}") for i in range(4)]
+    result = game.play_game(players)
+    start = time.perf_counter()
+    result.save_game_states_to_file(file_path)
+    save_time = time.perf_counter() - start
+    return result, save_time
+
+if __name__ == "__main__":
+    strategies = [("none", {}),
+                  ("kth", {"k" : 4}),
+                  ("random", {"max_states" : 50, "seed" : 0}),
+                  ("dedup", {}),
+                  (["dedup", "random"], {"max_states" : 50, "seed" : 0}),
+                  ]
+    with tempfile.TemporaryDirectory() as folder:
+        for decimation, decimation_args in strategies:
+            name = "_".join([decimation] if isinstance(decimation, str) else decimation)
+            file_path = os.path.join(folder, f"{name}.csv")
+            result, save_time = play_game(decimation, decimation_args, file_path)
+            data = np.loadtxt(file_path, delimiter=",")
+            print(f"{name}: {data.shape[0]} rows of {result.game_states.total_num_states} states, save time {save_time*1000:.1f} ms")
+            manifest_path = file_path[:-len(".csv")] + result.MANIFEST_SUFFIX
+            if decimation == "none":
+                assert not os.path.exists(manifest_path), "A manifest was written without decimation."
+                continue
+            with open(manifest_path, "r") as f:
+                manifest = json.loads(f.readline())
+            assert manifest["num_rows"] == data.shape[0], "The manifest does not match the written rows."
+            assert len(manifest["chosen_state_indices"]) * 4 == data.shape[0], "Each chosen state should be written from every perspective."
+    print("The manifests match the written data.")
@@ -0,0 +1,47 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from RLFramework.deduplicate import deduplicate_files
+from RLFramework.read_to_dataset import read_to_dataset
+from MoskaGame import MoskaGame
+from MoskaPlayer import MoskaPlayer
+
+""" Simulate some games, deduplicate the written states, and check that
+the deduplicated data has the same total weight and the same weighted label sum as the original data.
+"""
+
+def write_games(folder, num_games, num_files = 2):
+    for i in range(num_games):
+        random.seed(i)
+        np.random.seed(i)
+        game = MoskaGame(timeout=1000)
+        players = [MoskaPlayer(name=f"Player{j}") for j in range(4)]
+        result = game.play_game(players)
+        result.save_game_states_to_file(os.path.join(folder, f"data_{i % num_files}.csv"))
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as folder:
+        data_folder = os.path.join(folder, "data")
+        os.makedirs(data_folder)
+        write_games(data_folder, 5)
+        original = np.vstack([np.loadtxt(os.path.join(data_folder, f), delimiter=",") for f in os.listdir(data_folder)])
+
+        start = time.perf_counter()
+        num_rows, num_unique = deduplicate_files(data_folder, os.path.join(folder, "dedup"), num_partitions=8)
+        print(f"Deduplicated {num_rows} rows to {num_unique} rows in {time.perf_counter() - start:.2f} s")
+
+        dedup_folder = os.path.join(folder, "dedup")
+        dedup = np.vstack([np.loadtxt(os.path.join(dedup_folder, f), delimiter=",") for f in os.listdir(dedup_folder)])
+        assert num_rows == original.shape[0] and num_unique == dedup.shape[0]
+        assert len(np.unique(dedup[:, :-2], axis=0)) == dedup.shape[0], "The deduplicated data contains duplicates."
+        assert dedup[:, -1].sum() == original.shape[0], "The total weight differs from the number of original rows."
+        assert np.isclose(np.sum(dedup[:, -2] * dedup[:, -1]), original[:, -1].sum(), atol=1e-3 * num_rows), "The weighted labels differ from the original labels."
+
+        ds, num_files, _ = read_to_dataset(dedup_folder, sample_weights=True)
+        x, y, w = next(iter(ds))
+        assert x.shape[0] == original.shape[1] - 1, "The dataset has a wrong number of features."
+    print("The deduplicated data matches the original data.")
@@ -0,0 +1,50 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from RLFramework.EvaluationCache import get_evaluation_cache
+from RLFramework.utils import convert_model_to_tflite
+from MoskaGame import MoskaGame
+from MoskaNNPlayer import MoskaNNPlayer
+
+""" Play games with MoskaNNPlayers with and without the evaluation cache,
+check that the players make the same moves, and report the cache hit rate and the time per game.
+The model is a small random model, since only the speed and correctness of the cache are measured.
+"""
+
+def make_model(folder, input_size):
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(input_size,)),
+        tf.keras.layers.Dense(64, activation="relu"),
+        tf.keras.layers.Dense(1, activation="sigmoid"),
+    ])
+    model_path = os.path.join(folder, "model.keras")
+    model.save(model_path)
+    return convert_model_to_tflite(model_path)
+
+def play_game(model_path, evaluation_cache_size, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = MoskaGame(timeout=1000, model_paths=[model_path])
+    players = [MoskaNNPlayer(name=f"Player{i}", model_path=model_path, evaluation_cache_size=evaluation_cache_size) for i in range(4)]
+    start = time.perf_counter()
+    result = game.play_game(players)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    input_size = len(MoskaGame(timeout=1000).play_game([MoskaNNPlayer.__bases__[0](name=f"Player{i}") for i in range(4)]).game_states[-1].to_vector())
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, input_size)
+        for seed in range(3):
+            uncached, uncached_time = play_game(model_path, 0, seed)
+            cached, cached_time = play_game(model_path, 2**16, seed)
+            assert uncached.previous_turns == cached.previous_turns, "The cached players played differently."
+            assert [gs.to_vector() for gs in uncached.game_states] == [gs.to_vector() for gs in cached.game_states], "The cached players played differently."
+            print(f"Game {seed}: {uncached_time:.2f} s without the cache, {cached_time:.2f} s with the cache")
+    print(f"Evaluation cache: {get_evaluation_cache().stats()}")
@@ -0,0 +1,94 @@
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from Card import REFERENCE_DECK
+from MoskaGame import MoskaGame
+from MoskaPlayer import MoskaPlayer
+from MoskaISMCTSPlayer import MoskaISMCTSPlayer
+from profile_evaluation_cache import make_model
+
+""" Check that MoskaISMCTSPlayer's determinizations are consistent with what the player sees,
+and that all the determinizations are searched in the same tree, and measure the simulations per second of its search under a per-move time limit,
+with batched leaf evaluation in one process, and with forked worker processes.
+The model is a small random model, since only the speed is measured.
+"""
+
+def make_position(num_random_moves, seed = 0):
+    """ Play random moves, and return the game.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    game = MoskaGame(timeout=1000)
+    game.initialize_game_wrap([MoskaPlayer(name=f"Player{i}") for i in range(4)])
+    game.previous_turns.append(game.current_pid)
+    for _ in range(num_random_moves):
+        actions = game.get_all_possible_actions()
+        game.restore_state(game.successor_state(actions[np.random.randint(len(actions))]))
+    return game.fork()
+
+def check_determinizations(player, game, num_samples):
+    """ Check that the determinizations keep the player's view of the state, and the cards in the game.
+    """
+    state = game.fork(player)
+    for _ in range(num_samples):
+        sample = player.determinize(game)
+        assert sample.player_full_cards[player.pid] == state.player_full_cards[player.pid]
+        assert sample.player_public_cards == state.player_public_cards
+        assert all(card in full_cards for full_cards, public_cards in zip(sample.player_full_cards, sample.player_public_cards)
+                   for card in public_cards)
+        assert [len(cards) for cards in sample.player_full_cards] == [len(cards) for cards in state.player_full_cards]
+        assert len(sample.deck) == len(state.deck) and sample.deck[-1:] == state.deck[-1:]
+        all_cards = sample.deck + sample.cards_to_kill + sample.killed_cards + sample.discarded_cards
+        all_cards += [card for cards in sample.player_full_cards for card in cards]
+        assert sorted(map(repr, all_cards)) == sorted(map(repr, REFERENCE_DECK)), "The determinization lost or duplicated cards."
+        assert game.fork(player).state_json == state.state_json, "The determinization modified the game."
+
+def check_tree(player, game, num_simulations):
+    """ Check that the simulations share one tree: the player's own actions are legal in every determinization,
+    so each root edge is available in every simulation, and each simulation after the first visits one root edge.
+    """
+    state = game.fork(player)
+    keys = {player.action_key(action) for action in game.get_all_possible_actions()}
+    root_stats, done = player.worker_search(game, state, num_simulations, None)
+    game.restore_state(state)
+    assert done == num_simulations and set(root_stats) == keys, "The root's edges differ from the player's actions."
+    assert sum(visits for visits, _ in root_stats.values()) == len(keys) + num_simulations - 1, "The root's visits differ from the simulations."
+
+def search_speed(state, model_path, leaf_batch_size, num_workers, time_limit):
+    """ Search from the state for time_limit seconds, and return the simulations per second.
+    """
+    game = MoskaGame(timeout=1000, model_paths=[model_path])
+    player = MoskaISMCTSPlayer(name="Player0", model_path=model_path, num_simulations=None, time_limit=time_limit,
+                               leaf_batch_size=leaf_batch_size, num_workers=num_workers)
+    game.initialize_game_wrap([player] + [MoskaPlayer(name=f"Player{i}") for i in range(1, 4)])
+    game.restore_state(state)
+    player.pid = 0
+    if leaf_batch_size == 1 and num_workers == 1:
+        check_determinizations(player, game, 20)
+        check_tree(player, game, 64)
+    start = time.perf_counter()
+    player.choose_move(game)
+    elapsed = time.perf_counter() - start
+    return player.mcts_stats["num_simulations"] / elapsed, player.mcts_stats
+
+if __name__ == "__main__":
+    state = make_position(6)
+    # Search as Player0
+    state.current_pid = 0
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, len(state.to_vector(0)))
+        for leaf_batch_size, num_workers in [(1, 1), (4, 1), (1, 2), (1, 4)]:
+            speed, stats = search_speed(state, model_path, leaf_batch_size, num_workers, time_limit=5)
+            print(f"Leaf batch size {leaf_batch_size}, {num_workers} worker processes: {speed:.1f} simulations/s, "
+                  f"{stats['num_evaluated_states'] / max(stats['num_batches'], 1):.1f} states per inference batch")
+        random.seed(0)
+        np.random.seed(0)
+        game = MoskaGame(timeout=1000, model_paths=[model_path])
+        players = [MoskaISMCTSPlayer(name="Player0", model_path=model_path, num_simulations=32)]
+        players += [MoskaPlayer(name=f"Player{i}") for i in range(1, 4)]
+        start = time.perf_counter()
+        result = game.play_game(players)
+        print(f"Game with a MoskaISMCTSPlayer finished in {time.perf_counter() - start:.1f} s: {result.player_jsons[0]['mcts']}")
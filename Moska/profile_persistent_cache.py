@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from RLFramework.EvaluationCache import get_evaluation_cache
+from MoskaGame import MoskaGame
+from benchmark_all import players_constructor
+from profile_evaluation_cache import make_model
+
+""" Run the same benchmark games twice in a process pool with a persistent evaluation cache.
+The second run should get its evaluations from the cache, and the games should be the same.
+Then change the model file, and check that the cached evaluations are not used.
+"""
+
+def run_game(args):
+    """ Like benchmark_all.run_game, but without the timeout, so the games are the same on every run.
+    """
+    i, model_path, evaluation_cache_path, seed = args
+    random.seed(seed)
+    np.random.seed(seed)
+    game = MoskaGame(timeout=1000, model_paths=[model_path])
+    result = game.play_game(players_constructor(i, model_path, evaluation_cache_path))
+    get_evaluation_cache(path=evaluation_cache_path).flush()
+    return result
+
+def run_games(model_path, cache_path, num_games = 8, num_cpus = 4):
+    start = time.perf_counter()
+    with multiprocessing.Pool(num_cpus) as p:
+        results = p.map(run_game, [(i, model_path, cache_path, i) for i in range(num_games)])
+    elapsed = time.perf_counter() - start
+    stats = [[pl["evaluation_cache"] for pl in result.player_jsons if "evaluation_cache" in pl][0] for result in results]
+    return results, stats, elapsed
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, 431)
+        cache_path = os.path.join(folder, "evaluations.sqlite")
+        first_results, first_stats, first_time = run_games(model_path, cache_path)
+        second_results, second_stats, second_time = run_games(model_path, cache_path)
+        print(f"First run: {first_time:.2f} s, persistent hits {sum(s['persistent_hits'] for s in first_stats)}")
+        print(f"Second run: {second_time:.2f} s, persistent hits {sum(s['persistent_hits'] for s in second_stats)}")
+        assert [r.previous_turns for r in first_results] == [r.previous_turns for r in second_results], "The cached games were different."
+        assert sum(s["persistent_hits"] for s in second_stats) > 0, "The second run did not use the persistent cache."
+
+        # Change the model, so the cached evaluations should not be used
+        model_path = make_model(folder, 431)
+        cache = get_evaluation_cache(path=cache_path)
+        model_hash = cache.model_hash(model_path)
+        num_rows = cache.connection.execute("SELECT COUNT(*) FROM evaluations WHERE model_hash = ?", (model_hash,)).fetchone()[0]
+        assert num_rows == 0, "The changed model has cached evaluations."
+    print("The persistent cache was used on the second run, and not after the model changed.")
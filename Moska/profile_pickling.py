@@ -0,0 +1,48 @@
+import pickle
+import random
+import time
+
+import numpy as np
+
+from MoskaGame import MoskaGame
+from MoskaPlayer import MoskaPlayer
+
+""" Compare the size and speed of pickling a MoskaResult with the packed game states,
+to pickling the game states as plain objects (how they were pickled before).
+Also check that the game states are restored exactly.
+"""
+
+def time_pickle(obj, n_repeats = 10):
+    """ Return the pickled bytes, and the average time to dump and load them.
+    """
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        dumped = pickle.dumps(obj)
+    dump_time = (time.perf_counter() - start) / n_repeats
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        pickle.loads(dumped)
+    load_time = (time.perf_counter() - start) / n_repeats
+    return dumped, dump_time, load_time
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    game = MoskaGame(timeout=1000)
+    players = [MoskaPlayer(name=f"Player{i}") for i in range(4)]
+    result = game.play_game(players)
+    print(f"Played a game with {len(result.game_states)} game states")
+
+    # Pickling the object dicts corresponds to the default pickling of the states.
+    unpacked_states = [gs.__dict__ for gs in result.game_states]
+    unpacked_bytes, unpacked_dump_t, unpacked_load_t = time_pickle(unpacked_states)
+    packed_bytes, packed_dump_t, packed_load_t = time_pickle(result)
+    print(f"Plain states: {len(unpacked_bytes)} bytes, dump {unpacked_dump_t*1000:.2f} ms, load {unpacked_load_t*1000:.2f} ms")
+    print(f"Packed result: {len(packed_bytes)} bytes, dump {packed_dump_t*1000:.2f} ms, load {packed_load_t*1000:.2f} ms")
+
+    restored = pickle.loads(packed_bytes)
+    assert len(restored.game_states) == len(result.game_states)
+    for gs, restored_gs in zip(result.game_states, restored.game_states):
+        assert gs.state_json == restored_gs.state_json, "The game state was not restored correctly."
+        assert gs.to_vector() == restored_gs.to_vector(), "The restored game state has a different vector."
+    print("All game states were restored correctly.")
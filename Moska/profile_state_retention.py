@@ -0,0 +1,41 @@
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from MoskaGame import MoskaGame
+from MoskaPlayer import MoskaPlayer
+
+""" Play the same game with each state retention policy, and compare
+the peak memory usage of the game, the time to write the data, and the written data.
+"""
+
+def play_game(state_retention, state_retention_args, file_path, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    game = MoskaGame(timeout=1000, state_retention=state_retention, state_retention_args=state_retention_args)
+    players = [MoskaPlayer(name=f"Player{i}") for i in range(4)]
+    tracemalloc.start()
+    result = game.play_game(players)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    result.save_game_states_to_file(file_path)
+    save_time = time.perf_counter() - start
+    return result, peak_memory, save_time
+
+if __name__ == "__main__":
+    policies = [("full", {}), ("vectors", {}), ("kth", {"k" : 4}), ("spill", {})]
+    with tempfile.TemporaryDirectory() as folder:
+        data = {}
+        for policy, policy_args in policies:
+            file_path = os.path.join(folder, f"{policy}.csv")
+            result, peak_memory, save_time = play_game(policy, policy_args, file_path)
+            data[policy] = np.loadtxt(file_path, delimiter=",")
+            print(f"{policy}: {result.game_states}, peak memory {peak_memory / 1e6:.2f} MB, save time {save_time*1000:.1f} ms, {data[policy].shape[0]} rows")
+    assert np.array_equal(data["full"], data["vectors"]), "The 'vectors' policy wrote different data than the 'full' policy."
+    assert np.array_equal(data["full"], data["spill"]), "The 'spill' policy wrote different data than the 'full' policy."
+    print("The 'vectors' and 'spill' policies wrote the same data as the 'full' policy.")
@@ -0,0 +1,37 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from MoskaGame import MoskaGame
+from MoskaNNPlayer import MoskaNNPlayer
+from profile_evaluation_cache import make_model
+
+""" Play games with MoskaNNPlayers with and without successor deduplication,
+check that the players make the same moves, and report how many inference rows the deduplication saves.
+The evaluation cache is disabled, so that every evaluated state is sent to the model.
+"""
+
+def play_game(model_path, deduplicate, seed = 0):
+    random.seed(seed)
+    np.random.seed(seed)
+    MoskaNNPlayer.deduplicate_successors = deduplicate
+    game = MoskaGame(timeout=1000, model_paths=[model_path])
+    players = [MoskaNNPlayer(name=f"Player{i}", model_path=model_path, evaluation_cache_size=0) for i in range(4)]
+    start = time.perf_counter()
+    result = game.play_game(players)
+    return result, time.perf_counter() - start
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as folder:
+        model_path = make_model(folder, 431)
+        for seed in range(3):
+            plain, plain_time = play_game(model_path, False, seed)
+            dedup, dedup_time = play_game(model_path, True, seed)
+            assert plain.previous_turns == dedup.previous_turns, "The players played differently with deduplication."
+            num_successors = sum(pl["num_successor_states"] for pl in dedup.player_jsons)
+            num_evaluated = sum(pl["num_evaluated_states"] for pl in dedup.player_jsons)
+            print(f"Game {seed}: evaluated {num_evaluated} of {num_successors} successor states "
+                  f"({1 - num_evaluated / num_successors:.1%} saved), {plain_time:.2f} s -> {dedup_time:.2f} s")
@@ -0,0 +1,91 @@
+import random
+import time
+
+import numpy as np
+
+from RLFramework.targets import build_perspective_value_targets, build_value_targets
+from MoskaGame import MoskaGame
+from MoskaPlayer import MoskaPlayer
+
+""" Compare the vectorized value targets to a reference implementation with Python loops,
+also on a trajectory where the players' states are interleaved (like in PentobiGTP.write_states_to_file),
+and time building the targets for a Moska game.
+"""
+
+def reference_targets(final_scores, scores, method, gamma, n, lam, values):
+    """ Compute the targets state by state, from the definitions.
+    """
+    T, P = scores.shape
+    S = np.vstack((scores, final_scores))
+    rewards = S[1:] - S[:-1]
+    def mc(t, p):
+        return sum(gamma ** k * rewards[t + k, p] for k in range(T - t))
+    def bootstrap(t, p):
+        return values[t, p] - scores[t, p]
+    targets = np.zeros((T, P))
+    for p in range(P):
+        lambda_return = 0.0
+        for t in reversed(range(T)):
+            if method == "mc":
+                G = mc(t, p)
+            elif method == "nstep":
+                if t + n < T and np.isfinite(values[t + n, p]):
+                    G = sum(gamma ** k * rewards[t + k, p] for k in range(n)) + gamma ** n * bootstrap(t + n, p)
+                else:
+                    G = mc(t, p)
+            else:
+                # G_t = r_t + gamma * ((1 - lam) * B_{t+1} + lam * G_{t+1}), B is the MC return where the value is missing
+                if t + 1 < T:
+                    next_bootstrap = bootstrap(t + 1, p) if np.isfinite(values[t + 1, p]) else mc(t + 1, p)
+                    G = rewards[t, p] + gamma * ((1 - lam) * next_bootstrap + lam * lambda_return)
+                else:
+                    G = rewards[t, p]
+                lambda_return = G
+            targets[t, p] = scores[t, p] + G
+    return targets
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    T, P = 60, 4
+    scores = np.cumsum(rng.integers(0, 3, size=(T, P)), axis=0).astype(float)
+    final_scores = scores[-1] + 10
+    values = scores + rng.normal(5, 2, size=(T, P))
+    values[rng.random((T, P)) < 0.3] = np.nan
+    for method, args in [("mc", {"gamma" : 0.97}), ("nstep", {"gamma" : 0.95, "n" : 5}), ("td_lambda", {"gamma" : 0.95, "lam" : 0.8})]:
+        args = {"gamma" : 1.0, "n" : 1, "lam" : 0.9, **args}
+        vectorized = build_value_targets(final_scores, scores, method=method, values=values, **args)
+        reference = reference_targets(final_scores, scores, method, args["gamma"], args["n"], args["lam"], values)
+        assert np.allclose(vectorized, reference), f"The '{method}' targets differ from the reference."
+    print("The vectorized targets match the reference targets.")
+
+    # An interleaved trajectory, where each state is from the perspective of the player in turn, and has only that player's value
+    pids = np.arange(T) % P
+    state_values = rng.normal(final_scores[pids] - 5, 2)
+    state_values[rng.random(T) < 0.2] = np.nan
+    mc_targets = build_perspective_value_targets(final_scores, pids, state_values, method="mc")
+    assert np.allclose(mc_targets, final_scores[pids])
+    for method, args in [("nstep", {"gamma" : 0.95, "n" : 3}), ("td_lambda", {"gamma" : 0.95, "lam" : 0.8})]:
+        args = {"gamma" : 1.0, "n" : 1, "lam" : 0.9, **args}
+        targets = build_perspective_value_targets(final_scores, pids, state_values, method=method, **args)
+        assert not np.allclose(targets, mc_targets), f"The interleaved '{method}' targets fall back to the MC targets."
+        for pid in range(P):
+            rows = np.flatnonzero(pids == pid)
+            reference = reference_targets(final_scores[pid:pid+1], np.zeros((len(rows), 1)), method, args["gamma"], args["n"], args["lam"],
+                                          state_values[rows, np.newaxis])
+            assert np.allclose(targets[rows], reference[:, 0]), f"The interleaved '{method}' targets differ from the reference."
+    print("The interleaved targets bootstrap from the same player's states, and differ from the MC targets.")
+
+    random.seed(0)
+    np.random.seed(0)
+    result = MoskaGame(timeout=1000).play_game([MoskaPlayer(name=f"Player{i}") for i in range(4)])
+    scores = result.game_states.get_scores()
+    final_scores = result.modify_final_scores(list(result.game_states[-1].player_scores))
+    start = time.perf_counter()
+    targets = build_value_targets(final_scores, scores, method="td_lambda", gamma=0.99, lam=0.9, values=np.full(scores.shape, np.nan))
+    print(f"Built td_lambda targets for {scores.shape[0]} states in {(time.perf_counter() - start)*1000:.2f} ms")
+    start = time.perf_counter()
+    reference = reference_targets(np.array(final_scores, dtype=float), scores, "td_lambda", 0.99, 1, 0.9, np.full(scores.shape, np.nan))
+    print(f"Reference implementation took {(time.perf_counter() - start)*1000:.2f} ms")
+    assert np.allclose(targets, reference)
+    # The default (MC, gamma=1) targets are the final scores
+    assert np.allclose(result.build_targets(final_scores), np.array(final_scores)[None, :])
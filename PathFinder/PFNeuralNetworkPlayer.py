@@ -6,6 +6,8 @@ from PFGameState import PFGameState
 class PFNeuralNetworkPlayer(PFPlayer):
     """ A player that uses a neural network to select the next move.
     """
+    evaluations_are_values = True
+    
     def __init__(self,name : str = "PlayerNeuralNet", model_path : str = "", move_selection_temp = 0, logger_args : dict = None):
         super().__init__(name, logger_args)
         assert model_path, "A model path must be given."
@@ -0,0 +1,97 @@
+from abc import ABC, abstractmethod
+import math
+from typing import Any, Callable, Dict, List, TYPE_CHECKING, Union
+
+import numpy as np
+if TYPE_CHECKING:
+    from .GameState import GameState
+    from .Game import Game
+
+class CascadePlayer(ABC):
+    """ A mixin for players with an expensive evaluate_states (for example a neural network),
+    that first scores the successor states with a cheap evaluator (cheap_evaluate_states),
+    and then only evaluates the best successors with evaluate_states. The pruned successors are evaluated as -inf.
+
+    Use it as the first base class before a Player, e.g. class BlokusCascadeNNPlayer(CascadePlayer, BlokusNNPlayer),
+    and call configure_cascade in the subclass' __init__ (otherwise the defaults are used).
+
+    The telemetry (cascade_stats) tells how many successors were pruned, and how often the selected action
+    is the same as with evaluating all the successors (checked with probability agreement_check_prob).
+    """
+    # The defaults, if configure_cascade is not called
+    cascade_top_k : Union[int, Callable[['Game'], int]] = 16
+    cascade_top_fraction : float = None
+    agreement_check_prob : float = 0.0
+
+    def configure_cascade(self,
+                          top_k : Union[int, Callable[['Game'], int]] = 16,
+                          top_fraction : float = None,
+                          agreement_check_prob : float = 0.0,
+                          ) -> None:
+        """ Configure how many successors are evaluated with evaluate_states:
+        - top_k: The number of best successors (according to cheap_evaluate_states), or a function of the game,
+        so that k can depend on the phase of the game. None means no limit.
+        - top_fraction: The fraction of the best successors. If both are given, the smaller number is used.
+        - agreement_check_prob: The probability of also evaluating all the successors,
+        to check whether the best action is the same.
+        """
+        assert top_fraction is None or 0 < top_fraction <= 1, f"top_fraction must be in (0, 1], not {top_fraction}"
+        self.cascade_top_k = top_k
+        self.cascade_top_fraction = top_fraction
+        self.agreement_check_prob = agreement_check_prob
+
+    @property
+    def cascade_stats(self) -> Dict[str, Any]:
+        if "_cascade_stats" not in self.__dict__:
+            self._cascade_stats = {"num_successor_states" : 0,
+                                   "num_expensive_states" : 0,
+                                   "num_agreement_checks" : 0,
+                                   "num_agreements" : 0}
+        return self._cascade_stats
+
+    @abstractmethod
+    def cheap_evaluate_states(self, states : List['GameState']) -> List[float]:
+        """ Evaluate the states with a cheap evaluator (for example a heuristic), to select
+        which states are evaluated with evaluate_states.
+        """
+        pass
+
+    def get_num_kept_states(self, num_states : int) -> int:
+        """ Return how many of the successors are evaluated with evaluate_states.
+        """
+        num_kept = num_states
+        top_k = self.cascade_top_k(self.game) if callable(self.cascade_top_k) else self.cascade_top_k
+        if top_k is not None:
+            num_kept = min(num_kept, top_k)
+        if self.cascade_top_fraction is not None:
+            num_kept = min(num_kept, math.ceil(self.cascade_top_fraction * num_states))
+        return max(num_kept, 1)
+
+    def evaluate_next_states(self, next_states : List['GameState']) -> List[float]:
+        """ Evaluate the best successors (according to cheap_evaluate_states) with evaluate_states,
+        and give the rest an evaluation of -inf.
+        """
+        num_states = len(next_states)
+        num_kept = self.get_num_kept_states(num_states)
+        self.cascade_stats["num_successor_states"] += num_states
+        self.cascade_stats["num_expensive_states"] += num_kept
+        if num_kept >= num_states:
+            return super().evaluate_next_states(next_states)
+        cheap_evaluations = np.asarray(self.cheap_evaluate_states(next_states), dtype=np.float64).reshape(num_states)
+        kept = np.argpartition(-cheap_evaluations, num_kept - 1)[:num_kept]
+        kept_evaluations = super().evaluate_next_states([next_states[i] for i in kept])
+        evaluations = np.full(num_states, -np.inf)
+        evaluations[kept] = np.asarray(kept_evaluations, dtype=np.float64).reshape(num_kept)
+        if self.agreement_check_prob > 0 and self.rng.random() < self.agreement_check_prob:
+            full_evaluations = np.asarray(super().evaluate_next_states(next_states), dtype=np.float64).reshape(num_states)
+            self.cascade_stats["num_agreement_checks"] += 1
+            self.cascade_stats["num_agreements"] += int(np.argmax(full_evaluations) == np.argmax(evaluations))
+        return list(evaluations)
+
+    def as_json(self) -> dict:
+        js = super().as_json()
+        stats = dict(self.cascade_stats)
+        stats["pruning_ratio"] = round(1 - stats["num_expensive_states"] / max(stats["num_successor_states"], 1), 4)
+        stats["agreement_rate"] = round(stats["num_agreements"] / stats["num_agreement_checks"], 4) if stats["num_agreement_checks"] else None
+        js["cascade"] = stats
+        return js
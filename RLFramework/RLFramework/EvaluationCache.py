@@ -0,0 +1,226 @@
+import atexit
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+from typing import Any, Callable, Dict, Hashable, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+if TYPE_CHECKING:
+    from .GameState import GameState
+    from .utils import TFLiteModel
+
+class EvaluationCache:
+    """ A bounded LRU cache of model evaluations.
+    The keys are (model id, state fingerprint), where the fingerprint identifies the state
+    from the perspective of the evaluating player (see GameState.fingerprint).
+
+    The cache is per process, so the workers of a simulation do not share caches (see get_evaluation_cache).
+    """
+    def __init__(self, max_size : int = 2**16):
+        assert max_size > 0, f"max_size must be positive, not {max_size}"
+        self.max_size = max_size
+        self._cache : OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key : Hashable) -> Any:
+        """ Return the cached value, or None if the key is not in the cache.
+        """
+        try:
+            value = self._cache[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key : Hashable, value : Any) -> None:
+        """ Add a value to the cache, and remove the least recently used value if the cache is full.
+        """
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def predict(self, model : 'TFLiteModel', model_id : str, states : List['GameState'], perspective_pid : int) -> List[Any]:
+        """ Evaluate the states with the model from the perspective, and only send the states
+        that are not in the cache to the model.
+        """
+        fingerprints = [state.fingerprint(perspective_pid) for state in states]
+        get_vectors = lambda indices : np.array([states[i].to_vector(perspective_pid) for i in indices], dtype=np.float32)
+        return self._predict(model, model_id, fingerprints, get_vectors)
+
+    def predict_vectors(self, model : 'TFLiteModel', model_id : str, fingerprints : List[bytes], X : np.ndarray) -> List[Any]:
+        """ Evaluate the already encoded states (the rows of X), whose fingerprints are given,
+        and only send the rows that are not in the cache to the model.
+        """
+        return self._predict(model, model_id, fingerprints, lambda indices : X[indices])
+
+    def _predict(self, model : 'TFLiteModel', model_id : str, fingerprints : List[bytes],
+                 get_vectors : Callable[[List[int]], np.ndarray]) -> List[Any]:
+        """ Evaluate the states with the fingerprints. get_vectors returns the model inputs of the states with the given indices.
+        """
+        keys = [(model_id, fingerprint) for fingerprint in fingerprints]
+        evaluations = [self.get(key) for key in keys]
+        misses = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+        if misses:
+            X = get_vectors(misses)
+            for i, evaluation in zip(misses, model.predict(X)):
+                evaluations[i] = evaluation
+                self.put(keys[i], evaluation)
+        return evaluations
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size" : len(self._cache), "hits" : self.hits, "misses" : self.misses, "hit_rate" : round(self.hit_rate, 4)}
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def __repr__(self) -> str:
+        return f"EvaluationCache({self.stats()})"
+
+
+class PersistentEvaluationCache(EvaluationCache):
+    """ An evaluation cache, that is backed by an SQLite database, so the evaluations are shared across games and runs.
+    The in-memory LRU cache is checked first, then the database, and only then the model is used.
+
+    The database is keyed by (the sha1 of the model file's content, state fingerprint), so the cached evaluations
+    are automatically not used, if the model file changes.
+    Many processes can read and write the same database: The database is in WAL mode, and
+    the new evaluations are written in batches with INSERT OR IGNORE.
+    """
+    # The maximum number of parameters in an SQLite query
+    _MAX_QUERY_PARAMS = 500
+
+    def __init__(self, path : str, max_size : int = 2**16, flush_every : int = 1024):
+        super().__init__(max_size=max_size)
+        self.path = os.path.abspath(path)
+        self.flush_every = flush_every
+        self.persistent_hits = 0
+        self._pending : List[Tuple[str, bytes, bytes]] = []
+        # model path -> (mtime, size, sha1)
+        self._model_hashes : Dict[str, Tuple[float, int, str]] = {}
+        self._connection : sqlite3.Connection = None
+        self._connection_pid : int = None
+        atexit.register(self.flush)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """ The connection to the database. A connection can not be shared between processes,
+        so a new connection is opened if the process has changed (for example in a multiprocessing worker).
+        """
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._pending = []
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection_pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS evaluations ("
+                                     "model_hash TEXT NOT NULL, "
+                                     "fingerprint BLOB NOT NULL, "
+                                     "value BLOB NOT NULL, "
+                                     "PRIMARY KEY (model_hash, fingerprint)) WITHOUT ROWID")
+            self._connection.commit()
+        return self._connection
+
+    def model_hash(self, model_path : str) -> str:
+        """ Return the sha1 of the content of the model file.
+        The hash is only recomputed if the file's modification time or size changes.
+        """
+        stat = os.stat(model_path)
+        cached = self._model_hashes.get(model_path)
+        if cached is None or cached[:2] != (stat.st_mtime, stat.st_size):
+            with open(model_path, "rb") as f:
+                cached = (stat.st_mtime, stat.st_size, hashlib.sha1(f.read()).hexdigest())
+            self._model_hashes[model_path] = cached
+        return cached[2]
+
+    def _read(self, model_hash : str, fingerprints : List[bytes]) -> Dict[bytes, np.ndarray]:
+        """ Read the evaluations of the fingerprints from the database.
+        """
+        found = {}
+        for start in range(0, len(fingerprints), self._MAX_QUERY_PARAMS):
+            chunk = fingerprints[start:start + self._MAX_QUERY_PARAMS]
+            rows = self.connection.execute("SELECT fingerprint, value FROM evaluations WHERE model_hash = ? "
+                                           f"AND fingerprint IN ({','.join('?' * len(chunk))})", [model_hash, *chunk])
+            for fingerprint, value in rows:
+                found[fingerprint] = np.frombuffer(value, dtype=np.float32).copy()
+        return found
+
+    def flush(self) -> None:
+        """ Write the new evaluations to the database.
+        """
+        if not self._pending or self._connection_pid != os.getpid():
+            return
+        self.connection.executemany("INSERT OR IGNORE INTO evaluations (model_hash, fingerprint, value) VALUES (?, ?, ?)", self._pending)
+        self.connection.commit()
+        self._pending = []
+
+    def _predict(self, model : 'TFLiteModel', model_id : str, fingerprints : List[bytes],
+                 get_vectors : Callable[[List[int]], np.ndarray]) -> List[Any]:
+        """ Evaluate the states with the fingerprints. The model_id must be the path to the model file.
+        """
+        model_hash = self.model_hash(model_id)
+        keys = [(model_hash, fingerprint) for fingerprint in fingerprints]
+        evaluations = [self.get(key) for key in keys]
+        misses = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+        if misses:
+            found = self._read(model_hash, list({fingerprints[i] for i in misses}))
+            for i in misses:
+                if fingerprints[i] in found:
+                    evaluations[i] = found[fingerprints[i]]
+                    self.put(keys[i], evaluations[i])
+                    self.persistent_hits += 1
+            misses = [i for i in misses if evaluations[i] is None]
+        if misses:
+            X = get_vectors(misses)
+            for i, evaluation in zip(misses, model.predict(X)):
+                evaluations[i] = evaluation
+                self.put(keys[i], evaluation)
+                self._pending.append((model_hash, fingerprints[i], np.asarray(evaluation, dtype=np.float32).tobytes()))
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+        return evaluations
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "persistent_hits" : self.persistent_hits}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ The connection can not be pickled, so a new connection is opened after unpickling.
+        """
+        self.flush()
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_connection_pid"] = None
+        state["_pending"] = []
+        return state
+
+
+# The caches of this process
+_EVALUATION_CACHES : Dict[str, EvaluationCache] = {}
+
+def get_evaluation_cache(name : str = "default", max_size : int = 2**16, path : str = None) -> EvaluationCache:
+    """ Return the evaluation cache with the given name in this process, and create it if it does not exist.
+    All the players in a process that use the same name share the cache.
+    If path is given, the cache is a PersistentEvaluationCache, that is stored in the SQLite database at path.
+    """
+    if path is not None:
+        name = f"{name}:{os.path.abspath(path)}"
+    if name not in _EVALUATION_CACHES:
+        if path is not None:
+            _EVALUATION_CACHES[name] = PersistentEvaluationCache(path, max_size=max_size)
+        else:
+            _EVALUATION_CACHES[name] = EvaluationCache(max_size=max_size)
+    return _EVALUATION_CACHES[name]
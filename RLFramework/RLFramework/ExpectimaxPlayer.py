@@ -0,0 +1,207 @@
+from abc import ABC
+import time
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+if TYPE_CHECKING:
+    from .Action import Action
+    from .GameState import GameState
+    from .Game import Game
+
+class _StateNode:
+    """ A state in the search tree, and the actions that were expanded from it.
+    """
+    __slots__ = ("state", "evaluation", "mover", "action_nodes")
+
+    def __init__(self, state : 'GameState'):
+        self.state = state
+        self.evaluation : float = None
+        self.mover : int = None
+        self.action_nodes : List['_ActionNode'] = None
+
+class _ActionNode:
+    """ An action, and the sampled outcomes of the environment's reaction to it (a chance node).
+    """
+    __slots__ = ("action", "outcomes")
+
+    def __init__(self, action : 'Action', outcomes : List[Tuple[_StateNode, float]]):
+        self.action = action
+        self.outcomes = outcomes
+
+
+class ExpectimaxPlayer(ABC):
+    """ A mixin for players, that select moves with a depth-limited expectimax search.
+    The environment's reaction to an action (Game.environment_action, e.g. dealing cards or selecting the next player)
+    is a chance node: The outcomes are sampled num_samples times, and identical outcomes (by fingerprint) are merged,
+    so the weights of the outcomes are their sampled frequencies. For small outcome spaces, this enumerates the outcomes.
+
+    The tree is expanded one ply at a time, and all the new states of a ply are evaluated with one
+    evaluate_next_states call (i.e. with the player's evaluate_states, from the player's perspective).
+    The player maximizes its value, and the other players are modelled by opponent_model:
+    "min" (they minimize the player's value) or "mean" (they select a random action).
+    At each ply, only the beam_width best actions (for the player in turn) of each state are expanded further.
+    At the root, the actions that are not in the beam are evaluated as -inf.
+
+    Use it as the first base class before a Player, e.g. class MoskaExpectimaxPlayer(ExpectimaxPlayer, MoskaNNPlayer),
+    and call configure_expectimax in the subclass' __init__ (otherwise the defaults are used).
+    depth, beam_width and num_samples trade accuracy for latency: the number of evaluated states
+    grows roughly as (beam_width * num_samples) ** depth.
+    """
+    # The defaults, if configure_expectimax is not called
+    search_depth : int = 2
+    beam_width : int = 8
+    num_samples : int = 4
+    opponent_model : str = "min"
+
+    def configure_expectimax(self,
+                             depth : int = 2,
+                             beam_width : int = 8,
+                             num_samples : int = 4,
+                             opponent_model : str = "min",
+                             ) -> None:
+        """ Configure the search:
+        - depth: The number of plies (actions) to search. With depth 1, the search is the greedy one-ply search,
+        with the environment's reaction sampled.
+        - beam_width: The number of actions of each state that are expanded further. None means all the actions.
+        - num_samples: The number of samples of the environment's reaction to each action. Use 1 in deterministic games.
+        - opponent_model: "min" or "mean".
+        """
+        assert depth >= 1, f"depth must be atleast 1, not {depth}"
+        assert num_samples >= 1, f"num_samples must be atleast 1, not {num_samples}"
+        assert opponent_model in ["min", "mean"], f"opponent_model must be 'min' or 'mean', not {opponent_model}"
+        self.search_depth = depth
+        self.beam_width = beam_width
+        self.num_samples = num_samples
+        self.opponent_model = opponent_model
+
+    @property
+    def expectimax_stats(self) -> Dict[str, Any]:
+        if "_expectimax_stats" not in self.__dict__:
+            self._expectimax_stats = {"num_searches" : 0,
+                                      "num_expanded_states" : 0,
+                                      "num_leaf_batches" : 0,
+                                      "search_time" : 0.0}
+        return self._expectimax_stats
+
+    def sample_chance_outcome(self, game : 'Game') -> None:
+        """ Randomize the parts of the game, that the environment's reaction depends on, but that are not known
+        (for example the order of the deck), before sampling the successors. By default, nothing is randomized,
+        and the randomness of environment_action itself is sampled.
+        """
+        pass
+
+    def choose_move(self, game : 'Game') -> 'Action':
+        """ Search the tree from the current state, and select the move based on the values of the root's actions.
+        """
+        start = time.perf_counter()
+        root = _StateNode(game.fork(self))
+        level = [root]
+        for depth in range(self.search_depth):
+            level = self._expand_level(game, level, prune=depth < self.search_depth - 1)
+            if not level:
+                break
+        game.restore_state(root.state)
+        if not root.action_nodes:
+            return None
+        evaluations = np.full(len(root.action_nodes), -np.inf)
+        for i, action_node in enumerate(root.action_nodes):
+            if action_node.outcomes is not None:
+                evaluations[i] = self._action_value(action_node)
+        self.logger.debug(f"Moves and evaluations:\n{list(zip([a.action for a in root.action_nodes], evaluations))}")
+        selected_move_idx = self.select_action_strategy(list(evaluations))
+        self.last_evaluation = float(evaluations[selected_move_idx])
+        self.expectimax_stats["num_searches"] += 1
+        self.expectimax_stats["search_time"] += time.perf_counter() - start
+        return root.action_nodes[selected_move_idx].action
+
+    def _expand_level(self, game : 'Game', level : List[_StateNode], prune : bool = True) -> List[_StateNode]:
+        """ Expand the states of a ply: sample the successors of each action, and evaluate all the successors in one batch.
+        If prune is True, returns the states of the next ply, that are in the beam.
+        """
+        new_nodes : List[_StateNode] = []
+        expanded : List[_StateNode] = []
+        for node in level:
+            game.restore_state(node.state)
+            if game.check_is_terminal():
+                continue
+            actions = game.get_all_possible_actions()
+            # The state after generating the actions (which may modify the state)
+            node.state = game.fork(self)
+            node.mover = node.state.current_pid
+            node.action_nodes = [_ActionNode(action, None) for action in actions]
+            if not actions:
+                continue
+            # fingerprint -> (node, count) of each action
+            samples : List[Dict[bytes, List]] = [{} for _ in actions]
+            for _ in range(self.num_samples):
+                game.restore_state(node.state)
+                self.sample_chance_outcome(game)
+                for i, successor in enumerate(game.successor_states(actions, player=self)):
+                    fingerprint = successor.fingerprint(self.pid)
+                    if fingerprint in samples[i]:
+                        samples[i][fingerprint][1] += 1
+                    else:
+                        samples[i][fingerprint] = [_StateNode(successor), 1]
+            for action_node, action_samples in zip(node.action_nodes, samples):
+                action_node.outcomes = [(state_node, count / self.num_samples) for state_node, count in action_samples.values()]
+                new_nodes.extend(state_node for state_node, _ in action_node.outcomes)
+            expanded.append(node)
+        self.expectimax_stats["num_expanded_states"] += len(expanded)
+        if not new_nodes:
+            return []
+        evaluations = self.evaluate_next_states([state_node.state for state_node in new_nodes])
+        self.expectimax_stats["num_leaf_batches"] += 1
+        for state_node, evaluation in zip(new_nodes, evaluations):
+            state_node.evaluation = float(np.asarray(evaluation).reshape(-1)[0])
+        if not prune:
+            return []
+        # Prune: only the best actions of each expanded state are expanded further
+        next_level = []
+        for node in expanded:
+            for action_node in self._beam(node):
+                next_level.extend(state_node for state_node, _ in action_node.outcomes)
+        return next_level
+
+    def _beam(self, node : _StateNode) -> List[_ActionNode]:
+        """ Return the beam_width best actions of the state for the player in turn, and mark the others as pruned.
+        """
+        if self.beam_width is None or len(node.action_nodes) <= self.beam_width:
+            return node.action_nodes
+        values = np.array([self._action_value(action_node) for action_node in node.action_nodes])
+        if node.mover == self.pid:
+            order = np.argsort(-values, kind="stable")
+        elif self.opponent_model == "min":
+            order = np.argsort(values, kind="stable")
+        else:
+            order = self.rng.permutation(len(values))
+        kept = set(order[:self.beam_width].tolist())
+        for i, action_node in enumerate(node.action_nodes):
+            if i not in kept:
+                action_node.outcomes = None
+        return [node.action_nodes[i] for i in sorted(kept)]
+
+    def _action_value(self, action_node : _ActionNode) -> float:
+        """ The expected value of the action over its sampled outcomes.
+        """
+        return sum(weight * self._state_value(state_node) for state_node, weight in action_node.outcomes)
+
+    def _state_value(self, node : _StateNode) -> float:
+        """ The value of the state: its evaluation if it is a leaf, and otherwise the value of the player in turn's choice.
+        """
+        if not node.action_nodes:
+            return node.evaluation
+        values = [self._action_value(action_node) for action_node in node.action_nodes if action_node.outcomes is not None]
+        if not values:
+            return node.evaluation
+        if node.mover == self.pid:
+            return max(values)
+        if self.opponent_model == "min":
+            return min(values)
+        return float(np.mean(values))
+
+    def as_json(self) -> dict:
+        js = super().as_json()
+        stats = dict(self.expectimax_stats)
+        stats["search_time"] = round(stats["search_time"], 4)
+        js["expectimax"] = stats
+        return js
@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 from .utils import _NoneLogger, TFLiteModel, _get_logger
 from .GameState import GameState
 from .Result import Result
+from .GameStateStore import GameStateStore, make_game_state_store
 if TYPE_CHECKING:
     from .Action import Action
     from .Player import Player
@@ -21,14 +22,40 @@ class Game(ABC):
                  gather_data : str = "",
                  custom_result_class = None,
                  max_num_total_steps : int = 1000,
-                 timeout : int = 10
+                 timeout : int = 10,
+                 state_retention : str = "full",
+                 state_retention_args : Dict[str, Any] = None,
+                 decimation : str = "none",
+                 decimation_args : Dict[str, Any] = None,
+                 allocate_move_time : bool = False,
                 ):
         """ Initializes the Game instance.
         This is mainly used to set up the logger.
+
+        state_retention tells how the game states are kept during the game (see GameStateStore):
+        - "full": Keep every game state (default)
+        - "vectors": Only keep the game states as vectors (in an int8 buffer)
+        - "kth": Keep every k-th game state (state_retention_args={"k" : k})
+        - "spill": Pickle the game states to a temporary file
+
+        decimation and decimation_args are passed to the Result, and tell which of
+        the game states are written to the data file (see Result).
+
+        If allocate_move_time is True, each move gets an equal share of the remaining game time
+        (timeout - elapsed time, divided by estimate_remaining_turns), which is set to move_deadline before the player chooses a move.
+        Players evaluate the successors in order of priority until the deadline (see Player.choose_move),
+        so that the game finishes before the timeout.
         """
         self.result_class = custom_result_class if custom_result_class else Result
+        self.state_retention = state_retention
+        self.state_retention_args = state_retention_args if state_retention_args is not None else {}
+        self.decimation = decimation
+        self.decimation_args = decimation_args
         self.gather_data = gather_data
         self.timeout = timeout
+        self.allocate_move_time = allocate_move_time
+        # The time (time.perf_counter) by which the current player should select its move, or None if there is no deadline
+        self.move_deadline : float = None
         if render_mode == "human":
             self.init_render_human()
         self.max_num_total_steps = max_num_total_steps
@@ -36,7 +63,7 @@ class Game(ABC):
         self.game_state_class : GameState = game_state_class
         self.logger_args = logger_args
         self.logger = _get_logger(logger_args)
-        self.game_states : List[GameState] = []
+        self.game_states : GameStateStore = self.make_game_state_store()
         self.previous_turns : List[int] = []
         self.unfinished_players : List[int] = []
         self.finishing_order : List[int] = []
@@ -60,10 +87,17 @@ class Game(ABC):
         assert isinstance(self.result_class, type), f"result_class must be a class, not {type(self.result_class)}"
         assert issubclass(self.result_class, Result), f"result_class must be a subclass of Result, not {self.result_class}"
     
+    def make_game_state_store(self) -> GameStateStore:
+        """ Create an empty GameStateStore, according to the state retention policy.
+        """
+        return make_game_state_store(self.state_retention,
+                                     perspectives=self.result_class.state_perspectives,
+                                     **self.state_retention_args)
+    
     def reset(self) -> None:
         """ Reset the game to the initial state, with no player data.
         """
-        self.game_states = []
+        self.game_states = self.make_game_state_store()
         self.previous_turns = []
         self.unfinished_players = []
         self.finishing_order = []
@@ -183,7 +217,7 @@ class Game(ABC):
         self.initialize_game_wrap(players)
         
         self.render()
-        self.game_states.append(self.get_current_state().deepcopy())
+        self.game_states.append(self.get_current_state())
         # Play until all players are finished
         while not self.check_is_terminal() and self.total_num_played_turns < self.max_num_total_steps and elapsed_time_s() < self.timeout:
             # Select the next player to play
@@ -196,7 +230,11 @@ class Game(ABC):
                                                           "game state's 'check_is_game_equal' method.")
 
             # Choose an action with the player
+            player.last_evaluation = None
+            if self.allocate_move_time:
+                self.move_deadline = time.perf_counter() + max(self.timeout - elapsed_time_s(), 0) / max(self.estimate_remaining_turns(), 1)
             action = player.choose_move(self)
+            self.move_deadline = None
             if action is not None:
                 # First, we take the step, which modifies self.
                 # We then save this state (after action).
@@ -204,14 +242,16 @@ class Game(ABC):
                 new_state : 'GameState' = self.step(action)
                 new_state = self.get_current_state(player=player)
                 self.logger.debug(f"New state after action:\n{new_state}")
-                self.game_states.append(new_state.deepcopy())
+                # The evaluation of the chosen move is the model value of the new state
+                values = {player.pid : player.last_evaluation} if player.evaluations_are_values and player.last_evaluation is not None else None
+                self.game_states.append(new_state, values=values)
                 # After every action, the environment reacts.
                 # For example, we might add cards to players with missing cards, or change the current player.
                 s = self.environment_action(new_state)
                 # If the environment action returns something other than False, we set the new state to that.
                 if s is not False:
                     new_state = s
-                    self.game_states.append(new_state.deepcopy())
+                    self.game_states.append(new_state)
                     new_state.set_game_state(self)
                     #print(f"New state after environment action:\n{new_state}")
                     assert new_state.check_is_game_equal(self, player=player), ("The game state was not restored correctly. The created ",
@@ -224,6 +264,8 @@ class Game(ABC):
 
             self.logger.debug(f"Game state:\n{new_state}")
             self.render()
+        for player in players:
+            player.teardown(self)
         
         if self.total_num_played_turns >= self.max_num_total_steps:
             print(f"Game finished because the maximum number of steps was reached.")
@@ -233,6 +275,7 @@ class Game(ABC):
             print(f"Game finished because the timeout was reached.")
             self.logger.info(f"Game finished because the timeout was reached.")
             self.timedout = True
+        self.game_states.finalize()
         self.successful = self.check_is_terminal()
         # Winner is the player with the higher score
         winner = players[np.argmax(self.player_scores)].name
@@ -250,6 +293,8 @@ class Game(ABC):
                         game_states = self.game_states,
                         previous_turns = self.previous_turns,
                         winner=winner,
+                        decimation=self.decimation,
+                        decimation_args=self.decimation_args,
                         )
         s = "Game finished with results:"
         for k,v in result.as_json(states_as_num = True).items():
@@ -259,6 +304,13 @@ class Game(ABC):
             result.save_game_states_to_file(self.gather_data)
         return result
     
+    def estimate_remaining_turns(self) -> int:
+        """ Estimate the number of turns left in the game, including the current turn.
+        This is used to allocate the remaining time to the moves, if allocate_move_time is True.
+        By default, the estimate is the number of turns left until max_num_total_steps.
+        """
+        return self.max_num_total_steps - self.total_num_played_turns
+
     def calculate_reward(self, pid : int, new_state : 'GameState'):
         """ Calculate the reward for the player that made the move.
         """
@@ -351,7 +403,60 @@ class Game(ABC):
         if not real_move:
             assert curr_state.check_is_game_equal(self), "The game state was not restored correctly."
         return new_state
-    
+
+    def fork(self, player : 'Player' = None) -> GameState:
+        """ Return a copy of the current state of the game (from the perspective of player),
+        that the game can later be restored to with restore_state.
+        """
+        player = player if player else self.players[self.current_pid]
+        return self.game_state_class.from_game(self, player=player, copy = True)
+
+    def restore_state(self, game_state : 'GameState') -> None:
+        """ Restore the game, and the players' attributes, to a copy of game_state.
+        The game_state is copied, so modifying the game afterwards does not modify the game_state.
+        """
+        game_state = game_state.deepcopy()
+        self.restore_game(game_state)
+        game_state.set_game_state(self)
+        self.update_player_attributes()
+
+    def successor_states(self, actions : List['Action'], player : 'Player' = None) -> List[GameState]:
+        """ Return the states after the current player makes each of the actions, and the environment reacts to it.
+        The states are the same as the states in play_game, when the next player is about to choose a move,
+        i.e. the next player is appended to previous_turns, if the game is not finished.
+        The states are from the perspective of player, and the game is restored to the current state afterwards.
+        In games with a random environment (such as dealing cards), each state is a sample of the possible successors.
+        """
+        player = player if player else self.players[self.current_pid]
+        mover = self.players[self.current_pid]
+        current_state = self.fork(player)
+
+        def make_action(action : 'Action') -> GameState:
+            self.step(action)
+            new_state = self.get_current_state(player=mover)
+            s = self.environment_action(new_state)
+            if s is not False:
+                s.set_game_state(self)
+            if not self.check_is_terminal():
+                self.previous_turns.append(self.current_pid)
+            return self.fork(player)
+
+        make_action = self.disable_logging_wrapper(make_action)
+        states = []
+        try:
+            for i, action in enumerate(actions):
+                if i > 0:
+                    self.restore_state(current_state)
+                states.append(make_action(action))
+        finally:
+            self.restore_state(current_state)
+        return states
+
+    def successor_state(self, action : 'Action', player : 'Player' = None) -> GameState:
+        """ Return the state after the current player makes the action (see successor_states).
+        """
+        return self.successor_states([action], player=player)[0]
+
     def _get_finished_players(self, game_state: GameState) -> List[int]:
         """ Return the indices of the players that are finished.
         """
@@ -60,7 +60,51 @@ class GameState(ABC):
         """ Return a deepcopy of the game state.
         """
         return self.__class__(json.loads(json.dumps(self._state_json)))
-    
+
+    def __getstate__(self) -> Dict:
+        """ Return a compact representation of the state for pickling.
+        Only the packed state_json is pickled, since all the attributes are restored from it.
+        """
+        return self.pack_state_json(self.state_json)
+
+    def __setstate__(self, packed_state_json : Dict) -> None:
+        """ Restore the state from the packed state_json.
+        """
+        self.__init__(self.unpack_state_json(packed_state_json))
+
+    def pack_state_json(self, state_json : Dict) -> Dict:
+        """ Return a compact copy of the state_json, that is used when pickling the state.
+        Subclasses should pack their own (large) values, and call super() to pack the common values.
+        The state_json itself must not be modified.
+        """
+        packed = dict(state_json)
+        if "previous_turns" in packed:
+            packed["previous_turns"] = self.pack_ints(packed["previous_turns"])
+        return packed
+
+    def unpack_state_json(self, packed_state_json : Dict) -> Dict:
+        """ Inverse of pack_state_json.
+        """
+        state_json = dict(packed_state_json)
+        if "previous_turns" in state_json:
+            state_json["previous_turns"] = self.unpack_ints(state_json["previous_turns"])
+        return state_json
+
+    @staticmethod
+    def pack_ints(values : List[int], dtype = np.int8) -> bytes:
+        """ Pack a (nested) list of small integers to bytes.
+        """
+        return np.asarray(values, dtype=dtype).tobytes()
+
+    @staticmethod
+    def unpack_ints(buffer : bytes, dtype = np.int8, shape = None) -> List[int]:
+        """ Unpack bytes created with pack_ints to a (nested) list of integers.
+        """
+        arr = np.frombuffer(buffer, dtype=dtype)
+        if shape is not None:
+            arr = arr.reshape(shape)
+        return arr.tolist()
+
         
     @classmethod
     def game_to_state_json_decorator(cls):
@@ -108,10 +152,16 @@ class GameState(ABC):
         for key, value in self.state_json.items():
             setattr(game, key, value)
             
+    def state_json_equals(self, state_json : Dict) -> bool:
+        """ Check if the state_json of the GameState equals state_json.
+        Subclasses with values, that can not be compared with ==, (e.g. numpy arrays) should override this.
+        """
+        return self.state_json == state_json
+
     def check_is_game_equal(self, game : 'Game', player : 'Player' = None) -> bool:
         """ Check if the state of the game matches the state of the GameState.
         """
-        suc = self.state_json == self.__class__.game_to_state_json(game, player)
+        suc = self.state_json_equals(self.__class__.game_to_state_json(game, player))
         if not suc:
             print(f"self.state_json: {self.state_json}")
             print(f"game.state_json: {self.__class__.game_to_state_json(game, player)}")
@@ -128,6 +178,15 @@ class GameState(ABC):
     def __hash__(self) -> int:
         return hash(tuple(self.to_vector()))
     
+    def fingerprint(self, perspective_pid : int = None) -> bytes:
+        """ Return a compact key, that identifies the state from the perspective of perspective_pid.
+        States with the same fingerprint must have the same value from the perspective,
+        so the fingerprint can be used to cache the evaluations of the states (see EvaluationCache).
+        """
+        if perspective_pid is None:
+            perspective_pid = self.perspective_pid
+        return np.asarray([perspective_pid] + list(self.to_vector(perspective_pid)), dtype=np.float32).tobytes()
+    
     
     @classmethod
     @abstractmethod
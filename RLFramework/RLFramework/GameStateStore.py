@@ -0,0 +1,287 @@
+import io
+import pickle
+import tempfile
+from typing import Any, Dict, Iterator, List, Tuple, TYPE_CHECKING
+
+import numpy as np
+if TYPE_CHECKING:
+    from .GameState import GameState
+
+class GameStateStore:
+    """ A GameStateStore holds the game states of a game, that are later
+    converted to vectors and saved to a file (see Result.save_game_states_to_file).
+
+    This class keeps every game state as a full GameState (the default retention policy).
+    The subclasses keep less information, to reduce the memory usage of long games.
+
+    The last appended game state is always available as store[-1] (after finalize),
+    because it is needed to label the states with the final scores.
+    The scores of every appended state, and the model values (if given) are always kept,
+    because they are needed to build the value targets (see targets.py).
+    """
+    def __init__(self, perspectives : str = "all"):
+        """ perspectives tells from which perspectives the states are converted to vectors:
+        "all" means from every player's perspective, and "own" means only from the state's perspective_pid.
+        """
+        assert perspectives in ["all", "own"], f"perspectives must be 'all' or 'own', not {perspectives}"
+        self.perspectives = perspectives
+        # The number of states appended, and the indices (in the order of appending) of the retained states
+        self.total_num_states = 0
+        self.retained_indices : List[int] = []
+        self._states : List['GameState'] = []
+        self._last_state : 'GameState' = None
+        self._last_state_is_copy = False
+        self._scores : List[List[float]] = []
+        self._values : List[Dict[int, float]] = []
+
+    def should_retain(self, index : int) -> bool:
+        """ Whether the state with the given index (in the order of appending) is retained.
+        """
+        return True
+
+    def retain(self, game_state : 'GameState') -> None:
+        """ Retain the (not copied) game state.
+        """
+        self._states.append(game_state.deepcopy())
+
+    def append(self, game_state : 'GameState', values : Dict[int, float] = None) -> None:
+        """ Append a game state. The game state does not need to be a copy,
+        since the store copies (or encodes) the states it retains.
+        values are the model values of the state from some perspectives ({pid : value}), if they are known.
+        """
+        index = self.total_num_states
+        self.total_num_states += 1
+        self._scores.append(list(game_state.player_scores))
+        self._values.append(values if values is not None else {})
+        if self.should_retain(index):
+            self.retained_indices.append(index)
+            self.retain(game_state)
+        self._last_state = game_state
+        self._last_state_is_copy = False
+
+    def finalize(self) -> None:
+        """ Copy the last state, so that it is not changed if the game is changed.
+        This is called when the game is finished.
+        """
+        if self._last_state is not None and not self._last_state_is_copy:
+            self._last_state = self._last_state.deepcopy()
+            self._last_state_is_copy = True
+
+    @property
+    def last_state(self) -> 'GameState':
+        return self._last_state
+
+    def get_perspectives(self, game_state : 'GameState') -> List[int]:
+        """ Return the perspectives from which the game state is converted to vectors.
+        """
+        if self.perspectives == "own":
+            return [game_state.perspective_pid]
+        return list(range(len(game_state.player_scores)))
+
+    def get_state_vectors(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """ Return the retained states as vectors:
+        - X: A matrix, where each row is a state from some perspective
+        - perspectives: The perspective pid of each row
+        - state_indices: The index (in the order of appending) of the state of each row
+        """
+        Xs = []
+        perspectives = []
+        state_indices = []
+        for index, game_state in zip(self.retained_indices, self):
+            for perspective_pid in self.get_perspectives(game_state):
+                Xs.append(game_state.to_vector(perspective_pid))
+                perspectives.append(perspective_pid)
+                state_indices.append(index)
+        return np.array(Xs), np.array(perspectives, dtype=np.int64), np.array(state_indices, dtype=np.int64)
+
+    def get_scores(self) -> np.ndarray:
+        """ Return the scores of the players in every appended state, shape (total_num_states, num_players).
+        """
+        return np.array(self._scores, dtype=np.float64)
+
+    def get_values(self) -> np.ndarray:
+        """ Return the model values of every appended state, shape (total_num_states, num_players).
+        The missing values are NaN. Returns None if there are no values.
+        """
+        if not any(self._values):
+            return None
+        values = np.full((self.total_num_states, len(self._scores[0])), np.nan)
+        for index, state_values in enumerate(self._values):
+            for pid, value in state_values.items():
+                values[index, pid] = value
+        return values
+
+    def __iter__(self) -> Iterator['GameState']:
+        return iter(self._states)
+
+    def __len__(self) -> int:
+        return len(self.retained_indices)
+
+    def __getitem__(self, index : int) -> 'GameState':
+        if index == -1:
+            return self.last_state
+        return self._states[index]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ Pickle the retained states in their packed form.
+        """
+        self.finalize()
+        state = self.__dict__.copy()
+        state["_states"] = [(gs.__class__, gs.__getstate__()) for gs in self._states]
+        return state
+
+    def __setstate__(self, state : Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._states = []
+        for game_state_class, packed_state in state["_states"]:
+            game_state = game_state_class.__new__(game_state_class)
+            game_state.__setstate__(packed_state)
+            self._states.append(game_state)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(retained={len(self)}, total={self.total_num_states})"
+
+
+class KthGameStateStore(GameStateStore):
+    """ Keep only every k-th game state (and always the last state).
+    """
+    def __init__(self, perspectives : str = "all", k : int = 2):
+        super().__init__(perspectives)
+        assert k >= 1, f"k must be at least 1, not {k}"
+        self.k = k
+
+    def should_retain(self, index : int) -> bool:
+        return index % self.k == 0
+
+    def finalize(self) -> None:
+        """ Also retain the last state, if it was not retained already.
+        """
+        super().finalize()
+        last_index = self.total_num_states - 1
+        if self._last_state is not None and (not self.retained_indices or self.retained_indices[-1] != last_index):
+            self.retained_indices.append(last_index)
+            self.retain(self._last_state)
+
+
+class VectorGameStateStore(GameStateStore):
+    """ Keep only the vectors of the game states.
+    The states are converted to vectors when they are appended,
+    and the vectors are stored in a growing int8 buffer.
+    """
+    def __init__(self, perspectives : str = "all", initial_capacity : int = 256):
+        super().__init__(perspectives)
+        self._buffer : np.ndarray = None
+        self._row_perspectives = np.zeros(initial_capacity, dtype=np.int8)
+        self._row_state_indices = np.zeros(initial_capacity, dtype=np.int32)
+        self._num_rows = 0
+
+    def _grow(self, num_new_rows : int, vector_length : int) -> None:
+        """ Make sure the buffers have space for num_new_rows more rows.
+        """
+        if self._buffer is None:
+            self._buffer = np.zeros((len(self._row_perspectives), vector_length), dtype=np.int8)
+        if self._buffer.shape[1] != vector_length:
+            raise ValueError(f"All the state vectors must have the same length ({self._buffer.shape[1]}), not {vector_length}")
+        capacity = len(self._buffer)
+        if self._num_rows + num_new_rows <= capacity:
+            return
+        new_capacity = max(2 * capacity, self._num_rows + num_new_rows)
+        self._buffer = np.resize(self._buffer, (new_capacity, vector_length))
+        self._row_perspectives = np.resize(self._row_perspectives, new_capacity)
+        self._row_state_indices = np.resize(self._row_state_indices, new_capacity)
+
+    def retain(self, game_state : 'GameState') -> None:
+        """ Convert the state to vectors, and write them to the buffer.
+        """
+        perspectives = self.get_perspectives(game_state)
+        rows = np.array([game_state.to_vector(perspective_pid) for perspective_pid in perspectives])
+        if rows.min() < -128 or rows.max() > 127 or np.any(rows != np.round(rows)):
+            raise ValueError("The 'vectors' retention policy requires the state vectors to contain integers in [-128, 127].")
+        self._grow(len(rows), rows.shape[1])
+        start, end = self._num_rows, self._num_rows + len(rows)
+        self._buffer[start:end] = rows
+        self._row_perspectives[start:end] = perspectives
+        self._row_state_indices[start:end] = self.retained_indices[-1]
+        self._num_rows = end
+
+    def get_state_vectors(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._buffer is None:
+            return np.zeros((0, 0)), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return (self._buffer[:self._num_rows],
+                self._row_perspectives[:self._num_rows].astype(np.int64),
+                self._row_state_indices[:self._num_rows].astype(np.int64))
+
+    def __iter__(self) -> Iterator['GameState']:
+        raise TypeError("The game states are not retained with the 'vectors' retention policy, only their vectors.")
+
+    def __getitem__(self, index : int) -> 'GameState':
+        if index == -1:
+            return self.last_state
+        raise TypeError("The game states are not retained with the 'vectors' retention policy, only the last state.")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ Only pickle the used part of the buffers.
+        """
+        state = super().__getstate__()
+        if self._buffer is not None:
+            state["_buffer"] = self._buffer[:self._num_rows].copy()
+        state["_row_perspectives"] = self._row_perspectives[:self._num_rows].copy()
+        state["_row_state_indices"] = self._row_state_indices[:self._num_rows].copy()
+        return state
+
+
+class SpillGameStateStore(GameStateStore):
+    """ Pickle the game states to a temporary file, instead of keeping them in memory.
+    The states are read back from the file when they are iterated.
+    """
+    def __init__(self, perspectives : str = "all"):
+        super().__init__(perspectives)
+        self._file = tempfile.TemporaryFile()
+
+    def retain(self, game_state : 'GameState') -> None:
+        pickle.dump(game_state, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def __iter__(self) -> Iterator['GameState']:
+        self._file.flush()
+        self._file.seek(0)
+        for _ in range(len(self)):
+            yield pickle.load(self._file)
+        self._file.seek(0, io.SEEK_END)
+
+    def __getitem__(self, index : int) -> 'GameState':
+        if index == -1:
+            return self.last_state
+        for i, game_state in enumerate(self):
+            if i == index % len(self):
+                return game_state
+        raise IndexError(f"Index {index} out of range")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """ The pickled states in the file are already compact,
+        so we send the contents of the file, and keep them in memory on the receiving side.
+        """
+        state = super().__getstate__()
+        self._file.flush()
+        self._file.seek(0)
+        state["_file"] = self._file.read()
+        self._file.seek(0, io.SEEK_END)
+        return state
+
+    def __setstate__(self, state : Dict[str, Any]) -> None:
+        super().__setstate__(state)
+        self._file = io.BytesIO(state["_file"])
+
+
+STATE_RETENTION_POLICIES = {
+    "full" : GameStateStore,
+    "kth" : KthGameStateStore,
+    "vectors" : VectorGameStateStore,
+    "spill" : SpillGameStateStore,
+}
+
+def make_game_state_store(policy : str = "full", perspectives : str = "all", **kwargs) -> GameStateStore:
+    """ Create a GameStateStore for the given retention policy.
+    """
+    if policy not in STATE_RETENTION_POLICIES:
+        raise ValueError(f"Unknown state retention policy '{policy}'. Available policies: {list(STATE_RETENTION_POLICIES.keys())}")
+    return STATE_RETENTION_POLICIES[policy](perspectives=perspectives, **kwargs)
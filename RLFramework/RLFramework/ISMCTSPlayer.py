@@ -0,0 +1,208 @@
+from abc import abstractmethod
+import time
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+from .MCTSPlayer import MCTSPlayer
+if TYPE_CHECKING:
+    from .Action import Action
+    from .GameState import GameState
+    from .Game import Game
+
+class ISMCTSNode:
+    """ A node in the information set tree of ISMCTSPlayer.
+    The node is reached with different determinizations, where different actions are legal, so the edges are keyed by action_key,
+    and an edge is added when its action is first legal in a determinization that reaches the node.
+    The statistics of the edges are stored in arrays: the visits, the availability (how many times the edge was legal,
+    when the node was visited) and the sums of the values of each player.
+    """
+    __slots__ = ("state", "parent", "index", "edge_index", "children", "visits", "availability", "value_sums")
+
+    def __init__(self, num_players : int, state : 'GameState' = None, parent : 'ISMCTSNode' = None, index : int = None):
+        # The state, from which the determinizations are sampled (only in the root)
+        self.state = state
+        self.parent = parent
+        self.index = index
+        self.edge_index : Dict[str, int] = {}
+        self.children : List[Optional['ISMCTSNode']] = []
+        self.visits = np.zeros(0, dtype=np.int64)
+        self.availability = np.zeros(0, dtype=np.int64)
+        self.value_sums = np.zeros((0, num_players))
+
+    def add_edges(self, keys : List[str]) -> np.ndarray:
+        """ Add the edges of the keys, with one visit and availability, and return their indices.
+        """
+        start = len(self.children)
+        self.edge_index.update((key, start + k) for k, key in enumerate(keys))
+        self.children.extend(None for _ in keys)
+        self.visits = np.concatenate([self.visits, np.ones(len(keys), dtype=np.int64)])
+        self.availability = np.concatenate([self.availability, np.ones(len(keys), dtype=np.int64)])
+        self.value_sums = np.concatenate([self.value_sums, np.zeros((len(keys), self.value_sums.shape[1]))])
+        return np.arange(start, start + len(keys))
+
+    def get_child(self, i : int) -> 'ISMCTSNode':
+        if self.children[i] is None:
+            self.children[i] = ISMCTSNode(self.value_sums.shape[1], parent=self, index=i)
+        return self.children[i]
+
+    def __repr__(self) -> str:
+        return f"ISMCTSNode(visits={int(np.sum(self.visits))}, num_edges={len(self.children)})"
+
+
+class ISMCTSPlayer(MCTSPlayer):
+    """ A mixin for players in games with hidden information, that select moves with
+    (single observer) information-set Monte-Carlo tree search.
+    The search has one tree, whose nodes are reached by the sequences of actions (by action_key) from the root.
+    Each simulation samples a determinization with determinize, so that the hidden information
+    (for example the other players' cards and the order of the deck) is consistent with what the player knows,
+    and descends the tree with only the actions, that are legal in the determinization.
+    The edges are selected with UCT, where the parent's visits are replaced by the edge's availability
+    (the number of times the edge was legal), since an action is not legal in every determinization.
+
+    When a determinization reaches a node with actions, that are not yet in the tree, their edges are added,
+    and their successors are evaluated in one batch with evaluate_leaves, like in MCTSPlayer.
+    The leaves can be evaluated in batches with leaf_batch_size > 1 (with virtual loss, see MCTSPlayer).
+    With num_workers > 1, each forked worker process searches its own tree, and the root statistics are summed by action_key.
+
+    The tree is not reused between moves, since the player's information changes.
+    Use it as the first base class before a Player, and call configure_mcts in the subclass' __init__.
+    """
+
+    @abstractmethod
+    def determinize(self, game : 'Game') -> 'GameState':
+        """ Return a copy of the game's current state, where the information hidden from the player is sampled,
+        consistently with what the player has observed. The game must not be modified.
+        """
+        pass
+
+    def choose_move(self, game : 'Game') -> 'Action':
+        """ Search the information set tree, and select the move based on the visit counts of the player's actions.
+        """
+        start = time.perf_counter()
+        deadline = self._get_search_deadline(game, start)
+        # The actions are generated in the real state
+        actions = game.get_all_possible_actions()
+        if not actions:
+            return None
+        current_state = game.fork(self)
+        root_stats, num_simulations = {}, 0
+        if len(actions) > 1:
+            if self.num_workers > 1 and self._can_fork():
+                root_stats, num_simulations = self._root_parallel_search(game, current_state, deadline)
+            else:
+                root_stats, num_simulations = self.worker_search(game, current_state, self.num_simulations, deadline)
+        game.restore_state(current_state)
+        visits = np.zeros(len(actions))
+        value_sums = np.zeros(len(actions))
+        for i, action in enumerate(actions):
+            key = self.action_key(action)
+            if key in root_stats:
+                visits[i] = root_stats[key][0]
+                value_sums[i] = root_stats[key][1][self.pid]
+        evaluations = visits / max(np.sum(visits), 1)
+        self.logger.debug(f"Moves and visit fractions:\n{list(zip(actions, evaluations))}")
+        selected_move_idx = self.select_action_strategy(evaluations)
+        self.last_evaluation = float(value_sums[selected_move_idx] / max(visits[selected_move_idx], 1))
+        self.mcts_stats["num_searches"] += 1
+        self.mcts_stats["num_simulations"] += num_simulations
+        self.mcts_stats["search_time"] += time.perf_counter() - start
+        return actions[selected_move_idx]
+
+    def worker_search(self, game : 'Game', state : 'GameState', num_simulations : Optional[int],
+                      deadline : Optional[float]) -> Tuple[Dict[str, Tuple[Any, Any]], int]:
+        """ Search a new information set tree from the state.
+        Returns the statistics (visits, value sums) of the root's edges by action_key, and the number of simulations.
+        """
+        root = ISMCTSNode(len(game.players), state=state)
+        done = self._search(game, [root], deadline, num_simulations)
+        return {key : (root.visits[i], root.value_sums[i]) for key, i in root.edge_index.items()}, done
+
+    def _select_edge(self, node : ISMCTSNode, legal : np.ndarray, mover : int) -> int:
+        """ Select the legal edge with the highest UCT score (with availability) for the player in turn.
+        Returns the index in legal.
+        """
+        visits = node.visits[legal]
+        if not 0 <= mover < node.value_sums.shape[1]:
+            return int(np.argmin(visits))
+        q = node.value_sums[legal, mover] / visits
+        u = self.exploration * np.sqrt(np.log(node.availability[legal]) / visits)
+        return int(np.argmax(q + u))
+
+    def _descend(self, game : 'Game', root : ISMCTSNode) -> Tuple[List[Tuple[ISMCTSNode, int]], Optional[tuple], 'GameState']:
+        """ Sample a determinization, and descend the tree with virtual loss, until the game ends
+        or some legal actions are not yet in the tree, in which case their edges are added.
+        Returns the descended edges, the expansion (node, legal edges, mover, new edges, successor states of the new edges) or None,
+        and the state of the leaf.
+        """
+        game.restore_state(root.state)
+        state = self.determinize(game)
+        node, path = root, []
+        while not self.is_terminal_state(state):
+            game.restore_state(state)
+            actions = game.get_all_possible_actions()
+            if not actions:
+                break
+            mover = game.current_pid
+            keys = [self.action_key(action) for action in actions]
+            new_keys = {key : j for j, key in enumerate(keys) if key not in node.edge_index}
+            if new_keys:
+                old_legal = np.array([node.edge_index[key] for key in keys if key not in new_keys], dtype=np.int64)
+                node.availability[old_legal] += 1
+                new_states = game.successor_states([actions[j] for j in new_keys.values()], player=self)
+                new_edges = node.add_edges(list(new_keys))
+                legal = np.array([node.edge_index[key] for key in keys], dtype=np.int64)
+                return path, (node, legal, mover, new_edges, new_states), state
+            legal = np.array([node.edge_index[key] for key in keys], dtype=np.int64)
+            node.availability[legal] += 1
+            j = self._select_edge(node, legal, mover)
+            # The virtual loss: visits without value
+            node.visits[legal[j]] += self.virtual_loss
+            path.append((node, legal[j]))
+            state = game.successor_state(actions[j], player=self)
+            node = node.get_child(legal[j])
+        return path, None, state
+
+    def _simulate_batch(self, game : 'Game', roots : List[ISMCTSNode], batch_size : int) -> int:
+        """ Descend batch_size determinizations (from the roots in turn), evaluate the successors of the new edges
+        of all the leaves together, and backpropagate the leaves' values.
+        Returns the number of simulations.
+        """
+        leaves = [self._descend(game, roots[k % len(roots)]) for k in range(batch_size)]
+        # The successors of the new edges, and the non-terminal leaves without actions, are evaluated
+        to_evaluate = []
+        for k, (_, expansion, state) in enumerate(leaves):
+            if expansion is not None:
+                node, _, _, new_edges, new_states = expansion
+                for i, new_state in zip(new_edges, new_states):
+                    if self.is_terminal_state(new_state):
+                        node.value_sums[i] = self.terminal_values(new_state)
+                    else:
+                        to_evaluate.append((node, i, new_state))
+            elif not self.is_terminal_state(state):
+                to_evaluate.append((None, k, state))
+        leaf_values = {}
+        if to_evaluate:
+            for (node, i, _), values in zip(to_evaluate, self.evaluate_leaves([s for _, _, s in to_evaluate])):
+                if node is None:
+                    leaf_values[i] = values
+                else:
+                    node.value_sums[i] = values
+            self.mcts_stats["num_evaluated_states"] += len(to_evaluate)
+            self.mcts_stats["num_batches"] += 1
+        for k, (path, expansion, state) in enumerate(leaves):
+            if expansion is not None:
+                node, legal, mover, _, _ = expansion
+                legal_values = node.value_sums[legal] / node.visits[legal, np.newaxis]
+                if 0 <= mover < legal_values.shape[1]:
+                    values = legal_values[np.argmax(legal_values[:, mover])]
+                else:
+                    values = np.mean(legal_values, axis=0)
+                self.mcts_stats["num_expanded_nodes"] += 1
+            elif k in leaf_values:
+                values = leaf_values[k]
+            else:
+                values = self.terminal_values(state)
+            for node, i in path:
+                node.visits[i] += 1 - self.virtual_loss
+                node.value_sums[i] += values
+        return len(leaves)
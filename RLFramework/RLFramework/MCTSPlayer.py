@@ -0,0 +1,418 @@
+from abc import ABC, abstractmethod
+from collections import deque
+import multiprocessing
+import os
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import numpy as np
+if TYPE_CHECKING:
+    from .Action import Action
+    from .GameState import GameState
+    from .Game import Game
+    from .utils import TFLiteModel
+
+class MCTSNode:
+    """ A node in the MCTS tree.
+    The statistics of the children (visits and the sums of the values of each player) are stored in arrays in the parent,
+    so that a child can be selected with vectorized operations. The child nodes are created when they are first selected.
+    """
+    __slots__ = ("state", "parent", "index", "is_terminal", "expanded_state", "actions",
+                 "child_states", "child_is_terminal", "children", "child_visits", "child_value_sums")
+
+    def __init__(self, state : 'GameState', parent : 'MCTSNode' = None, index : int = None, is_terminal : bool = False):
+        self.state = state
+        self.parent = parent
+        self.index = index
+        self.is_terminal = is_terminal
+        # The state after generating the actions (which may modify the state), and the actions
+        self.expanded_state : 'GameState' = None
+        self.actions : List['Action'] = None
+        self.child_states : List['GameState'] = None
+        self.child_is_terminal : np.ndarray = None
+        self.children : List[Optional['MCTSNode']] = None
+        self.child_visits : np.ndarray = None
+        self.child_value_sums : np.ndarray = None
+
+    @property
+    def is_expanded(self) -> bool:
+        return self.actions is not None
+
+    @property
+    def visits(self) -> int:
+        return int(np.sum(self.child_visits)) if self.is_expanded else 0
+
+    def get_child(self, i : int) -> 'MCTSNode':
+        if self.children[i] is None:
+            self.children[i] = MCTSNode(self.child_states[i], parent=self, index=i, is_terminal=bool(self.child_is_terminal[i]))
+        return self.children[i]
+
+    def __repr__(self) -> str:
+        return f"MCTSNode(visits={self.visits}, num_actions={len(self.actions) if self.is_expanded else None}, is_terminal={self.is_terminal})"
+
+
+class MCTSPlayer(ABC):
+    """ A mixin for players, that select moves with Monte-Carlo tree search.
+    The tree is searched with UCT from the perspective of the player in turn (max^n for multiplayer games),
+    where each node stores the values of all the players.
+
+    When a leaf is expanded, all its successors are created with Game.successor_states,
+    and evaluated in one batch with evaluate_leaves (for example with one TFLiteModel.predict call).
+    The value of the expanded leaf is the value of its best successor for the player in turn.
+
+    Use it as the first base class before a Player, e.g. class BlokusMCTSPlayer(MCTSPlayer, BlokusPlayer),
+    and call configure_mcts in the subclass' __init__ (otherwise the defaults are used).
+
+    In games with a random environment (such as dealing cards in Moska), the successors are sampled once,
+    and the search sees the hidden information.
+
+    The leaves can be evaluated in batches with leaf_batch_size > 1: the leaves of a batch are selected one after another,
+    and each selected edge gets a virtual loss (virtual visits with a value of 0), so that the next selections reach different leaves.
+    The leaves are then expanded, and all their successors are evaluated in one evaluate_leaves call.
+    This only batches the inference: the descents are sequential, in one process.
+
+    The search is parallelized with num_workers > 1 worker processes (root parallelization):
+    each worker searches its own tree from the root, and the root statistics are summed by action_key.
+    The workers are forked once per game (see teardown), so they keep their copy of the game and the models,
+    and only the root state is sent to them for each search. If forking is not available
+    (or the player is already in a daemonic worker process, e.g. in simulate_games), the search runs in one process.
+    """
+    # The defaults, if configure_mcts is not called
+    num_simulations : int = 100
+    mcts_time_limit : float = None
+    exploration : float = 1.4
+    reuse_tree : bool = True
+    leaf_batch_size : int = 1
+    virtual_loss : int = 1
+    num_workers : int = 1
+
+    def configure_mcts(self,
+                       num_simulations : int = 100,
+                       time_limit : float = None,
+                       exploration : float = 1.4,
+                       reuse_tree : bool = True,
+                       leaf_batch_size : int = 1,
+                       virtual_loss : int = 1,
+                       num_workers : int = 1,
+                       ) -> None:
+        """ Configure the search:
+        - num_simulations: The number of simulations (selection, expansion and backpropagation) per move.
+        - time_limit: The maximum time (seconds) per move. If both are given, the search stops when either is reached.
+        The search also stops at the game's move_deadline, if the game allocates time to the moves.
+        - exploration: The exploration constant of UCT.
+        - reuse_tree: Whether to continue from the subtree of the previous search, if the current state is in it.
+        - leaf_batch_size: The number of leaves selected (with virtual loss) and evaluated in one batch.
+        - virtual_loss: The number of virtual visits added to each edge descended to a leaf of the batch.
+        - num_workers: The number of worker processes (root parallelization).
+        """
+        assert num_simulations is not None or time_limit is not None, "Either num_simulations or time_limit must be given."
+        assert leaf_batch_size >= 1, f"leaf_batch_size must be atleast 1, not {leaf_batch_size}"
+        assert num_workers >= 1, f"num_workers must be atleast 1, not {num_workers}"
+        self.num_simulations = num_simulations
+        self.mcts_time_limit = time_limit
+        self.exploration = exploration
+        self.reuse_tree = reuse_tree
+        self.leaf_batch_size = leaf_batch_size
+        self.virtual_loss = virtual_loss
+        self.num_workers = num_workers
+
+    @property
+    def mcts_stats(self) -> Dict[str, Any]:
+        if "_mcts_stats" not in self.__dict__:
+            self._mcts_stats = {"num_searches" : 0,
+                                "num_simulations" : 0,
+                                "num_expanded_nodes" : 0,
+                                "num_evaluated_states" : 0,
+                                "num_batches" : 0,
+                                "num_reused_trees" : 0,
+                                "search_time" : 0.0}
+        return self._mcts_stats
+
+    @abstractmethod
+    def evaluate_leaves(self, states : List['GameState']) -> np.ndarray:
+        """ Evaluate the non-terminal states from the perspective of each player.
+        Returns an array of shape (len(states), number of players).
+        """
+        pass
+
+    def terminal_values(self, state : 'GameState') -> np.ndarray:
+        """ Return the values of a terminal state for each player.
+        By default, the values are the players' scores. They should be on the same scale as evaluate_leaves.
+        """
+        return np.asarray(state.player_scores, dtype=np.float64)
+
+    def is_terminal_state(self, state : 'GameState') -> bool:
+        """ Whether the game is finished in the state.
+        """
+        return len(state.unfinished_players) == 0
+
+    def predict_values(self, model : 'TFLiteModel', states : List['GameState']) -> np.ndarray:
+        """ Evaluate the states from the perspective of each player with one model.predict call.
+        """
+        num_players = len(self.game.players)
+        X = np.array([s.to_vector(pid) for s in states for pid in range(num_players)], dtype=np.float32)
+        return np.asarray(model.predict(X), dtype=np.float64).reshape(len(states), num_players)
+
+    def action_key(self, action : 'Action') -> str:
+        """ The key, that identifies the same action in the searches of different processes.
+        """
+        return repr(action)
+
+    def choose_move(self, game : 'Game') -> 'Action':
+        """ Search the game tree from the current state, and select the move based on the visit counts of the root's children.
+        """
+        start = time.perf_counter()
+        deadline = self._get_search_deadline(game, start)
+        root = self._get_root(game)
+        if not root.is_expanded:
+            self._expand(game, [root])
+        if not root.actions:
+            game.restore_state(root.expanded_state)
+            return None
+        num_simulations = 0
+        if len(root.actions) > 1:
+            if self.num_workers > 1 and self._can_fork():
+                root_stats, num_simulations = self._root_parallel_search(game, root.state, deadline)
+                for i, action in enumerate(root.actions):
+                    visits, value_sums = root_stats.get(self.action_key(action), (0, 0))
+                    root.child_visits[i] += visits
+                    root.child_value_sums[i] += value_sums
+            else:
+                num_simulations = self._search(game, [root], deadline)
+        # Restore the game to the state, where the actions were generated
+        game.restore_state(root.expanded_state)
+        visits = root.child_visits.astype(np.float64)
+        evaluations = visits / np.sum(visits)
+        self.logger.debug(f"Moves and visit fractions:\n{list(zip(root.actions, evaluations))}")
+        selected_move_idx = self.select_action_strategy(evaluations)
+        self.last_evaluation = float(root.child_value_sums[selected_move_idx, self.pid] / root.child_visits[selected_move_idx])
+        self._previous_root = root.get_child(selected_move_idx) if self.reuse_tree else None
+        if self._previous_root is not None:
+            self._previous_root.parent = None
+        self.mcts_stats["num_searches"] += 1
+        self.mcts_stats["num_simulations"] += num_simulations
+        self.mcts_stats["search_time"] += time.perf_counter() - start
+        return root.actions[selected_move_idx]
+
+    def _get_root(self, game : 'Game') -> MCTSNode:
+        """ Find the node of the current state in the subtree of the previously selected move,
+        or create a new root.
+        """
+        previous_root = self.__dict__.get("_previous_root")
+        if previous_root is not None:
+            current_state_json = game.game_state_class.game_to_state_json(game, self)
+            num_turns = len(game.previous_turns)
+            queue = deque([previous_root])
+            while queue:
+                node = queue.popleft()
+                node_num_turns = len(node.state.previous_turns)
+                if node_num_turns == num_turns and node.state.state_json_equals(current_state_json):
+                    node.parent = None
+                    self.mcts_stats["num_reused_trees"] += 1
+                    return node
+                if node.is_expanded and node_num_turns < num_turns:
+                    queue.extend(child for child in node.children if child is not None)
+        return MCTSNode(game.fork(self), is_terminal=game.check_is_terminal())
+
+    def _get_search_deadline(self, game : 'Game', start : float) -> Optional[float]:
+        """ Return the time (time.perf_counter), when the search started at start must stop, or None.
+        The search stops at mcts_time_limit, and at the game's move deadline (see Game.allocate_move_time).
+        """
+        deadline = self.get_move_deadline(game, start)
+        if self.mcts_time_limit is not None:
+            deadline = start + self.mcts_time_limit if deadline is None else min(deadline, start + self.mcts_time_limit)
+        return deadline
+
+    def _search(self, game : 'Game', roots : List[MCTSNode], deadline : Optional[float], num_simulations : int = None) -> int:
+        """ Run simulations from the roots in batches of leaf_batch_size per root, until the budget is used.
+        Returns the number of simulations (of all the roots).
+        """
+        num_simulations = self.num_simulations if num_simulations is None else num_simulations
+        max_batch_size = self.leaf_batch_size * len(roots)
+        done = 0
+        while ((num_simulations is None or done < num_simulations) and
+               (deadline is None or time.perf_counter() < deadline)):
+            batch_size = max_batch_size if num_simulations is None else min(max_batch_size, num_simulations - done)
+            done += self._simulate_batch(game, roots, batch_size)
+        return done
+
+    def _generate_children(self, game : 'Game', node : MCTSNode) -> None:
+        """ Create the actions and the successor states of the node.
+        """
+        game.restore_state(node.state)
+        actions = game.get_all_possible_actions()
+        node.expanded_state = game.fork(self)
+        node.actions = actions
+        node.child_states = game.successor_states(actions, player=self)
+        node.children = [None for _ in actions]
+        node.child_is_terminal = np.array([self.is_terminal_state(s) for s in node.child_states], dtype=bool)
+        node.child_visits = np.ones(len(actions), dtype=np.int64)
+        node.child_value_sums = np.zeros((len(actions), len(game.players)))
+
+    def _expand(self, game : 'Game', nodes : List[MCTSNode]) -> List[np.ndarray]:
+        """ Create the successors of the nodes, and evaluate the successors of all the nodes in one batch.
+        Returns the values of the nodes for backpropagation.
+        """
+        for node in nodes:
+            self._generate_children(game, node)
+        leaves = [(node, i) for node in nodes for i in np.flatnonzero(~node.child_is_terminal)]
+        # The nodes without actions are evaluated themselves
+        leaf_states = [node.child_states[i] for node, i in leaves] + [node.state for node in nodes if not node.actions]
+        leaf_values = self.evaluate_leaves(leaf_states) if leaf_states else np.zeros((0, len(game.players)))
+        for (node, i), values in zip(leaves, leaf_values):
+            node.child_value_sums[i] = values
+        for node in nodes:
+            for i in np.flatnonzero(node.child_is_terminal):
+                node.child_value_sums[i] = self.terminal_values(node.child_states[i])
+        self.mcts_stats["num_expanded_nodes"] += len(nodes)
+        self.mcts_stats["num_evaluated_states"] += len(leaf_states)
+        self.mcts_stats["num_batches"] += 1
+        node_values = []
+        own_values = iter(leaf_values[len(leaves):])
+        for node in nodes:
+            if not node.actions:
+                node_values.append(next(own_values))
+                continue
+            mover = node.expanded_state.current_pid
+            if 0 <= mover < len(game.players):
+                node_values.append(node.child_value_sums[np.argmax(node.child_value_sums[:, mover])])
+            else:
+                node_values.append(np.mean(node.child_value_sums, axis=0))
+        return node_values
+
+    def _select_child(self, node : MCTSNode) -> int:
+        """ Select the child with the highest UCT score for the player in turn.
+        """
+        mover = node.expanded_state.current_pid
+        visits = node.child_visits
+        if not 0 <= mover < node.child_value_sums.shape[1]:
+            return int(np.argmin(visits))
+        q = node.child_value_sums[:, mover] / visits
+        u = self.exploration * np.sqrt(np.log(np.sum(visits)) / visits)
+        return int(np.argmax(q + u))
+
+    def _simulate_batch(self, game : 'Game', roots : List[MCTSNode], batch_size : int) -> int:
+        """ Select batch_size leaves with virtual loss (from the roots in turn), expand them together, and backpropagate their values.
+        Returns the number of simulations.
+        """
+        leaves : List[MCTSNode] = []
+        for k in range(batch_size):
+            node = roots[k % len(roots)]
+            while node.is_expanded and node.actions and not node.is_terminal:
+                i = self._select_child(node)
+                # The virtual loss: visits without value
+                node.child_visits[i] += self.virtual_loss
+                node = node.get_child(i)
+            leaves.append(node)
+        to_expand = list({id(node) : node for node in leaves if not node.is_terminal and not node.is_expanded}.values())
+        expanded_values = dict(zip([id(node) for node in to_expand], self._expand(game, to_expand)))
+        for node in leaves:
+            if node.is_terminal:
+                values = self.terminal_values(node.state)
+            elif id(node) in expanded_values:
+                values = expanded_values[id(node)]
+            else:
+                # A non-terminal node without actions
+                values = node.parent.child_value_sums[node.index] / node.parent.child_visits[node.index]
+            while node.parent is not None:
+                node.parent.child_visits[node.index] += 1 - self.virtual_loss
+                node.parent.child_value_sums[node.index] += values
+                node = node.parent
+        return len(leaves)
+
+    @staticmethod
+    def _can_fork() -> bool:
+        """ Whether worker processes can be forked.
+        """
+        if "fork" not in multiprocessing.get_all_start_methods() or multiprocessing.current_process().daemon:
+            warnings.warn("Root-parallel search needs forked worker processes. Searching in one process instead.")
+            return False
+        return True
+
+    def _get_worker_pool(self, game : 'Game') -> "multiprocessing.pool.Pool":
+        """ Return the pool of the worker processes, that are forked with a copy of the player and the game on the first search of the game.
+        """
+        if self.__dict__.get("_worker_pool_game") is not game:
+            self.close_worker_pool()
+            # The workers are forked while the pool is created, so they do not have a copy of the pool
+            pool = multiprocessing.get_context("fork").Pool(self.num_workers, initializer=_init_root_worker, initargs=(self, game))
+            self._worker_pool, self._worker_pool_game, self._worker_pool_pid = pool, game, os.getpid()
+        return self._worker_pool
+
+    def close_worker_pool(self) -> None:
+        """ Terminate the worker processes, if this process created them.
+        """
+        pool = self.__dict__.pop("_worker_pool", None)
+        self.__dict__.pop("_worker_pool_game", None)
+        if pool is not None and self.__dict__.pop("_worker_pool_pid", None) == os.getpid():
+            pool.terminate()
+
+    def teardown(self, game : 'Game') -> None:
+        self.close_worker_pool()
+        super().teardown(game)
+
+    def __del__(self):
+        self.close_worker_pool()
+
+    def _root_parallel_search(self, game : 'Game', state : 'GameState', deadline : Optional[float]) -> Tuple[Dict[str, Tuple[Any, Any]], int]:
+        """ Search from the state in the worker processes (see worker_search), and sum the changes of the workers' root statistics by action_key.
+        The simulations are divided evenly between the workers.
+        Returns the summed (visits, value sums) of each action key, and the number of simulations.
+        """
+        num_workers = self.num_workers
+        num_simulations = [None] * num_workers
+        if self.num_simulations is not None:
+            num_simulations = [self.num_simulations // num_workers + (w < self.num_simulations % num_workers)
+                               for w in range(num_workers)]
+        seeds = np.random.randint(2**31, size=num_workers)
+        pool = self._get_worker_pool(game)
+        results = pool.starmap(_root_worker_search, [(state, num_simulations[w], deadline, int(seeds[w])) for w in range(num_workers)])
+        root_stats = {}
+        total = 0
+        for worker_root_stats, worker_stats, done in results:
+            for key, (visits, value_sums) in worker_root_stats.items():
+                summed_visits, summed_value_sums = root_stats.get(key, (0, 0))
+                root_stats[key] = (summed_visits + visits, summed_value_sums + value_sums)
+            for key in ["num_expanded_nodes", "num_evaluated_states", "num_batches"]:
+                self.mcts_stats[key] += worker_stats[key]
+            total += done
+        return root_stats, total
+
+    def worker_search(self, game : 'Game', state : 'GameState', num_simulations : Optional[int], deadline : Optional[float]) -> Tuple[Dict[str, Tuple[Any, Any]], int]:
+        """ Search a new tree from the state in a worker process.
+        Returns the changes of the root's statistics (visits, value sums) during the search by action_key, and the number of simulations.
+        """
+        game.restore_state(state)
+        root = MCTSNode(state, is_terminal=game.check_is_terminal())
+        self._expand(game, [root])
+        initial_visits, initial_value_sums = root.child_visits.copy(), root.child_value_sums.copy()
+        done = self._search(game, [root], deadline, num_simulations) if root.actions else 0
+        return ({self.action_key(action) : (root.child_visits[i] - initial_visits[i], root.child_value_sums[i] - initial_value_sums[i])
+                 for i, action in enumerate(root.actions)}, done)
+
+    def as_json(self) -> dict:
+        js = super().as_json()
+        stats = dict(self.mcts_stats)
+        stats["search_time"] = round(stats["search_time"], 4)
+        js["mcts"] = stats
+        return js
+
+
+# The (player, game) of a worker process of the root-parallel search (see MCTSPlayer._get_worker_pool)
+_ROOT_WORKER = None
+
+def _init_root_worker(player : MCTSPlayer, game : 'Game') -> None:
+    global _ROOT_WORKER
+    _ROOT_WORKER = (player, game)
+
+def _root_worker_search(state : 'GameState', num_simulations : Optional[int], deadline : Optional[float], seed : int):
+    """ Search from the state with the worker's copy of the player, and return the changes of the root's statistics,
+    the player's statistics and the number of simulations.
+    """
+    player, game = _ROOT_WORKER
+    np.random.seed(seed)
+    player.rng = np.random.default_rng(seed)
+    player.mcts_stats.update({"num_expanded_nodes" : 0, "num_evaluated_states" : 0, "num_batches" : 0})
+    root_stats, done = player.worker_search(game, state, num_simulations, deadline)
+    return root_stats, player.mcts_stats, done
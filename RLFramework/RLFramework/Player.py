@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
-import random
-from typing import List, TYPE_CHECKING
+import time
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+import warnings
 import numpy as np
 import functools as ft
 
 from .utils import _get_logger
 from .Action import Action
+from . import policies
 if TYPE_CHECKING:
     from .GameState import GameState
     from .Game import Game
@@ -16,8 +18,21 @@ class Player(ABC):
     The Player is simple, in that it only needs to be able to evaluate game states,
     and select action (index) based on the evaluation.
     """
+    # Whether the evaluations of the player are estimates of the states' values (final scores),
+    # in which case they can be used to bootstrap the value targets (see targets.py)
+    evaluations_are_values = False
+    # Whether successor states with the same fingerprint are evaluated only once in choose_move.
+    # This is useful, if evaluating a state is expensive compared to computing its fingerprint.
+    deduplicate_successors = False
+    # The per-move budget of choose_move (see set_move_budget). None means no limit.
+    move_time_limit : float = None
+    max_evaluations_per_move : int = None
+    evaluation_chunk_size : int = 64
 
-    def __init__(self, name : str = "Player", logger_args : dict = None):
+    def __init__(self, name : str = "Player", logger_args : dict = None, seed : int = None):
+        """ seed is the seed of the player's random number generator, which is used to select actions.
+        If seed is None, the seed is drawn from numpy's global random state.
+        """
         self.name = name
         default_logger_args = {
             "name" : f"{name}_logger",
@@ -30,6 +45,14 @@ class Player(ABC):
         self.is_finished = False
         self.pid = None
         self.score = 0
+        self.rng = np.random.default_rng(seed if seed is not None else np.random.randint(2**31))
+        # The evaluation of the state after the last selected move
+        self.last_evaluation = None
+        # The number of successor states in this game, and how many of them were evaluated (the rest were duplicates)
+        self.num_successor_states = 0
+        self.num_evaluated_states = 0
+        # The number of moves in this game, where the budget ran out before all the successors were evaluated
+        self.num_truncated_moves = 0
 
     def as_json(self) -> dict:
         """ Return the player as a json.
@@ -41,72 +64,164 @@ class Player(ABC):
             "score" : self.score,
             "is_finished" : self.is_finished,
             "logger_args" : self.logger_args,
+            "num_successor_states" : self.num_successor_states,
+            "num_evaluated_states" : self.num_evaluated_states,
+            "num_truncated_moves" : self.num_truncated_moves,
             }
 
 
     def choose_move(self, game : 'Game') -> 'Action':
         """ Given the game state, select the move to play.
         Note: This is only for games where the next state is known exactly.
+        If the move has a budget (see set_move_budget and Game.move_deadline), the successors are evaluated anytime.
         """
+        start = time.perf_counter()
         self.logger.debug(f"Game state:\n{game}")
         possible_actions = game.get_all_possible_actions()
         self.logger.info(f"Found {len(possible_actions)} possible actions.")
         # If there are no possible actions, return None
         if not possible_actions:
             return None
-        next_states = []
-        game_state = game.game_state_class.from_game(game, copy=True)
-        for action in possible_actions:
-            next_state = game.step(action, real_move = False)
-            next_states.append(next_state)
-        #next_states = [game.step(action, real_move = False) for action in possible_actions]
-        evaluations = self.evaluate_states(next_states)
+        deadline = self.get_move_deadline(game, start)
+        if deadline is not None or self.max_evaluations_per_move is not None:
+            evaluations = self.evaluate_actions_anytime(game, possible_actions, deadline)
+            selected_move_idx = self.select_action_strategy(evaluations)
+            self.last_evaluation = float(evaluations[selected_move_idx])
+            return possible_actions[selected_move_idx]
+        evaluations = self.evaluate_actions(game, possible_actions)
         self.logger.debug(f"Moves and evaluations:\n{list(zip(possible_actions, evaluations))}")
         assert len(evaluations) == len(possible_actions), f"Number of evaluations ({len(evaluations)}) must match the number of possible actions ({len(possible_actions)})"
         selected_move_idx = self.select_action_strategy(evaluations)
+        self.last_evaluation = float(evaluations[selected_move_idx])
         return possible_actions[selected_move_idx]
 
+    def set_move_budget(self, time_limit : float = None, max_evaluations : int = None, chunk_size : int = 64) -> None:
+        """ Limit the time (seconds) or the number of evaluated successors per move.
+        With a budget, choose_move evaluates the successors in chunks of chunk_size in the order of prioritize_actions,
+        and selects the move from the evaluated successors, when the budget runs out.
+        The game can also limit the time of each move (see Game.move_deadline).
+        """
+        assert chunk_size >= 1, f"chunk_size must be atleast 1, not {chunk_size}"
+        self.move_time_limit = time_limit
+        self.max_evaluations_per_move = max_evaluations
+        self.evaluation_chunk_size = chunk_size
+
+    def get_move_deadline(self, game : 'Game', start : float) -> Optional[float]:
+        """ Return the time (time.perf_counter) by which the move should be selected,
+        from the player's move_time_limit and the game's move_deadline, or None if there is no time limit.
+        """
+        deadlines = [d for d in [game.move_deadline, start + self.move_time_limit if self.move_time_limit is not None else None]
+                     if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def teardown(self, game : 'Game') -> None:
+        """ Called at the end of each game, for example to release the resources held during the game.
+        """
+        pass
+
+    def prioritize_actions(self, game : 'Game', actions : List['Action']) -> List[int]:
+        """ Return the order (indices of actions), in which the successors are evaluated, when the move has a budget.
+        This should be cheap compared to evaluating the successors. By default, the actions are in the generated order.
+        """
+        return list(range(len(actions)))
+
+    def evaluate_actions_anytime(self, game : 'Game', actions : List['Action'], deadline : float = None) -> np.ndarray:
+        """ Evaluate the successors of the actions in chunks, in the order of prioritize_actions,
+        until all the successors are evaluated, max_evaluations_per_move successors are evaluated, or the deadline passes.
+        Atleast one chunk is always evaluated. The actions, whose successors were not evaluated, are evaluated as -inf.
+        """
+        order = self.prioritize_actions(game, actions)
+        num_to_evaluate = len(actions) if self.max_evaluations_per_move is None else min(len(actions), self.max_evaluations_per_move)
+        evaluations = np.full(len(actions), -np.inf)
+        num_evaluated = 0
+        while num_evaluated < num_to_evaluate:
+            if num_evaluated > 0 and deadline is not None and time.perf_counter() >= deadline:
+                break
+            chunk = order[num_evaluated:min(num_evaluated + self.evaluation_chunk_size, num_to_evaluate)]
+            chunk_evaluations = self.evaluate_actions(game, [actions[i] for i in chunk])
+            evaluations[chunk] = np.asarray(chunk_evaluations, dtype=np.float64).reshape(len(chunk))
+            num_evaluated += len(chunk)
+        if num_evaluated < len(actions):
+            self.num_truncated_moves += 1
+        self.logger.debug(f"Evaluated {num_evaluated}/{len(actions)} successors in the budget.")
+        return evaluations
+
+    def evaluate_actions(self, game : 'Game', actions : List['Action']) -> List[float]:
+        """ Evaluate the successors of the actions in the current state of the game.
+        By default, the successor states are created with game.step, and evaluated with evaluate_next_states.
+        Subclasses can override this to evaluate the actions without creating the successor states.
+        """
+        next_states = [game.step(action, real_move = False) for action in actions]
+        return self.evaluate_next_states(next_states)
+
+    def evaluate_next_states(self, next_states : List['GameState']) -> List[float]:
+        """ Evaluate the successor states with evaluate_states.
+        If deduplicate_successors is True, the states are grouped by their fingerprint,
+        and each unique state is evaluated only once.
+        """
+        self.num_successor_states += len(next_states)
+        if not self.deduplicate_successors:
+            self.num_evaluated_states += len(next_states)
+            return self.evaluate_states(next_states)
+        # fingerprint -> index in unique_states
+        unique_indices = {}
+        unique_states = []
+        state_to_unique = []
+        for state in next_states:
+            fingerprint = state.fingerprint(self.pid)
+            if fingerprint not in unique_indices:
+                unique_indices[fingerprint] = len(unique_states)
+                unique_states.append(state)
+            state_to_unique.append(unique_indices[fingerprint])
+        self.num_evaluated_states += len(unique_states)
+        unique_evaluations = self.evaluate_states(unique_states)
+        return [unique_evaluations[i] for i in state_to_unique]
+
     def _select_best_action(self, evaluations : List[float]) -> int:
         """ Select the action with the highest evaluation.
         """
-        return evaluations.index(max(evaluations))
+        return policies.greedy(evaluations)
     
     def _select_random_action(self, evaluations : List[float]) -> int:
         """ Select a random action.
         """
-        return np.random.choice(range(len(evaluations)))
+        return policies.uniform(evaluations, self.rng)
     
     def _select_weighted_action(self, evaluations : List[float], temperature : float = 1.0) -> int:
-        """ Select a random action, with the probability of each action being selected being proportional to the evaluation.
-        Temperature of 1.0 means that the selection probabilities are exactly proportional to the evaluations.
+        """ Select a random action from the softmax of the best actions, whose softmax probabilities sum to atleast 'temperature' (top-p sampling).
+        Temperature of 1.0 means that the selection probabilities are the softmax of all the evaluations.
         A temperature of 0.0 means that the action with the highest evaluation is always selected.
         """
-        # If temperature is 0 all weight is on the best action
-        if temperature == 0:
-            return self._select_best_action(evaluations)
-        assert temperature > 0, f"Temperature must be greater than 0, but was {temperature}"
-        choice_evals = [(i, e) for i, e in enumerate(evaluations)]
-        choice_evals = sorted(choice_evals, key = lambda x : x[1], reverse = True)
-        # Softmax
-        evals_exp = np.exp([x[1] for x in choice_evals]).flatten()
-        evals = evals_exp / np.sum(evals_exp)
-        cumsum = np.cumsum(evals)
-        # Find the first index where the cumulative sum is gte than p
-        idx = np.argmax(cumsum >= temperature)
-        # Redo the softmax
-        valid_choices = choice_evals[:idx+1]
-        evals_exp = np.exp([x[1] for x in valid_choices]).flatten()
-        evals = evals_exp / np.sum(evals_exp)
-        indices = [x[0] for x in valid_choices]
-        #print(f"valid_choices: {valid_choices}")
-        return np.random.choice(indices, p = evals)
+        return policies.top_p(evaluations, self.rng, p=temperature)
     
     def _select_epsilon_greedy_action(self, evaluations : List[float], epsilon : float = 0.1) -> int:
         """ Select a random action with probability epsilon, and the best action with probability 1-epsilon.
         """
-        if random.random() < epsilon:
-            return self._select_random_action(evaluations)
-        return self._select_best_action(evaluations)
+        return policies.epsilon_greedy(evaluations, self.rng, epsilon=epsilon)
+    
+    def make_action_selection_strategy(self, action_selection_strategy : str, action_selection_args : Tuple[Tuple, Dict] = ((), {})) -> Callable[[List[float]], int]:
+        """ Return a select_action_strategy function, that selects an action with the named strategy and arguments.
+        The strategies are "greedy", "random", "weighted" (top-p with p=temperature), "epsilon_greedy",
+        and the other policies in policies.POLICIES ("softmax", "top_p", "top_k", "gumbel").
+        """
+        action_selection_map = {
+            "greedy" : self._select_best_action,
+            "random" : self._select_random_action,
+            "weighted" : self._select_weighted_action,
+            "epsilon_greedy" : self._select_epsilon_greedy_action,
+        }
+        if action_selection_strategy not in action_selection_map and action_selection_strategy not in policies.POLICIES:
+            raise ValueError(f"Unknown action selection strategy '{action_selection_strategy}'")
+        if action_selection_strategy in ["greedy", "random"]:
+            if action_selection_args != ((), {}):
+                warnings.warn(f"action selection strategy '{action_selection_strategy}' does not use arguments.")
+                action_selection_args = ((), {})
+        if action_selection_strategy in action_selection_map:
+            f = action_selection_map[action_selection_strategy]
+        else:
+            policy = policies.POLICIES[action_selection_strategy]
+            f = lambda evaluations, *args, **kwargs : policy(evaluations, self.rng, *args, **kwargs)
+        return lambda evaluations : f(evaluations, *action_selection_args[0], **action_selection_args[1])
         
         
     @staticmethod
@@ -116,7 +231,10 @@ class Player(ABC):
             ft.wraps(func)
             def wrapper(self : 'Player', game : 'Game'):
                 self.pid = game.players.index(self)
-                self.is_finished = False 
+                self.is_finished = False
+                self.num_successor_states = 0
+                self.num_evaluated_states = 0
+                self.num_truncated_moves = 0
                 self.logger.debug(f"Initilaized player with arguments {self.as_json()}")
                 return func(self, game)
             return wrapper
@@ -1,6 +1,10 @@
-from typing import Dict, Any, TYPE_CHECKING, List
+import json
+import os
+from typing import Dict, Any, TYPE_CHECKING, List, Union
 
 import numpy as np
+from .GameStateStore import GameStateStore
+from .targets import build_value_targets
 if TYPE_CHECKING:
     from .GameState import GameState
     from .Action import Action
@@ -10,50 +14,144 @@ class Result:
     """ This class is used to describe
     what was simulated, and what we're the results.
     """
+    # From which perspectives the game states are saved: "all" players' perspectives, or only the state's "own" perspective.
+    state_perspectives = "all"
+    # The suffix of the manifest file, that is written next to the data file when the states are decimated
+    MANIFEST_SUFFIX = ".manifest.jsonl"
+    DECIMATION_STRATEGIES = ["none", "kth", "random", "dedup"]
+    # How the labels of the states are built: "mc", "nstep" or "td_lambda", and the arguments (gamma, n, lam) of the method.
+    # See targets.py
+    target_method = "mc"
+    target_args : Dict[str, Any] = {}
+    
     def __init__(self,
                  successful : bool = None,
                  player_jsons : List[Dict[str, Any]] = None,
                  finishing_order : List[int] = None,
                  logger_args : Dict[str, Any] = None,
                  game_state_class : 'GameState' = None,
-                 game_states : List['GameState'] = None,
+                 game_states : Union[GameStateStore, List['GameState']] = None,
                  previous_turns : List[int] = None,
                  winner : str = None,
+                 decimation : Union[str, List[str]] = "none",
+                 decimation_args : Dict[str, Any] = None,
         ):
+        """ decimation is a strategy (or a list of strategies, applied in order) to select
+        which of the retained game states are written to the data file:
+        - "none": Write all the states
+        - "kth": Write every k-th state (decimation_args={"k" : k})
+        - "random": Write a random subset of the states, atmost "max_states" states per game,
+        and if "fraction" is given, atmost that fraction of the states (decimation_args={"max_states" : n, "fraction" : f, "seed" : s})
+        - "dedup": Skip states, whose vectors are equal to the previous state's vectors.
+        """
         self.successful = successful
         self.player_jsons = player_jsons
         self.finishing_order = finishing_order
         self.logger_args = logger_args
         self.game_state_class = game_state_class
+        # If the game states are given as a list, keep them all
+        if isinstance(game_states, list):
+            store = GameStateStore(perspectives=self.state_perspectives)
+            for game_state in game_states:
+                store.append(game_state)
+            store.finalize()
+            game_states = store
         self.game_states = game_states
         self.previous_turns = previous_turns
         self.winner = winner
+        self.decimation = [decimation] if isinstance(decimation, str) else list(decimation)
+        self.decimation_args = decimation_args if decimation_args is not None else {}
+        for strategy in self.decimation:
+            assert strategy in self.DECIMATION_STRATEGIES, f"Unknown decimation strategy '{strategy}'. Available strategies: {self.DECIMATION_STRATEGIES}"
 
     def save_game_states_to_file(self, file_path : str) -> None:
-        """ Take all the game states as vectors (X), and label them with the final score of the player.
+        """ Take all the retained game states as vectors (X), and label them with the value targets
+        (by default the final score of the player).
         """
         assert file_path.endswith(".csv"), f"file_path must end with .csv, not {file_path}"
-        player_final_scores = self.game_states[-1].player_scores
-        #print(f"Final scores: {player_final_scores}")
-        #print(f"Number of game states: {len(self.game_states)}")
-        Xs = []
-        ys = []
-        total_game_states = len(self.game_states)
-        for curr_game_state_index, game_state in enumerate(self.game_states):
-            # Save the state from each player's perspective.
-            for perspective_pid in range(len(player_final_scores)):
-                Xs.append(game_state.to_vector(perspective_pid))
-                ys.append(player_final_scores[perspective_pid] * (1 - self.discount_factor(game_state, curr_game_state_index + 1, total_game_states)))
+        player_final_scores = self.modify_final_scores(list(self.game_states[-1].player_scores))
+        Xs, perspectives, state_indices = self.game_states.get_state_vectors()
+        total_game_states = self.game_states.total_num_states
+        if self.decimation != ["none"]:
+            Xs, perspectives, state_indices = self.decimate(Xs, perspectives, state_indices)
+            self.write_manifest(file_path, state_indices, total_game_states)
+        targets = self.build_targets(player_final_scores)
+        ys = targets[state_indices, perspectives]
         Xs = np.array(Xs, dtype=np.float16)
         ys = np.array(ys, dtype=np.float16)
         arr = np.hstack((Xs, ys.reshape(-1, 1)))
         self.save_array_to_file(arr, file_path)
-        #print(f"Saved {len(Xs)} states with {Xs.shape[1]} features to {file_path}")
         
-    def discount_factor(self, game_state, curr_game_state_num : int, total_game_states : int) -> float:
-        """ Calculate the discount factor for the current game state.
+    def decimate(self, Xs : np.ndarray, perspectives : np.ndarray, state_indices : np.ndarray):
+        """ Select the rows of the states chosen by the decimation strategies.
+        All the rows (perspectives) of a state are either kept or dropped together.
+        """
+        unique_states, state_starts = np.unique(state_indices, return_index=True)
+        keep = np.ones(len(unique_states), dtype=bool)
+        for strategy in self.decimation:
+            kept_positions = np.flatnonzero(keep)
+            if strategy == "kth":
+                k = self.decimation_args.get("k", 2)
+                keep[kept_positions[np.arange(len(kept_positions)) % k != 0]] = False
+            elif strategy == "random":
+                max_states = self.decimation_args.get("max_states", len(kept_positions))
+                max_states = min(max_states, int(np.ceil(self.decimation_args.get("fraction", 1.0) * len(kept_positions))))
+                if len(kept_positions) > max_states:
+                    rng = np.random.default_rng(self.decimation_args.get("seed", None))
+                    chosen = rng.choice(kept_positions, size=max_states, replace=False)
+                    keep[:] = False
+                    keep[chosen] = True
+            elif strategy == "dedup":
+                # The rows of each state, as bytes, to compare consecutive states
+                state_ends = np.append(state_starts[1:], len(state_indices))
+                previous_rows = None
+                for position, (start, end) in enumerate(zip(state_starts, state_ends)):
+                    rows = Xs[start:end].tobytes()
+                    if rows == previous_rows:
+                        keep[position] = False
+                    previous_rows = rows
+        row_mask = np.isin(state_indices, unique_states[keep])
+        return Xs[row_mask], perspectives[row_mask], state_indices[row_mask]
+
+    def write_manifest(self, file_path : str, state_indices : np.ndarray, total_game_states : int) -> None:
+        """ Append a line describing which states of the game were written to the data file,
+        to the manifest file next to the data file.
+        """
+        manifest_path = file_path[:-len(".csv")] + self.MANIFEST_SUFFIX
+        manifest = {
+            "file" : os.path.basename(file_path),
+            "decimation" : self.decimation,
+            "decimation_args" : self.decimation_args,
+            "total_game_states" : total_game_states,
+            "num_rows" : len(state_indices),
+            "chosen_state_indices" : np.unique(state_indices).tolist(),
+        }
+        with open(manifest_path, "a") as f:
+            f.write(json.dumps(manifest) + "\n")
+
+    def build_targets(self, final_scores : List[float]) -> np.ndarray:
+        """ Build the value targets of every appended state from every perspective, shape (total_num_states, num_players).
+        """
+        scores = self.modify_scores_to_date(self.game_states.get_scores())
+        values = self.game_states.get_values()
+        return build_value_targets(final_scores,
+                                   scores=scores,
+                                   method=self.target_method,
+                                   values=values,
+                                   **self.target_args)
+
+    @staticmethod
+    def modify_final_scores(final_scores : List[float]) -> List[float]:
+        """ Modify the final scores, before they are used as labels.
+        """
+        return final_scores
+
+    def modify_scores_to_date(self, scores : np.ndarray) -> np.ndarray:
+        """ Modify the scores of the players in each state (shape (num_states, num_players)),
+        to the same scale as the modified final scores.
+        By default, the scores-to-date are not used (they are zero), and the final score is the only reward.
         """
-        return 0
+        return np.zeros_like(scores)
         
     def save_array_to_file(self, arr : np.ndarray, file_path : str) -> None:
         """ Write the array to a file.
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import zlib
+from typing import Callable, Dict, List, Tuple
+
+from .Result import Result
+
+"""
+Deduplicate the states in a set of data files (written with Result.save_game_states_to_file).
+
+Many states (for example openings) repeat in many games, so the data contains many duplicate rows with different labels.
+The duplicates are merged into a single row, with the average label, and the number of merged rows as a sample weight:
+    x1,x2,...,xn,y  ->  x1,x2,...,xn,mean(y),count
+
+The files are streamed, so the memory usage does not depend on the size of the data:
+1. Each row is written to one of num_partitions temporary partition files, based on the hash of its state (all columns except the last).
+Hence, all duplicates of a state end up in the same partition.
+2. Each partition is read in to memory, and the duplicates are merged, and written to an output file.
+"""
+
+def _split_label(line : str) -> Tuple[str, float]:
+    """ Split a data line to the state (as text) and the label.
+    """
+    state, label = line.rstrip("\n").rsplit(",", 1)
+    return state, float(label)
+
+def _partition_files(file_paths : List[str], partition_folder : str, num_partitions : int) -> Tuple[List[str], int]:
+    """ Write the lines of the files to partition files, based on the hash of the state.
+    Returns the paths of the partition files, and the number of lines read.
+    """
+    partition_paths = [os.path.join(partition_folder, f"partition_{i}.csv") for i in range(num_partitions)]
+    partition_files = [open(path, "w") for path in partition_paths]
+    num_lines = 0
+    try:
+        for file_path in file_paths:
+            with open(file_path, "r") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    state = line.rsplit(",", 1)[0]
+                    partition = zlib.crc32(state.encode()) % num_partitions
+                    partition_files[partition].write(line if line.endswith("\n") else line + "\n")
+                    num_lines += 1
+    finally:
+        for f in partition_files:
+            f.close()
+    return partition_paths, num_lines
+
+def _merge_partition(partition_path : str, output_path : str) -> int:
+    """ Merge the duplicate states in a partition, and write them with their average label and count.
+    Returns the number of unique states.
+    """
+    # state -> [sum of labels, count]
+    states : Dict[str, List[float]] = {}
+    with open(partition_path, "r") as f:
+        for line in f:
+            state, label = _split_label(line)
+            if state in states:
+                states[state][0] += label
+                states[state][1] += 1
+            else:
+                states[state] = [label, 1]
+    if not states:
+        return 0
+    with open(output_path, "w") as f:
+        for state, (label_sum, count) in states.items():
+            f.write(f"{state},{label_sum / count:f},{count}\n")
+    return len(states)
+
+def deduplicate_files(paths,
+                      output_folder : str,
+                      num_partitions : int = 64,
+                      filter_files_fn : Callable[[str], bool] = None,
+                      exists_ok : bool = False,
+                      ) -> Tuple[int, int]:
+    """ Deduplicate the data files in the folder(s) paths, and write the deduplicated
+    data to output_folder, as (atmost) num_partitions files.
+    The last column of the output files is the number of merged rows (the sample weight),
+    so the output should be read with read_to_dataset(..., sample_weights=True).
+    Returns the number of rows read, and the number of rows written.
+    """
+    if not isinstance(paths, (list, tuple)):
+        paths = [paths]
+    if filter_files_fn is None:
+        filter_files_fn = lambda x: True
+    file_paths = [os.path.join(path, file) for path in paths for file in os.listdir(path)
+                  if filter_files_fn(file) and not file.endswith(Result.MANIFEST_SUFFIX)]
+    os.makedirs(output_folder, exist_ok=exists_ok)
+    partition_folder = tempfile.mkdtemp(dir=output_folder)
+    try:
+        partition_paths, num_lines = _partition_files(file_paths, partition_folder, num_partitions)
+        num_unique = 0
+        for i, partition_path in enumerate(partition_paths):
+            num_unique += _merge_partition(partition_path, os.path.join(output_folder, f"dedup_{i}.csv"))
+            os.remove(partition_path)
+    finally:
+        shutil.rmtree(partition_folder)
+    print(f"Deduplicated {num_lines} rows to {num_unique} rows")
+    return num_lines, num_unique
@@ -6,6 +6,7 @@ import tensorflow as tf
 from .simulate import simulate_games
 from RLFramework import Game, Player
 from RLFramework.read_to_dataset import read_to_dataset
+from RLFramework.deduplicate import deduplicate_files
 from RLFramework.utils import convert_model_to_tflite
 
 """
@@ -26,6 +27,8 @@ The loop works as follows:
     - The number of cpus to use.
     - The folder to save the results to.
     - Whether to keep old datasets or not.
+    - Whether to deduplicate the states before training. The duplicate states (also across epochs, if cumulate_data)
+    are merged to one sample with the average label, weighted by the number of duplicates.
 """
 
 class PickleableFunction:
@@ -52,7 +55,9 @@ def fit_model(
         starting_epoch : int = 0,
         cumulate_data : bool = False,
         delete_data_after_fit : bool = False,
-        validation_frac : float = 0.2
+        validation_frac : float = 0.2,
+        deduplicate : bool = False,
+        deduplicate_partitions : int = 64,
     ):
     """ Fit a model to play a game.
     The model is fitted by alternating between simulating games, and training a model.
@@ -78,12 +83,20 @@ def fit_model(
         if not cumulate_data:
             data_folders = []
         data_folders.append(folder)
-        train_ds, val_ds, num_files, approx_num_samples = read_to_dataset(data_folders, frac_test_files=validation_frac)
+        if deduplicate:
+            print("Deduplicating data...")
+            dedup_folder = f"{base_folder}/epoch_{epoch}_dedup"
+            deduplicate_files(data_folders, dedup_folder, num_partitions=deduplicate_partitions, exists_ok=True)
+            train_ds, val_ds, num_files, approx_num_samples = read_to_dataset(dedup_folder, frac_test_files=validation_frac, sample_weights=True)
+        else:
+            train_ds, val_ds, num_files, approx_num_samples = read_to_dataset(data_folders, frac_test_files=validation_frac)
         # Fit the model
         print("Fitting model...")
         model_path = model_fit(train_ds, val_ds, epoch, approx_num_samples)
         if delete_data_after_fit:
             shutil.rmtree(folder)
+        if deduplicate:
+            shutil.rmtree(dedup_folder)
         model_path = convert_model_to_tflite(model_path)
         
         print(f"Model path: {model_path}")
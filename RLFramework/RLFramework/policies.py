@@ -0,0 +1,98 @@
+from typing import Callable, Dict, List, Union
+import numpy as np
+
+"""
+Action selection policies.
+
+A policy selects the index of an action, given the evaluations of the actions (higher is better).
+The evaluations can be a list of floats, a list of arrays with one element (as returned by TFLiteModel.predict), or an ndarray.
+All the randomness comes from the given np.random.Generator, so each player can have its own generator.
+"""
+
+Evaluations = Union[List[float], List[np.ndarray], np.ndarray]
+
+def as_scores(evaluations : Evaluations) -> np.ndarray:
+    """ Convert the evaluations to a 1D float array.
+    """
+    scores = np.asarray(evaluations, dtype=np.float64)
+    if scores.ndim > 1:
+        scores = scores.reshape(len(scores), -1)
+        if scores.shape[1] != 1:
+            raise ValueError(f"Each evaluation must be a single value, but the evaluations have shape {scores.shape}")
+        scores = scores[:, 0]
+    return scores
+
+def _softmax(scores : np.ndarray, temperature : float = 1.0) -> np.ndarray:
+    exps = np.exp((scores - np.max(scores)) / temperature)
+    return exps / np.sum(exps)
+
+def greedy(evaluations : Evaluations, rng : np.random.Generator = None) -> int:
+    """ Select the action with the highest evaluation (the first one, if there are ties).
+    """
+    return int(np.argmax(as_scores(evaluations)))
+
+def uniform(evaluations : Evaluations, rng : np.random.Generator) -> int:
+    """ Select a random action.
+    """
+    return int(rng.integers(len(evaluations)))
+
+def epsilon_greedy(evaluations : Evaluations, rng : np.random.Generator, epsilon : float = 0.1) -> int:
+    """ Select a random action with probability epsilon, and the best action with probability 1-epsilon.
+    """
+    if rng.random() < epsilon:
+        return uniform(evaluations, rng)
+    return greedy(evaluations)
+
+def softmax(evaluations : Evaluations, rng : np.random.Generator, temperature : float = 1.0) -> int:
+    """ Sample an action from the softmax of the evaluations divided by the temperature.
+    A temperature of 0 always selects the best action.
+    """
+    if temperature == 0:
+        return greedy(evaluations)
+    assert temperature > 0, f"Temperature must be non-negative, but was {temperature}"
+    probs = _softmax(as_scores(evaluations), temperature)
+    return int(rng.choice(len(probs), p=probs))
+
+def top_p(evaluations : Evaluations, rng : np.random.Generator, p : float = 1.0) -> int:
+    """ Sample an action from the softmax of the smallest set of best actions, whose softmax probabilities sum to atleast p.
+    A p of 0 always selects the best action.
+    """
+    if p == 0:
+        return greedy(evaluations)
+    assert p > 0, f"p must be non-negative, but was {p}"
+    scores = as_scores(evaluations)
+    order = np.argsort(-scores, kind="stable")
+    probs = _softmax(scores[order])
+    # The number of best actions needed to reach p (tolerate rounding errors in the cumulative sum)
+    num_actions = min(int(np.searchsorted(np.cumsum(probs), p - 1e-9)) + 1, len(order))
+    probs = probs[:num_actions] / np.sum(probs[:num_actions])
+    return int(order[rng.choice(num_actions, p=probs)])
+
+def top_k(evaluations : Evaluations, rng : np.random.Generator, k : int = 1, temperature : float = 1.0) -> int:
+    """ Sample an action from the softmax (with temperature) of the k best actions.
+    """
+    scores = as_scores(evaluations)
+    k = min(k, len(scores))
+    if k == 1 or temperature == 0:
+        return greedy(scores)
+    best = np.argpartition(-scores, k - 1)[:k]
+    return int(best[softmax(scores[best], rng, temperature)])
+
+def gumbel(evaluations : Evaluations, rng : np.random.Generator, temperature : float = 1.0) -> int:
+    """ Sample an action from the softmax with temperature, using the Gumbel-max trick:
+    the best action after adding Gumbel noise to the scaled evaluations.
+    """
+    if temperature == 0:
+        return greedy(evaluations)
+    scores = as_scores(evaluations)
+    return int(np.argmax(scores / temperature + rng.gumbel(size=len(scores))))
+
+POLICIES : Dict[str, Callable[..., int]] = {
+    "greedy" : greedy,
+    "random" : uniform,
+    "epsilon_greedy" : epsilon_greedy,
+    "softmax" : softmax,
+    "top_p" : top_p,
+    "top_k" : top_k,
+    "gumbel" : gumbel,
+}
@@ -4,14 +4,19 @@ from typing import Tuple
 import warnings
 import tensorflow as tf
 
+from .Result import Result
 
 def read_to_dataset(paths,
                     frac_test_files=0,
                     add_channel=False,
                     shuffle_files=True,
-                    filter_files_fn = None) -> Tuple[tf.data.Dataset, int, int]:
+                    filter_files_fn = None,
+                    sample_weights = False) -> Tuple[tf.data.Dataset, int, int]:
     """ Create a tf dataset from a folder of files.
     If split_files_to_test_set is True, then frac_test_files of the files are used for testing.
+    Manifest files (written when the states are decimated) are always skipped.
+    If sample_weights is True, the last column of the files is a sample weight (see deduplicate.py),
+    and the datasets contain (x, y, weight) tuples.
     
     """
     assert 0 <= frac_test_files <= 1, "frac_test_files must be between 0 and 1"
@@ -21,7 +26,8 @@ def read_to_dataset(paths,
         filter_files_fn = lambda x: True
     
     # Find all files in paths, that fit the filter_files_fn
-    file_paths = [os.path.join(path, file) for path in paths for file in os.listdir(path) if filter_files_fn(file)]
+    file_paths = [os.path.join(path, file) for path in paths for file in os.listdir(path)
+                  if filter_files_fn(file) and not file.endswith(Result.MANIFEST_SUFFIX)]
     if shuffle_files:
         random.shuffle(file_paths)
         
@@ -33,7 +39,12 @@ def read_to_dataset(paths,
     def txt_line_to_tensor(x):
         s = tf.strings.split(x, sep=",")
         s = tf.strings.to_number(s, out_type=tf.float32)
+        if sample_weights:
+            return (s[:-2], s[-2], s[-1])
         return (s[:-1], s[-1])
+    
+    def expand_dims(x, *rest):
+        return (tf.expand_dims(x, axis=-1), *rest)
 
     def ds_maker(x):
         ds = tf.data.TextLineDataset(x, num_parallel_reads=tf.data.experimental.AUTOTUNE)
@@ -52,7 +63,7 @@ def read_to_dataset(paths,
                                 num_parallel_calls=tf.data.experimental.AUTOTUNE,
                                 deterministic=False)
         if add_channel:
-            test_ds = test_ds.map(lambda x, y: (tf.expand_dims(x, axis=-1), y), num_parallel_calls=tf.data.experimental.AUTOTUNE)
+            test_ds = test_ds.map(expand_dims, num_parallel_calls=tf.data.experimental.AUTOTUNE)
     train_ds = tf.data.Dataset.from_tensor_slices(train_files)
     train_ds = train_ds.interleave(ds_maker,
                                 cycle_length=tf.data.experimental.AUTOTUNE,
@@ -60,7 +71,7 @@ def read_to_dataset(paths,
                                 deterministic=False)
     # Add a channel dimension if necessary
     if add_channel:
-        train_ds = train_ds.map(lambda x, y: (tf.expand_dims(x, axis=-1), y), num_parallel_calls=tf.data.experimental.AUTOTUNE)
+        train_ds = train_ds.map(expand_dims, num_parallel_calls=tf.data.experimental.AUTOTUNE)
     if len(test_files) > 0:
         return train_ds, test_ds, len(file_paths), num_samples*len(file_paths)
     return train_ds, len(file_paths), num_samples*len(file_paths)
\ No newline at end of file
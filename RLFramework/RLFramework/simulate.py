@@ -13,10 +13,11 @@ from .Player import Player
 
 def run_game(args):
     i, game_func, players_func, seed = args
-    game = game_func(i)
-    players = players_func(i)
+    # Seed before creating the players, since their random number generators are seeded from numpy's global random state
     random.seed(seed)
     np.random.seed(seed)
+    game = game_func(i)
+    players = players_func(i)
     random.shuffle(players)
     return game.play_game(players)
  
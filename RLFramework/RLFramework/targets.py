@@ -0,0 +1,109 @@
+from typing import Optional
+import numpy as np
+
+"""
+Build the value targets (labels) of the states of a game.
+
+The value of a state (from a players perspective) is the players final score.
+The final score is split in to the score-to-date S_t of the state and the future rewards r_t = S_{t+1} - S_t,
+where the score after the last state S_T is the final score. The target of a state t is then
+    S_t + G_t,
+where G_t is an estimate of the (discounted) future rewards:
+- "mc": The discounted sum of all future rewards. With gamma = 1, the target is the final score.
+- "nstep": The discounted sum of the next n rewards, and the discounted value of the state t+n,
+bootstrapped from a model value: V_{t+n} - S_{t+n}.
+- "td_lambda": The lambda-weighted average of all n-step returns.
+
+Model values are not always available (for example if the state was not evaluated by a model). Missing values are NaN,
+and the targets fall back to the Monte-Carlo return, where a value would be needed.
+
+The discounted sums are computed backwards over the states, in O(T) time and memory, where T is the number of states.
+"""
+
+TARGET_METHODS = ["mc", "nstep", "td_lambda"]
+
+def _discounted_sums(x : np.ndarray, factor : float, max_steps : Optional[int] = None) -> np.ndarray:
+    """ Return y, where y[t] = sum_{k >= 0} factor^k * x[t+k], with atmost max_steps terms.
+    The sums are computed backwards with y[t] = x[t] + factor * y[t+1], and the sum of max_steps terms is
+    the difference y[t] - factor^max_steps * y[t+max_steps].
+    """
+    y = np.array(x, dtype=np.float64)
+    for t in range(y.shape[0] - 2, -1, -1):
+        y[t] += factor * y[t + 1]
+    if max_steps is not None and max_steps < y.shape[0]:
+        y[:-max_steps] -= float(factor) ** max_steps * y[max_steps:]
+    return y
+
+def build_value_targets(final_scores,
+                        scores = None,
+                        method : str = "mc",
+                        gamma : float = 1.0,
+                        n : int = 1,
+                        lam : float = 0.9,
+                        values = None,
+                        ) -> np.ndarray:
+    """ Build the value targets of each state from each perspective.
+    final_scores: The final scores of the players, shape (P,)
+    scores: The score-to-date of each player in each state, shape (T, P). If None, the scores are zero,
+    i.e. the final score is the only reward, and T is the number of rows in values.
+    values: The model values of the states, shape (T, P), NaN where the value is not available.
+    Returns the targets, shape (T, P).
+    """
+    if method not in TARGET_METHODS:
+        raise ValueError(f"Unknown target method '{method}'. Available methods: {TARGET_METHODS}")
+    final_scores = np.asarray(final_scores, dtype=np.float64)
+    if scores is None:
+        num_states = 0 if values is None else np.asarray(values).reshape(-1, len(final_scores)).shape[0]
+        scores = np.zeros((num_states, len(final_scores)))
+    scores = np.asarray(scores, dtype=np.float64).reshape(-1, len(final_scores))
+    T = scores.shape[0]
+    if T == 0:
+        return np.zeros((0, len(final_scores)))
+    rewards = np.vstack((scores[1:], final_scores)) - scores
+    mc_returns = _discounted_sums(rewards, gamma)
+    if method == "mc" or values is None:
+        return scores + mc_returns
+    # The values of the future rewards, bootstrapped from the model values
+    bootstrap = np.asarray(values, dtype=np.float64).reshape(T, -1) - scores
+    if method == "nstep":
+        returns = _discounted_sums(rewards, gamma, max_steps=n)
+        bootstrap_idx = np.arange(T) + n
+        has_bootstrap = bootstrap_idx < T
+        bootstrap_n = np.full_like(returns, np.nan)
+        bootstrap_n[has_bootstrap] = bootstrap[bootstrap_idx[has_bootstrap]]
+        can_bootstrap = np.isfinite(bootstrap_n)
+        returns = np.where(can_bootstrap, returns + gamma ** n * np.nan_to_num(bootstrap_n), mc_returns)
+        return scores + returns
+    # td_lambda: G_t = B_t + sum_k (gamma * lam)^k * delta_{t+k}, where delta_t = r_t + gamma * B_{t+1} - B_t.
+    # If the missing values are replaced with the MC returns, then delta is zero there.
+    bootstrap = np.where(np.isfinite(bootstrap), bootstrap, mc_returns)
+    next_bootstrap = np.vstack((bootstrap[1:], np.zeros(bootstrap.shape[1])))
+    deltas = rewards + gamma * next_bootstrap - bootstrap
+    return scores + bootstrap + _discounted_sums(deltas, gamma * lam)
+
+def build_perspective_value_targets(final_scores,
+                                    pids,
+                                    values = None,
+                                    method : str = "mc",
+                                    gamma : float = 1.0,
+                                    n : int = 1,
+                                    lam : float = 0.9,
+                                    ) -> np.ndarray:
+    """ Build the value targets of a game, where the final score is the only reward, and the states of the players are interleaved,
+    each state being from the perspective of one player.
+    The targets of each player are built from the player's own states, so the n-step and TD(lambda) returns
+    bootstrap from the same player's later states (and n counts the player's own states).
+    final_scores: The final scores of the players, shape (P,)
+    pids: The player, whose perspective each state is from, shape (T,)
+    values: The model value of each state for its player, shape (T,), NaN where the value is not available.
+    Returns the target of each state for its player, shape (T,).
+    """
+    final_scores = np.asarray(final_scores, dtype=np.float64)
+    pids = np.asarray(pids, dtype=np.int64)
+    values = np.full(len(pids), np.nan) if values is None else np.asarray(values, dtype=np.float64)
+    targets = np.zeros(len(pids))
+    for pid in np.unique(pids):
+        rows = np.flatnonzero(pids == pid)
+        targets[rows] = build_value_targets(final_scores[pid:pid+1], method=method, gamma=gamma, n=n, lam=lam,
+                                            values=values[rows, np.newaxis])[:, 0]
+    return targets
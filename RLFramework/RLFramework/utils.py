@@ -18,6 +18,8 @@ class TFLiteModel:
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
         self.interpreter.allocate_tensors()
+        # The signature runner for models with multiple inputs (see predict_inputs)
+        self._signature_runner = None
         
     def is_valid_size_input(self, X) -> bool:
         """ Validate the input.
@@ -41,18 +43,40 @@ class TFLiteModel:
         out = self.interpreter.get_tensor(self.output_details[0]['index'])
         return list(out)
 
-def convert_model_to_tflite(file_path : str, output_file : str = None) -> None:
+    @property
+    def input_names(self) -> List[str]:
+        """ The names of the inputs of the model's signature.
+        """
+        return list(self.interpreter.get_signature_list()["serving_default"]["inputs"])
+
+    def predict_inputs(self, inputs : Dict[str, np.ndarray]) -> List[float]:
+        """ Predict the output of a model with multiple inputs, given by their names (see input_names).
+        """
+        if self._signature_runner is None:
+            self._signature_runner = self.interpreter.get_signature_runner()
+        out = self._signature_runner(**inputs)
+        return list(next(iter(out.values())))
+
+def convert_model_to_tflite(file_path : str, output_file : str = None, wrap_model = None, select_tf_ops : bool = True) -> None:
+    """ Convert the keras model at file_path to a TFLite model.
+    If wrap_model is given, the model is converted as wrap_model(model), for example to change the model's inputs.
+    If select_tf_ops is False, the model is converted with the TFLite builtin ops only (the conversion fails if the model needs TF ops),
+    so the interpreter does not need the TF ops, and XNNPACK can run the whole graph.
+    """
     if output_file is None:
         output_file = file_path.replace(".keras", ".tflite")
         
     print("Converting '{}' to '{}'".format(file_path, output_file))
 
     model = keras.models.load_model(file_path)
+    if wrap_model is not None:
+        model = wrap_model(model)
     converter = tf.lite.TFLiteConverter.from_keras_model(model)
     converter.target_spec.supported_ops = [
         tf.lite.OpsSet.TFLITE_BUILTINS, # enable TensorFlow Lite ops.
-        tf.lite.OpsSet.SELECT_TF_OPS # enable TensorFlow ops.
     ]
+    if select_tf_ops:
+        converter.target_spec.supported_ops.append(tf.lite.OpsSet.SELECT_TF_OPS) # enable TensorFlow ops.
     tflite_model = converter.convert()
 
     with open(output_file, "wb") as f:
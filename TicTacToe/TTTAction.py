@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING
+from typing import Tuple, TYPE_CHECKING
 
 from RLFramework.Action import Action
 from TTTGameState import TTTGameState
@@ -21,10 +21,12 @@ class TTTAction(Action):
         game.current_pid = -1# - game.current_pid
         return TTTGameState.from_game(game)
     
-    def check_action_is_legal(self, game : 'TTTGame') -> bool:
+    def check_action_is_legal(self, game : 'TTTGame') -> Tuple[bool, str]:
         """ Check if the action is legal in the given game state.
         """
-        return game.board[self.x][self.y] == -1
+        if game.board[self.x][self.y] != -1:
+            return False, f"The square ({self.x}, {self.y}) is already taken."
+        return True, ""
     
     @classmethod
     def check_action_is_legal_from_args(cls, game: 'TTTGame', x : int, y : int) -> bool:
@@ -0,0 +1,12 @@
+from RLFramework.ExpectimaxPlayer import ExpectimaxPlayer
+from TTTPlayerNeuralNet import TTTPlayerNeuralNet
+
+class TTTExpectimaxPlayer(ExpectimaxPlayer, TTTPlayerNeuralNet):
+    """ A TicTacToe player, that selects moves with a depth-limited expectimax search (see ExpectimaxPlayer),
+    and evaluates the states with the model at model_path.
+    The next player is selected randomly after each move, which is the chance node of the search.
+    """
+    def __init__(self, name : str = "ExpectimaxPlayer", model_path : str = "", move_selection_temp = 0, logger_args : dict = None,
+                 depth : int = 2, beam_width : int = 4, num_samples : int = 4, opponent_model : str = "min"):
+        super().__init__(name=name, model_path=model_path, move_selection_temp=move_selection_temp, logger_args=logger_args)
+        self.configure_expectimax(depth=depth, beam_width=beam_width, num_samples=num_samples, opponent_model=opponent_model)
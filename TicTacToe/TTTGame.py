@@ -114,6 +114,11 @@ class TTTGame(Game):
             return True
         return False
     
+    def estimate_remaining_turns(self) -> int:
+        """ The game ends atleast when the board is full.
+        """
+        return int(np.sum(np.array(self.board) == -1))
+    
     def get_all_possible_actions(self) -> List[TTTAction]:
         """ Return all possible actions.
         """
@@ -0,0 +1,23 @@
+from typing import List
+import numpy as np
+from RLFramework.MCTSPlayer import MCTSPlayer
+from TTTGameState import TTTGameState
+from TTTPlayer import TTTPlayer
+
+class TTTMCTSPlayer(MCTSPlayer, TTTPlayer):
+    """ A TicTacToe player, that selects moves with Monte-Carlo tree search (see MCTSPlayer).
+    The leaves are evaluated with the model at model_path. If no model is given, every leaf is a draw (0.5),
+    and only the terminal states inform the search.
+    """
+    def __init__(self, name : str = "MCTSPlayer", model_path : str = None, num_simulations : int = 200, time_limit : float = None,
+                 exploration : float = 1.4, reuse_tree : bool = True, leaf_batch_size : int = 1, num_workers : int = 1,
+                 logger_args : dict = None):
+        super().__init__(name, logger_args)
+        self.model_path = model_path
+        self.configure_mcts(num_simulations=num_simulations, time_limit=time_limit, exploration=exploration, reuse_tree=reuse_tree,
+                            leaf_batch_size=leaf_batch_size, num_workers=num_workers)
+
+    def evaluate_leaves(self, states : List[TTTGameState]) -> np.ndarray:
+        if self.model_path:
+            return self.predict_values(self.game.get_model(self.model_path), states)
+        return np.full((len(states), len(self.game.players)), 0.5)
@@ -0,0 +1,59 @@
+import os
+import random
+import time
+
+import numpy as np
+
+from TTTGame import TTTGame
+from TTTPlayer import TTTPlayer
+from TTTPlayerNeuralNet import TTTPlayerNeuralNet
+from TTTExpectimaxPlayer import TTTExpectimaxPlayer
+from TTTResult import TTTResult
+
+""" Play games between TTTExpectimaxPlayers with different search settings and a random player,
+and report the accuracy/latency tradeoff: the win rate against the random player, and the time per move.
+The one-ply TTTPlayerNeuralNet is the baseline.
+"""
+
+MODEL_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "TTT3x3.tflite"))
+
+def play_games(make_player, num_games):
+    """ Return the number of wins, draws and losses, and the average time per move of the player.
+    """
+    counts = [0, 0, 0]
+    move_time = 0.0
+    num_moves = 0
+    for i in range(num_games):
+        game = TTTGame(board_size=(3,3), custom_result_class=TTTResult, timeout=1000)
+        player = make_player()
+        choose_move = player.choose_move
+        def timed_choose_move(game):
+            nonlocal move_time, num_moves
+            start = time.perf_counter()
+            action = choose_move(game)
+            move_time += time.perf_counter() - start
+            num_moves += 1
+            return action
+        player.choose_move = timed_choose_move
+        players = [player, TTTPlayer(name="RandomPlayer")]
+        if i % 2 == 1:
+            players.reverse()
+        game.play_game(players)
+        other = [p for p in players if p is not player][0]
+        counts[0 if player.score > other.score else 1 if player.score == other.score else 2] += 1
+    return counts, move_time / max(num_moves, 1)
+
+if __name__ == "__main__":
+    num_games = 40
+    settings = [
+        ("one-ply (TTTPlayerNeuralNet)", lambda : TTTPlayerNeuralNet(name="Player", model_path=MODEL_PATH)),
+        ("depth 1, 4 samples", lambda : TTTExpectimaxPlayer(name="Player", model_path=MODEL_PATH, depth=1, num_samples=4)),
+        ("depth 2, beam 2, 4 samples", lambda : TTTExpectimaxPlayer(name="Player", model_path=MODEL_PATH, depth=2, beam_width=2, num_samples=4)),
+        ("depth 2, beam 4, 4 samples", lambda : TTTExpectimaxPlayer(name="Player", model_path=MODEL_PATH, depth=2, beam_width=4, num_samples=4)),
+        ("depth 3, beam 4, 4 samples", lambda : TTTExpectimaxPlayer(name="Player", model_path=MODEL_PATH, depth=3, beam_width=4, num_samples=4)),
+    ]
+    for name, make_player in settings:
+        random.seed(0)
+        np.random.seed(0)
+        (wins, draws, losses), move_time = play_games(make_player, num_games)
+        print(f"{name}: {wins} wins, {draws} draws, {losses} losses, {1000 * move_time:.1f} ms per move")
@@ -0,0 +1,39 @@
+import random
+import time
+
+import numpy as np
+
+from TTTGame import TTTGame
+from TTTPlayer import TTTPlayer
+from TTTMCTSPlayer import TTTMCTSPlayer
+from TTTResult import TTTResult
+
+""" Play games between a TTTMCTSPlayer (without a model) and a random player,
+and report the MCTS player's wins, draws and losses, and the search statistics.
+"""
+
+if __name__ == "__main__":
+    random.seed(0)
+    np.random.seed(0)
+    num_games = 50
+    counts = {"wins" : 0, "draws" : 0, "losses" : 0}
+    searches = simulations = 0
+    start = time.perf_counter()
+    for i in range(num_games):
+        game = TTTGame(board_size=(3,3), custom_result_class=TTTResult, timeout=1000)
+        players = [TTTMCTSPlayer(name="MCTSPlayer", num_simulations=200), TTTPlayer(name="RandomPlayer")]
+        if i % 2 == 1:
+            players.reverse()
+        result = game.play_game(players)
+        mcts_json = [js for js in result.player_jsons if js["name"] == "MCTSPlayer"][0]
+        other_json = [js for js in result.player_jsons if js["name"] != "MCTSPlayer"][0]
+        if mcts_json["score"] > other_json["score"]:
+            counts["wins"] += 1
+        elif mcts_json["score"] == other_json["score"]:
+            counts["draws"] += 1
+        else:
+            counts["losses"] += 1
+        searches += mcts_json["mcts"]["num_searches"]
+        simulations += mcts_json["mcts"]["num_simulations"]
+    print(f"Played {num_games} games in {time.perf_counter() - start:.2f} s: {counts}")
+    print(f"{searches} searches, {simulations / max(searches, 1):.1f} simulations per search")